@@ -0,0 +1,89 @@
+"""Compare the wall time of the poetry backends
+
+Each backend runs the sequence of poetry commands a poetryup run needs in a
+fresh interpreter, on a scratch copy of the given project, so that the cost of
+booting poetry is included.
+
+Usage:
+    python benchmarks/bench_backends.py path/to/project --repeat 3
+"""
+
+import argparse
+import json
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from poetryup.core.poetry import Backend, create_poetry
+
+# read-only commands which mirror a poetryup run: a version probe, reading the
+# installed dependencies and refreshing the lock file
+COMMANDS = [
+    (["--version"], True),
+    (["show", "--tree"], True),
+    (["lock", "--no-update"], False),
+]
+
+
+def run_worker(backend: Backend) -> None:
+    """Run the commands with the given backend and print the timings"""
+
+    start = time.perf_counter()
+    poetry = create_poetry(backend)
+    timings = {"backend": type(poetry).__name__, "commands": []}
+    for args, capture_output in COMMANDS:
+        command_start = time.perf_counter()
+        poetry.run(args, capture_output=capture_output)
+        timings["commands"].append(
+            [" ".join(args), time.perf_counter() - command_start]
+        )
+    timings["total"] = time.perf_counter() - start
+    print(json.dumps(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("project", type=Path)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--worker", choices=[x.value for x in Backend])
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(Backend(args.worker))
+        return
+
+    for backend in Backend:
+        totals = []
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                for name in ["pyproject.toml", "poetry.lock"]:
+                    if (args.project / name).exists():
+                        shutil.copy(args.project / name, tmp_dir)
+                start = time.perf_counter()
+                output = subprocess.run(
+                    [
+                        sys.executable,
+                        __file__,
+                        str(args.project),
+                        "--worker",
+                        backend.value,
+                    ],
+                    cwd=tmp_dir,
+                    stdout=subprocess.PIPE,
+                    check=True,
+                ).stdout.decode()
+                totals.append(time.perf_counter() - start)
+        timings = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{backend.value:<12} ({timings['backend']}): "
+            f"best {min(totals):.3f}s, worst {max(totals):.3f}s"
+        )
+        for command, seconds in timings["commands"]:
+            print(f"    poetry {command:<20} {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare the dependency representation with the former frozen dataclass
+
+The former representation normalized the name and classified the constraint
+on every access. Both are compared for the memory of the dependencies of
+synthetic projects with 5,000 and more dependencies, and for the time to
+create them and to read their normalized name and constraint the way
+filtering and bumping do.
+
+Usage:
+    python benchmarks/bench_dependency.py
+    python benchmarks/bench_dependency.py --sizes 5000 50000 --repeat 5
+"""
+
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Tuple, Union
+
+from bench_pyproject import CONSTRAINTS, best_of
+
+from poetryup.models import dependency as dependency_
+
+SIZES = [5000, 20000, 100000]
+
+# number of times filtering and bumping read each dependency
+READS = 5
+
+
+@dataclass(frozen=True)
+class LegacyDependency:
+    name: str
+    version: Union[str, Dict, List]
+    group: str
+
+    @property
+    def normalized_name(self) -> str:
+        return dependency_.normalize_name(self.name)
+
+    @property
+    def constraint(self):
+        return dependency_.classify_constraint(self.version)
+
+
+def generate_fields(size: int) -> List[Tuple[str, str, str]]:
+    """Generate the fields of dependencies like a parsed pyproject has them"""
+
+    fields = []
+    for i in range(size):
+        # build names at runtime, like a parser does, so they aren't shared
+        name = "".join(["Package_", str(i % (size // 4 or 1))])
+        group = "".join(["g", str(i // 50)])
+        version = CONSTRAINTS[i % 6].format(v="1.0.0").strip('"')
+        fields.append((name, version, group))
+    return fields
+
+
+def memory(create: Callable[[], List]) -> int:
+    """Return the number of bytes allocated by create and kept alive"""
+
+    tracemalloc.start()
+    try:
+        kept = create()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def read(dependencies: List) -> None:
+    for _ in range(READS):
+        for dependency in dependencies:
+            dependency.normalized_name
+            dependency.constraint
+
+
+def run_benchmarks(size: int, repeat: int) -> Dict[str, Tuple[float, float]]:
+    """Compare both representations for one number of dependencies"""
+
+    fields = generate_fields(size)
+    results = {}
+    for label, cls in [
+        ("legacy", LegacyDependency),
+        ("current", dependency_.Dependency),
+    ]:
+
+        def create(cls=cls) -> List:
+            return [cls(name=n, version=v, group=g) for n, v, g in fields]
+
+        results[label] = (
+            memory(create),
+            best_of(create, repeat),
+            best_of(read, repeat, setup=create),
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(
+        "".join(
+            x.ljust(14)
+            for x in ["SIZE", "DEPENDENCY", "MEMORY", "CREATE", "READ"]
+        ).rstrip()
+    )
+    for size in args.sizes:
+        for label, (size_bytes, create, reads) in run_benchmarks(
+            size,
+            args.repeat,
+        ).items():
+            row = [
+                str(size),
+                label,
+                f"{size_bytes / 2**20:.2f}MiB",
+                f"{create:.4f}s",
+                f"{reads:.4f}s",
+            ]
+            print("".join(x.ljust(14) for x in row).rstrip())
+
+
+if __name__ == "__main__":
+    main()
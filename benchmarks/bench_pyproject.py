@@ -0,0 +1,245 @@
+"""Benchmark the pyproject engine on synthetic projects
+
+Synthetic pyprojects with 10 to 5,000 dependencies, spread across the default,
+dev and many group tables in every constraint kind, are timed for parsing,
+listing, filtering, bumping (against a canned lock file) and dumping the
+bumped dependencies.
+
+Results are compared against stored baselines, a benchmark fails if it is
+slower than its baseline by more than the tolerance, or if its time grows
+faster than linearly with the number of dependencies, which catches quadratic
+behavior independently of the machine.
+
+Usage:
+    python benchmarks/bench_pyproject.py               # compare to baselines
+    python benchmarks/bench_pyproject.py --save        # store new baselines
+    python benchmarks/bench_pyproject.py --sizes 10 100
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from poetryup.core.pyproject import Pyproject
+from poetryup.models.dependency import Constraint
+
+BASELINES_PATH = Path(__file__).with_name("baselines.json")
+SIZES = [10, 100, 1000, 5000]
+
+# dependencies per group table
+GROUP_SIZE = 50
+
+# TOML values of each constraint kind, formatted with a version
+CONSTRAINTS = [
+    '"^{v}"',
+    '"~{v}"',
+    '"*"',
+    '">={v}"',
+    '"{v}"',
+    '">={v},<99.0.0"',
+    '[{{ version = "{v}", python = "<3.8" }}, '
+    '{{ version = ">={v}", python = ">=3.8" }}]',
+    '{{ version = "^{v}", extras = ["foo"] }}',
+    '{{ version = "^{v}", python = ">=3.7" }}',
+]
+
+
+def generate_pyproject(size: int) -> str:
+    """Generate a pyproject with the given number of dependencies"""
+
+    tables: Dict[str, List[str]] = {}
+    for i in range(size):
+        if i % 4 == 0:
+            table = "tool.poetry.dependencies"
+        elif i % 4 == 1:
+            table = "tool.poetry.dev-dependencies"
+        else:
+            table = f"tool.poetry.group.g{i // GROUP_SIZE}.dependencies"
+        constraint = CONSTRAINTS[i % len(CONSTRAINTS)].format(v="1.0.0")
+        tables.setdefault(table, []).append(f"package_{i} = {constraint}")
+
+    lines = ["[tool.poetry]", 'name = "bench"', 'version = "0.1.0"', ""]
+    tables.setdefault("tool.poetry.dependencies", []).insert(
+        0, 'python = "^3.7"'
+    )
+    for table, dependencies in tables.items():
+        lines += [f"[{table}]", *dependencies, ""]
+    return "\n".join(lines)
+
+
+def generate_lock(size: int) -> str:
+    """Generate a lock file locking every dependency to a newer version"""
+
+    packages = []
+    for i in range(size):
+        packages.append(
+            "[[package]]\n"
+            f'name = "package-{i}"\n'
+            'version = "1.2.3"\n'
+            'description = ""\n'
+            'category = "main"\n'
+            "optional = false\n"
+            'python-versions = "*"\n'
+        )
+    packages.append(
+        "[metadata]\n"
+        'lock-version = "1.1"\n'
+        'python-versions = "^3.7"\n'
+        'content-hash = "0"\n'
+    )
+    return "\n".join(packages)
+
+
+def best_of(
+    func: Callable[..., Any],
+    repeat: int,
+    setup: Optional[Callable[[], Any]] = None,
+) -> float:
+    """Return the best wall time of repeated calls
+
+    The result of setup, which isn't timed, is passed to each call.
+    """
+
+    timings = []
+    for _ in range(repeat):
+        args = [setup()] if setup is not None else []
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run_benchmarks(size: int, repeat: int) -> Dict[str, float]:
+    """Run every benchmark for one project size"""
+
+    pyproject_str = generate_pyproject(size)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        lock_path = Path(tmp_dir) / "poetry.lock"
+        lock_path.write_text(generate_lock(size))
+
+        def parsed() -> Pyproject:
+            return Pyproject(pyproject_str, lock_path=lock_path)
+
+        def bumped() -> Pyproject:
+            pyproject = parsed()
+            pyproject.apply_dependencies(pyproject.bump_dependencies())
+            return pyproject
+
+        listed = parsed()
+        listed.dependencies
+        names = [f"package_{i}" for i in range(0, size, 10)]
+        groups = ["default", "dev", *(f"g{i}" for i in range(0, 100, 2))]
+
+        return {
+            "init": best_of(parsed, repeat),
+            "dependencies": best_of(
+                lambda x: x.dependencies,
+                repeat,
+                setup=parsed,
+            ),
+            "filter_dependencies": best_of(
+                lambda: listed.filter_dependencies(
+                    listed.dependencies,
+                    without_constraints=[Constraint.EXACT],
+                    names=names,
+                    exclude_names=names[::2],
+                    groups=groups,
+                ),
+                repeat,
+            ),
+            "bumped_dependencies": best_of(
+                lambda x: x.bumped_dependencies,
+                repeat,
+                setup=parsed,
+            ),
+            "dumps": best_of(lambda x: x.dumps(), repeat, setup=bumped),
+        }
+
+
+def check(
+    results: Dict[str, Dict[str, float]],
+    baselines: Dict[str, Dict[str, float]],
+    tolerance: float,
+    max_growth: float,
+) -> List[str]:
+    """Return the regressions of results compared to baselines"""
+
+    failures = []
+    for bench, timings in results.items():
+        for size, seconds in timings.items():
+            baseline = baselines.get(bench, {}).get(size)
+            if baseline is not None and seconds > baseline * (1 + tolerance):
+                failures.append(
+                    f"{bench}[{size}]: {seconds:.4f}s exceeds baseline "
+                    f"{baseline:.4f}s by more than {tolerance:.0%}"
+                )
+
+        # compare growth between consecutive sizes, ignoring sizes which are
+        # too fast to be measured reliably
+        sizes = sorted(timings, key=int)
+        for small, large in zip(sizes, sizes[1:]):
+            if timings[small] < 1e-3:
+                continue
+            growth = timings[large] / timings[small]
+            allowed = int(large) / int(small) * max_growth
+            if growth > allowed:
+                failures.append(
+                    f"{bench}: {growth:.1f}x slower from {small} to {large} "
+                    f"dependencies, expected at most {allowed:.1f}x"
+                )
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true")
+    parser.add_argument("--baselines", type=Path, default=BASELINES_PATH)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=float(os.environ.get("POETRYUP_BENCH_TOLERANCE", 1.0)),
+        help="Allowed slowdown relative to baselines, 1.0 means 2x slower.",
+    )
+    parser.add_argument(
+        "--max-growth",
+        type=float,
+        default=2.5,
+        help="Allowed growth relative to linear growth between sizes.",
+    )
+    args = parser.parse_args()
+
+    results: Dict[str, Dict[str, float]] = {}
+    for size in args.sizes:
+        for bench, seconds in run_benchmarks(size, args.repeat).items():
+            results.setdefault(bench, {})[str(size)] = seconds
+
+    rows: List[Tuple[str, ...]] = [("BENCHMARK", *map(str, args.sizes))]
+    for bench, timings in results.items():
+        rows.append((bench, *(f"{timings[str(x)]:.4f}s" for x in args.sizes)))
+    for row in rows:
+        print("".join(x.ljust(22) for x in row).rstrip())
+
+    if args.save:
+        args.baselines.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"Saved baselines to '{args.baselines}'")
+        return
+
+    baselines = {}
+    if args.baselines.exists():
+        baselines = json.loads(args.baselines.read_text())
+    failures = check(results, baselines, args.tolerance, args.max_growth)
+    for failure in failures:
+        print(f"FAILED {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+import logging
+import re
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional
+
+from poetryup.core.cmd import cmd_run
+from poetryup.core.poetry import Poetry
+
+# the files a trial resolution needs, copied to its scratch directory
+PROJECT_FILES = ["pyproject.toml", "poetry.lock"]
+
+# trials only lock, thus they run in the environment poetry runs in instead
+# of creating a virtual environment for each scratch directory
+TRIAL_ENV = {"POETRY_VIRTUALENVS_CREATE": "false"}
+
+
+def package_name(package: str) -> str:
+    """Return the name of a poetry add argument, e.g. of 'foo[bar]@^1.2'"""
+
+    return re.split(r"[\[@]", package, maxsplit=1)[0]
+
+
+@contextmanager
+def scratch_copy(project: Path) -> Iterator[Path]:
+    """Copy the files of a project to a scratch directory
+
+    The directory is created next to the project, thus relative path
+    dependencies resolve the same, or in the temporary directory if the
+    parent of the project isn't writable. It's removed afterwards.
+
+    Args:
+        project: The directory of the project
+
+    Yields:
+        The scratch directory
+    """
+
+    try:
+        path = tempfile.mkdtemp(prefix=".poetryup-trial-", dir=project.parent)
+    except OSError:
+        path = tempfile.mkdtemp(prefix="poetryup-trial-")
+    try:
+        for name in PROJECT_FILES:
+            if (project / name).is_file():
+                shutil.copyfile(project / name, Path(path) / name)
+        yield Path(path)
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+class TrialPoetry(Poetry):
+    """A helper class to run poetry commands in a scratch directory
+
+    Output is captured, thus trials running in parallel don't interleave
+    their output.
+
+    Args:
+        path: The scratch directory to run poetry commands in
+        cache_dir: A directory to persist the probed poetry version in
+    """
+
+    def __init__(self, path: Path, cache_dir: Optional[Path] = None) -> None:
+        super().__init__(cache_dir=cache_dir)
+        self.path = path
+
+    def run(self, args: List[str], capture_output: bool = False) -> str:
+        return cmd_run(
+            ["poetry", *args],
+            capture_output=True,
+            cwd=self.path,
+            env=TRIAL_ENV,
+        )
+
+
+def _halves(packages: List[str]) -> List[List[str]]:
+    middle = len(packages) // 2
+    return [packages[:middle], packages[middle:]]
+
+
+def _accept(
+    packages: List[str],
+    trial: Callable[[List[str]], bool],
+) -> List[str]:
+    """Accept chunks of packages one at a time on top of the accepted ones
+
+    Finds blockers which only fail together with other packages, at the cost
+    of trying chunks one after another.
+    """
+
+    accepted: List[str] = []
+    blockers: List[str] = []
+    chunks = _halves(packages)
+    while chunks:
+        chunk = chunks.pop(0)
+        if not chunk:
+            continue
+        if trial([*accepted, *chunk]):
+            accepted.extend(chunk)
+        elif len(chunk) == 1:
+            blockers.extend(chunk)
+        else:
+            chunks[:0] = _halves(chunk)
+    return blockers
+
+
+def find_blockers(
+    packages: List[str],
+    trial: Callable[[List[str]], bool],
+    workers: Optional[int] = None,
+) -> List[str]:
+    """Find the packages which block updating a set of packages together
+
+    Failing sets of packages are bisected, the halves of every failing set
+    are tried in parallel. A package which fails on its own is a blocker.
+    If the remaining packages still fail together, they are accepted chunk by
+    chunk to find the packages which only fail in combination.
+
+    Args:
+        packages: The packages, which fail to update together
+        trial: Returns whether updating the given packages succeeds
+        workers: The maximum number of trials to run in parallel
+
+    Returns:
+        The blockers in their original order, the other packages can be
+        updated together
+    """
+
+    if len(packages) <= 1:
+        return list(packages)
+
+    blockers: List[str] = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # the failing sets of a level are bisected into the next level
+        chunks = _halves(list(packages))
+        while chunks:
+            results = list(executor.map(trial, chunks))
+            level: List[List[str]] = []
+            for chunk, succeeded in zip(chunks, results):
+                if succeeded:
+                    continue
+                if len(chunk) == 1:
+                    blockers.extend(chunk)
+                else:
+                    level.extend(_halves(chunk))
+            chunks = level
+
+    remaining = [x for x in packages if x not in blockers]
+    if remaining and not trial(remaining):
+        logging.debug("Packages fail in combination, accepting them in turn")
+        blockers.extend(_accept(remaining, trial))
+
+    found = set(blockers)
+    return [x for x in packages if x in found]
@@ -1,6 +1,12 @@
 import logging
+import os
 import subprocess
-from typing import List
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from poetryup.core.trace import span
 
 
 class CommandError(Exception):
@@ -9,30 +15,110 @@ class CommandError(Exception):
         self.return_code = return_code
 
 
-def cmd_run(cmd: List, capture_output: bool = False) -> str:
-    """Run command with subprocess
+def _environ(env: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """Return the environment of a command, None to inherit it unchanged"""
+
+    return {**os.environ, **env} if env else None
+
+
+def cmd_stream(
+    cmd: List,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> Iterator[str]:
+    """Run command with subprocess and stream its output
+
+    Lines are yielded as soon as the process writes them, thus memory usage
+    doesn't grow with the size of the output. The process is killed if the
+    generator is closed before the output is consumed.
 
     Args:
         cmd: The command to run
-        capture_output: Capture process output
+        cwd: The directory to run the command in, current directory if None
+        env: Environment variables to set in addition to the inherited ones
 
-    Returns:
-        The output from the command
+    Yields:
+        The decoded output lines, without line endings
 
     Raises:
         CommandError when command exists with non-zero exit code
     """
 
     logging.debug(f"Run command: '{' '.join(cmd)}'")
-    process = subprocess.run(
+    process = subprocess.Popen(
         cmd,
-        stdout=subprocess.PIPE if capture_output else None,
-        stderr=subprocess.STDOUT if capture_output else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=cwd,
+        env=_environ(env),
     )
+    completed = False
+    try:
+        for line in process.stdout:
+            yield line.decode(errors="replace").rstrip("\r\n")
+        completed = True
+    finally:
+        if not completed:
+            # the output wasn't consumed, e.g. the generator was closed
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
     if process.returncode != 0:
         logging.debug(
             f"Command '{' '.join(cmd)}' exited with non-zero"
             f"exit code '{process.returncode}'"
         )
         raise CommandError(cmd="".join(cmd), return_code=process.returncode)
-    return process.stdout.decode() if capture_output else None
+
+
+def cmd_run(
+    cmd: List,
+    capture_output: bool = False,
+    timestamps: bool = False,
+    cwd: Optional[Path] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> str:
+    """Run command with subprocess
+
+    Args:
+        cmd: The command to run
+        capture_output: Capture process output
+        timestamps: Prefix each output line with the elapsed time, ignored if
+            output is captured
+        cwd: The directory to run the command in, current directory if None
+        env: Environment variables to set in addition to the inherited ones
+
+    Returns:
+        The output from the command
+
+    Raises:
+        CommandError when command exists with non-zero exit code
+    """
+
+    with span(" ".join(cmd)):
+        if capture_output:
+            return "".join(
+                f"{line}\n" for line in cmd_stream(cmd, cwd=cwd, env=env)
+            )
+
+        if timestamps:
+            start = time.perf_counter()
+            for line in cmd_stream(cmd, cwd=cwd, env=env):
+                elapsed = time.perf_counter() - start
+                sys.stdout.write(f"[{elapsed:8.2f}s] {line}\n")
+                sys.stdout.flush()
+            return None
+
+        logging.debug(f"Run command: '{' '.join(cmd)}'")
+        process = subprocess.run(cmd, cwd=cwd, env=_environ(env))
+        if process.returncode != 0:
+            logging.debug(
+                f"Command '{' '.join(cmd)}' exited with non-zero"
+                f"exit code '{process.returncode}'"
+            )
+            raise CommandError(
+                cmd="".join(cmd),
+                return_code=process.returncode,
+            )
+        return None
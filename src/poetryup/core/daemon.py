@@ -0,0 +1,482 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from packaging.version import InvalidVersion, Version
+
+from poetryup.core import plan as plan_
+from poetryup.core.lock import Lock
+from poetryup.core.pyproject import Pyproject
+from poetryup.core.runner import apply, latest_versions
+from poetryup.core.state import default_cache_dir
+from poetryup.models.dependency import Constraint
+from poetryup.models.options import Options
+
+# the options a request may set, with their conversion from JSON
+REQUEST_OPTIONS: Dict[str, Callable[[Any], Any]] = {
+    "latest": bool,
+    "without_constraints": lambda x: [Constraint(y) for y in x],
+    "names": list,
+    "exclude_names": list,
+    "groups": list,
+    "index_url": lambda x: x,
+    "wheelhouse": lambda x: Path(x) if x is not None else None,
+}
+
+# the seconds between checks whether the daemon should stop
+POLL_INTERVAL = 0.5
+
+# the seconds a connection may stall before it's closed, requests are served
+# one at a time, thus a stalled client would block every other client
+CONNECTION_TIMEOUT = 10.0
+
+
+class DaemonError(Exception):
+    def __init__(self, message: str) -> None:
+        super().__init__(message)
+
+
+def default_socket_path() -> Path:
+    """Return the default path of the socket of the daemon"""
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return Path(runtime_dir) / "poetryup.sock"
+    return default_cache_dir() / "daemon.sock"
+
+
+def request_options(options: Options) -> Dict[str, Any]:
+    """Return the options of a request selecting the same dependencies
+
+    Args:
+        options: The options
+
+    Returns:
+        The options as JSON compatible values
+    """
+
+    return {
+        "latest": options.latest,
+        "without_constraints": [x.value for x in options.without_constraints],
+        "names": list(options.names),
+        "exclude_names": list(options.exclude_names),
+        "groups": list(options.groups),
+        "index_url": options.index_url,
+        "wheelhouse": (
+            str(options.wheelhouse.resolve())
+            if options.wheelhouse is not None
+            else None
+        ),
+    }
+
+
+def _signature(path: Path) -> Optional[Tuple[int, ...]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    # the inode and change time catch rewrites within the mtime resolution
+    return (stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size, stat.st_ino)
+
+
+@contextmanager
+def _chdir(path: Path) -> Iterator[None]:
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+@dataclass(frozen=True)
+class ProjectState:
+    """A class to represent a project parsed by the daemon
+
+    Args:
+        signature: The stat signatures of pyproject.toml and poetry.lock
+        pyproject_str: The pyproject.toml file parsed as a string
+        lock_str: The poetry.lock file parsed as a string
+        pyproject: The parsed pyproject, with the parsed lock file
+    """
+
+    signature: Tuple
+    pyproject_str: str
+    lock_str: str
+    pyproject: Pyproject
+
+
+class ProjectCache:
+    """A class to represent the projects kept parsed in memory
+
+    A project is parsed again once its pyproject.toml or poetry.lock file
+    changed, which is detected by their modification time, change time, size
+    and inode.
+    """
+
+    def __init__(self) -> None:
+        self.projects: Dict[Path, ProjectState] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, project: Path) -> ProjectState:
+        """Return the parsed project in a directory
+
+        Args:
+            project: The directory of the project
+
+        Returns:
+            The parsed project
+
+        Raises:
+            DaemonError when the project files can't be read
+        """
+
+        project = project.resolve()
+        pyproject_path = project / "pyproject.toml"
+        lock_path = project / "poetry.lock"
+        # the signature is taken before reading, a change while reading is
+        # caught by the next request
+        signature = (_signature(pyproject_path), _signature(lock_path))
+
+        state = self.projects.get(project)
+        if state is not None and state.signature == signature:
+            self.hits += 1
+            return state
+
+        self.misses += 1
+        try:
+            pyproject_str = pyproject_path.read_text()
+            # without a lock file poetry show would run outside of the
+            # project
+            lock_str = lock_path.read_text()
+            lock = Lock(lock_str)
+        except OSError as e:
+            raise DaemonError(f"Couldn't read project '{project}': {e}")
+
+        state = ProjectState(
+            signature=signature,
+            pyproject_str=pyproject_str,
+            lock_str=lock_str,
+            pyproject=Pyproject(pyproject_str, lock_path=lock_path, lock=lock),
+        )
+        self.projects[project] = state
+        return state
+
+    def invalidate(self, project: Path) -> None:
+        """Forget the parsed project in a directory"""
+
+        self.projects.pop(project.resolve(), None)
+
+
+class Daemon:
+    """A class to represent the requests served by a poetryup daemon
+
+    Requests select dependencies with options like the command line does.
+    Projects are kept parsed between requests, thus requests are answered
+    without parsing files that didn't change.
+
+    Args:
+        options: The default options of requests
+    """
+
+    def __init__(self, options: Optional[Options] = None) -> None:
+        self.options = options if options is not None else Options()
+        self.projects = ProjectCache()
+        self.stopped = False
+        self.last_request = time.monotonic()
+        self.commands: Dict[str, Callable[[Dict], Any]] = {
+            "ping": self.ping,
+            "bumps": self.bumps,
+            "outdated": self.outdated,
+            "apply": self.apply,
+            "shutdown": self.shutdown,
+        }
+
+    def respond(self, request: Dict) -> Dict:
+        """Serve a request
+
+        Args:
+            request: The request, with a 'command' and optionally an 'id',
+                the 'project' directory and 'options'
+
+        Returns:
+            The response, with the 'id' of the request, whether it's 'ok' and
+            either the 'result' or the 'error'
+        """
+
+        self.last_request = time.monotonic()
+        start = time.perf_counter()
+        response: Dict[str, Any] = {"id": request.get("id")}
+        try:
+            command = self.commands.get(request.get("command"))
+            if command is None:
+                raise DaemonError(
+                    f"Unknown command '{request.get('command')}', expected "
+                    f"one of {', '.join(sorted(self.commands))}"
+                )
+            response.update(ok=True, result=command(request))
+        except Exception as e:
+            if not isinstance(e, (DaemonError, OSError, ValueError)):
+                logging.exception(f"Request failed: {request}")
+            response.update(ok=False, error=str(e) or type(e).__name__)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        logging.info(f"Served '{request.get('command')}' in {elapsed:.1f}ms")
+        return response
+
+    def _project(self, request: Dict) -> Path:
+        return Path(request.get("project") or os.getcwd())
+
+    def _options(self, request: Dict) -> Options:
+        options = request.get("options") or {}
+        unknown = set(options) - set(REQUEST_OPTIONS)
+        if unknown:
+            raise DaemonError(f"Unknown option(s) {', '.join(sorted(unknown))}")
+        return replace(
+            self.options,
+            **{k: REQUEST_OPTIONS[k](v) for k, v in options.items()},
+        )
+
+    def _plan(self, state: ProjectState, options: Options) -> plan_.Plan:
+        pyproject = state.pyproject
+        return plan_.create_plan(
+            pyproject,
+            plan_.original_constraints(pyproject),
+            pyproject.bump_dependencies(
+                options.without_constraints,
+                options.names,
+                options.exclude_names,
+                options.groups,
+            ),
+            plan_.hash_text(state.pyproject_str),
+            plan_.hash_text(state.lock_str),
+        )
+
+    def ping(self, request: Dict) -> Dict:
+        """Answer whether the daemon is alive"""
+
+        return {
+            "pid": os.getpid(),
+            "projects": len(self.projects.projects),
+            "hits": self.projects.hits,
+            "misses": self.projects.misses,
+        }
+
+    def bumps(self, request: Dict) -> Dict:
+        """Answer what would be bumped to the lock versions, as a plan"""
+
+        state = self.projects.get(self._project(request))
+        plan = self._plan(state, self._options(request))
+        return json.loads(plan.dumps())
+
+    def outdated(self, request: Dict) -> List[Dict]:
+        """Answer which lock versions are older than the latest versions"""
+
+        options = replace(self._options(request), latest=True)
+        if options.index_url is None and options.wheelhouse is None:
+            raise DaemonError("Looking up latest versions needs an index URL")
+
+        pyproject = self.projects.get(self._project(request)).pyproject
+        latest = latest_versions(pyproject, options)
+        lock_versions = {
+            x.normalized_name: x.version for x in pyproject.lock_dependencies
+        }
+
+        outdated = []
+        for dependency in pyproject.filter_dependencies(
+            pyproject.dependencies,
+            options.without_constraints,
+            options.names,
+            options.exclude_names,
+            options.groups,
+        ):
+            lock_version = lock_versions.get(dependency.normalized_name)
+            latest_version = latest.get(dependency.normalized_name)
+            if lock_version is None or latest_version is None:
+                continue
+            try:
+                if Version(latest_version) <= Version(lock_version):
+                    continue
+            except InvalidVersion:
+                continue
+            outdated.append(
+                {
+                    "name": dependency.name,
+                    "group": dependency.group,
+                    "lock_version": lock_version,
+                    "latest_version": latest_version,
+                }
+            )
+        return outdated
+
+    def apply(self, request: Dict) -> Dict:
+        """Apply a plan, the bumps of the request if no plan is given"""
+
+        project = self._project(request)
+        if request.get("plan") is not None:
+            plan = plan_.Plan.loads(json.dumps(request["plan"]))
+        else:
+            plan = self._plan(
+                self.projects.get(project),
+                self._options(request),
+            )
+
+        # requests are served one at a time, thus changing the directory of
+        # the process doesn't affect other requests
+        try:
+            with _chdir(project):
+                applied = apply(plan, bool(request.get("strict")))
+        finally:
+            self.projects.invalidate(project)
+        return {"applied": [x.name for x in applied]}
+
+    def shutdown(self, request: Dict) -> Dict:
+        """Stop serving requests"""
+
+        self.stopped = True
+        return {}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    timeout = CONNECTION_TIMEOUT
+
+    def handle(self) -> None:
+        try:
+            self._handle()
+        except socket.timeout:
+            logging.debug("Closing stalled connection")
+
+    def _handle(self) -> None:
+        # a connection may send several requests, one JSON object per line
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as e:
+                response = {"id": None, "ok": False, "error": str(e)}
+            else:
+                response = self.server.daemon.respond(request)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+            if self.server.daemon.stopped:
+                return
+
+
+def serve(
+    socket_path: Path,
+    options: Optional[Options] = None,
+    idle_timeout: Optional[float] = None,
+) -> None:
+    """Serve requests on a Unix socket until shut down
+
+    Requests are served one at a time, each a JSON object on a line of its
+    own, and answered with a JSON object on a line of its own. Connections
+    which stall are closed after CONNECTION_TIMEOUT seconds.
+
+    Args:
+        socket_path: The path of the socket
+        options: The default options of requests
+        idle_timeout: The seconds without requests to stop after, never
+            stops if not provided
+
+    Raises:
+        DaemonError when another daemon serves the socket already or Unix
+        sockets aren't supported
+    """
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise DaemonError("Unix sockets aren't supported on this platform")
+
+    if socket_path.exists():
+        try:
+            request(socket_path, "ping", timeout=1.0)
+        except (DaemonError, OSError):
+            # left behind by a daemon which didn't stop cleanly
+            socket_path.unlink()
+        else:
+            raise DaemonError(f"A daemon serves '{socket_path}' already")
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    daemon = Daemon(options)
+    # the socket is created accessible to the owner only, other local users
+    # can't connect even right after it's bound
+    umask = os.umask(0o177)
+    try:
+        server = socketserver.UnixStreamServer(str(socket_path), _Handler)
+    finally:
+        os.umask(umask)
+    server.daemon = daemon
+    server.timeout = POLL_INTERVAL
+    logging.info(f"Serving requests on '{socket_path}'")
+
+    try:
+        while not daemon.stopped:
+            server.handle_request()
+            idle = time.monotonic() - daemon.last_request
+            if idle_timeout is not None and idle > idle_timeout:
+                logging.info(f"Stopping after {idle:.0f}s without requests")
+                break
+    finally:
+        server.server_close()
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
+
+
+def request(
+    socket_path: Path,
+    command: str,
+    project: Optional[Path] = None,
+    options: Optional[Dict[str, Any]] = None,
+    timeout: float = 60.0,
+    **fields: Any,
+) -> Any:
+    """Send a request to a daemon and wait for its result
+
+    Args:
+        socket_path: The path of the socket of the daemon
+        command: The command, e.g. 'bumps'
+        project: The directory of the project, current directory if None
+        options: The options of the request, see request_options
+        timeout: The seconds to wait for the daemon
+        fields: Further fields of the request, e.g. the 'plan' to apply
+
+    Returns:
+        The result of the request
+
+    Raises:
+        DaemonError when the request failed
+        OSError when the daemon can't be reached
+    """
+
+    payload = {
+        "command": command,
+        "project": str((project or Path.cwd()).resolve()),
+        **({"options": options} if options is not None else {}),
+        **fields,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.settimeout(timeout)
+        connection.connect(str(socket_path))
+        connection.sendall(json.dumps(payload).encode() + b"\n")
+        with connection.makefile("rb") as reader:
+            line = reader.readline()
+
+    if not line:
+        raise DaemonError("The daemon closed the connection")
+    response = json.loads(line)
+    if not response.get("ok"):
+        raise DaemonError(response.get("error", "Request failed"))
+    return response.get("result")
@@ -0,0 +1,165 @@
+import fnmatch
+import re
+from functools import lru_cache
+from typing import Callable, FrozenSet, Iterable, List, Optional, Tuple
+
+from poetryup.models.dependency import Constraint, Dependency, normalize_name
+
+# a bit for each constraint, dependencies without a known constraint have none
+_CONSTRAINT_BITS = {x: 1 << i for i, x in enumerate(Constraint)}
+
+# the prefix of name patterns which are regular expressions
+REGEX_PREFIX = "re:"
+
+
+class InvalidPatternError(Exception):
+    def __init__(self, pattern: str, message: str) -> None:
+        self.pattern = pattern
+        super().__init__(f"Invalid name pattern '{pattern}': {message}")
+
+
+def is_pattern(name: str) -> bool:
+    """Check whether a name is a glob or regex pattern rather than a name"""
+
+    return name.startswith(REGEX_PREFIX) or any(x in name for x in "*?[")
+
+
+def _compile_names(
+    names: Iterable[str],
+) -> Optional[Callable[[str], bool]]:
+    """Compile names and name patterns into a predicate on normalized names
+
+    Names are looked up in a set, glob and regex patterns are combined into a
+    single regular expression. Globs match the whole normalized name, regexes
+    are searched in the normalized name.
+    """
+
+    exact: List[str] = []
+    patterns: List[str] = []
+    for name in names:
+        if name.startswith(REGEX_PREFIX):
+            pattern = name.replace(REGEX_PREFIX, "", 1)
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise InvalidPatternError(name, str(e))
+            patterns.append(f"(?:{pattern})")
+        elif is_pattern(name):
+            patterns.append(f"^{fnmatch.translate(normalize_name(name))}")
+        else:
+            exact.append(normalize_name(name))
+
+    if not exact and not patterns:
+        return None
+
+    exact_names = frozenset(exact)
+    if not patterns:
+        return exact_names.__contains__
+
+    search = re.compile("|".join(patterns), re.IGNORECASE).search
+    return lambda x: x in exact_names or search(x) is not None
+
+
+class DependencyFilter:
+    """A class to represent compiled dependency selection criteria
+
+    The criteria are compiled once, names and groups into sets, constraints
+    into a bitmask and name patterns into a single regular expression, and
+    dependencies are then filtered in a single pass.
+
+    Names may be glob patterns, e.g. 'types-*', or regular expressions
+    prefixed with 're:', e.g. 're:^(boto|aws)', both are matched against
+    normalized names, ignoring case.
+
+    Args:
+        without_constraints: The dependency constraints to ignore
+        names: The dependency names or name patterns to include
+        exclude_names: The dependency names or name patterns to exclude
+        groups: The dependency groups to include
+
+    Raises:
+        InvalidPatternError when a regex name pattern is invalid
+    """
+
+    def __init__(
+        self,
+        without_constraints: Iterable[Constraint] = (),
+        names: Iterable[str] = (),
+        exclude_names: Iterable[str] = (),
+        groups: Iterable[str] = (),
+    ) -> None:
+        self.constraint_mask = 0
+        for constraint in without_constraints:
+            self.constraint_mask |= _CONSTRAINT_BITS[Constraint(constraint)]
+        self.include = _compile_names(names)
+        self.exclude = _compile_names(exclude_names)
+        self.groups: Optional[FrozenSet[str]] = (
+            frozenset(groups) if groups else None
+        )
+
+    @classmethod
+    @lru_cache(maxsize=32)
+    def compile(
+        cls,
+        without_constraints: Tuple[Constraint, ...] = (),
+        names: Tuple[str, ...] = (),
+        exclude_names: Tuple[str, ...] = (),
+        groups: Tuple[str, ...] = (),
+    ) -> "DependencyFilter":
+        """Return the filter of the criteria, compiled once per criteria"""
+
+        return cls(without_constraints, names, exclude_names, groups)
+
+    def matches(self, dependency: Dependency) -> bool:
+        """Check whether a dependency is selected by the filter"""
+
+        return bool(self.filter([dependency]))
+
+    def reason(self, dependency: Dependency) -> Optional[str]:
+        """Return why a dependency isn't selected by the filter
+
+        Args:
+            dependency: The dependency to check
+
+        Returns:
+            The first criterion the dependency fails, one of 'constraint',
+            'name', 'excluded name' or 'group', None if it's selected
+        """
+
+        if self.constraint_mask and (
+            _CONSTRAINT_BITS.get(dependency.constraint, 0)
+            & self.constraint_mask
+        ):
+            return "constraint"
+        if self.include is not None and not self.include(
+            dependency.normalized_name
+        ):
+            return "name"
+        if self.exclude is not None and self.exclude(
+            dependency.normalized_name
+        ):
+            return "excluded name"
+        if self.groups is not None and dependency.group not in self.groups:
+            return "group"
+        return None
+
+    def filter(self, dependencies: Iterable[Dependency]) -> List[Dependency]:
+        """Filter dependencies in a single pass
+
+        Args:
+            dependencies: The dependencies to filter
+
+        Returns:
+            The selected dependencies in their original order
+        """
+
+        bits, mask = _CONSTRAINT_BITS, self.constraint_mask
+        include, exclude, groups = self.include, self.exclude, self.groups
+        return [
+            x
+            for x in dependencies
+            if not (mask and bits.get(x.constraint, 0) & mask)
+            and (include is None or include(x.normalized_name))
+            and (exclude is None or not exclude(x.normalized_name))
+            and (groups is None or x.group in groups)
+        ]
@@ -0,0 +1,467 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import ssl
+from dataclasses import dataclass, field
+from html import unescape
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import SplitResult, unquote, urljoin, urlsplit
+
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from packaging.version import InvalidVersion, Version
+
+from poetryup.models.dependency import normalize_name
+
+DEFAULT_INDEX_URL = "https://pypi.org/simple/"
+
+# https://peps.python.org/pep-0691/#version-format-selection
+ACCEPT = (
+    "application/vnd.pypi.simple.v1+json, "
+    "application/vnd.pypi.simple.v1+html;q=0.2, "
+    "text/html;q=0.1"
+)
+
+MAX_REDIRECTS = 3
+
+_anchor_pattern = re.compile(r"<a\s+([^>]*)>([^<]*)</a>", re.IGNORECASE)
+_href_pattern = re.compile(r"""href\s*=\s*["']([^"']*)["']""", re.IGNORECASE)
+
+
+class IndexClientError(Exception):
+    def __init__(self, url: str, message: str) -> None:
+        self.url = url
+        super().__init__(f"Couldn't fetch '{url}': {message}")
+
+
+@dataclass(frozen=True)
+class ProjectPage:
+    """A class to represent a project page of a simple index
+
+    Args:
+        name: The normalized name of the project
+        versions: The versions of the project's files that aren't yanked
+        etag: The ETag validator of the page, if any
+        last_modified: The Last-Modified validator of the page, if any
+    """
+
+    name: str
+    versions: List[str] = field(default_factory=list)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def distribution_from_filename(filename: str) -> Optional[Tuple[str, str]]:
+    """Extract the name and version of a distribution from its filename
+
+    Args:
+        filename: The filename of a wheel or sdist
+
+    Returns:
+        The normalized name and the version if the filename could be parsed,
+        None otherwise
+    """
+
+    try:
+        if filename.endswith(".whl"):
+            name, version, *_ = parse_wheel_filename(filename)
+            return str(name), str(version)
+        if filename.endswith((".tar.gz", ".zip")):
+            name, version = parse_sdist_filename(filename)
+            return str(name), str(version)
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        logging.debug(f"Couldn't parse distribution filename '{filename}'")
+    return None
+
+
+def version_from_filename(filename: str) -> Optional[str]:
+    """Extract the version of a distribution from its filename
+
+    Args:
+        filename: The filename of a wheel or sdist
+
+    Returns:
+        The version if the filename could be parsed, None otherwise
+    """
+
+    distribution = distribution_from_filename(filename)
+    return distribution[1] if distribution is not None else None
+
+
+def latest_version(versions: Iterable[str]) -> Optional[str]:
+    """Return the latest version which isn't a pre-release
+
+    Args:
+        versions: The versions to choose from
+
+    Returns:
+        The latest version if any, None otherwise
+    """
+
+    latest: Optional[Tuple[Version, str]] = None
+    for version in versions:
+        try:
+            parsed = Version(version)
+        except InvalidVersion:
+            continue
+        if parsed.is_prerelease:
+            continue
+        if latest is None or parsed > latest[0]:
+            latest = (parsed, version)
+    return latest[1] if latest is not None else None
+
+
+def select_latest_versions(pages: Dict[str, ProjectPage]) -> Dict[str, str]:
+    """Select the latest versions from project pages
+
+    Args:
+        pages: The project pages indexed by normalized name
+
+    Returns:
+        The latest versions indexed by normalized name, projects without a
+        stable release are left out
+    """
+
+    latest_versions: Dict[str, str] = {}
+    for name, page in pages.items():
+        version = latest_version(page.versions)
+        if version is not None:
+            latest_versions[name] = version
+    return latest_versions
+
+
+def parse_project_page(content_type: str, body: bytes) -> List[str]:
+    """Parse the versions from a project page of a simple index
+
+    Args:
+        content_type: The content type of the page
+        body: The content of the page
+
+    Returns:
+        The sorted, unique versions of the files which aren't yanked
+    """
+
+    versions = set()
+    if "json" in content_type:
+        # https://peps.python.org/pep-0691/#project-detail
+        page = json.loads(body.decode())
+        for file in page.get("files", []):
+            if file.get("yanked"):
+                continue
+            version = version_from_filename(file["filename"])
+            if version is not None:
+                versions.add(version)
+        if not page.get("files"):
+            # https://peps.python.org/pep-0700/
+            versions.update(page.get("versions", []))
+    else:
+        # https://peps.python.org/pep-0503/
+        for attributes, text in _anchor_pattern.findall(body.decode()):
+            if "data-yanked" in attributes:
+                continue
+            match = _href_pattern.search(attributes)
+            href = unescape(match.group(1)) if match else text
+            filename = unquote(urlsplit(href).path.rsplit("/", 1)[-1])
+            version = version_from_filename(filename or text.strip())
+            if version is not None:
+                versions.add(version)
+
+    return sorted(versions)
+
+
+def _host(parts: SplitResult) -> str:
+    """Return the host of a URL with its port, without the userinfo"""
+
+    host = parts.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    return host if parts.port is None else f"{host}:{parts.port}"
+
+
+class IndexClient:
+    """A client for package indexes implementing the simple repository API
+
+    Project pages are fetched concurrently with asyncio over a pool of
+    persistent HTTP/1.1 connections, preferring the JSON API (PEP 691) over
+    HTML (PEP 503). Pages are cached on disk and revalidated with their
+    ETag/Last-Modified validators.
+
+    Args:
+        index_url: The URL of the simple index
+        cache_dir: A directory to cache project pages in, pages aren't cached
+            if not provided
+        max_connections: The maximum number of concurrent connections
+        timeout: The timeout of a single request in seconds
+    """
+
+    def __init__(
+        self,
+        index_url: str = DEFAULT_INDEX_URL,
+        cache_dir: Optional[Path] = None,
+        max_connections: int = 10,
+        timeout: float = 30.0,
+    ) -> None:
+        self.index_url = index_url.rstrip("/") + "/"
+        self.cache_dir = cache_dir
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.connections_opened = 0  # number of connections ever opened
+
+    def fetch_pages(self, names: List[str]) -> Dict[str, ProjectPage]:
+        """Fetch the project pages of packages concurrently
+
+        Packages whose page can't be fetched are left out and logged.
+
+        Args:
+            names: The names of the packages
+
+        Returns:
+            The project pages indexed by normalized name
+        """
+
+        return asyncio.run(self._fetch_pages(names))
+
+    def latest_versions(self, names: List[str]) -> Dict[str, str]:
+        """Fetch the latest versions of packages concurrently
+
+        Args:
+            names: The names of the packages
+
+        Returns:
+            The latest versions indexed by normalized name
+        """
+
+        return select_latest_versions(self.fetch_pages(names))
+
+    async def _fetch_pages(self, names: List[str]) -> Dict[str, ProjectPage]:
+        self._idle: Dict[Tuple, List[Tuple]] = {}
+        self._semaphore = asyncio.Semaphore(self.max_connections)
+        try:
+            unique_names = sorted({normalize_name(x) for x in names})
+            pages = await asyncio.gather(
+                *(self._fetch_page(x) for x in unique_names)
+            )
+        finally:
+            for connections in self._idle.values():
+                for _, writer in connections:
+                    writer.close()
+        return {x.name: x for x in pages if x is not None}
+
+    async def _fetch_page(self, name: str) -> Optional[ProjectPage]:
+        url = f"{self.index_url}{name}/"
+        cached = self._read_cache(url)
+
+        headers = {"Accept": ACCEPT}
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            status, response_headers, body = await self._request(url, headers)
+        except (IndexClientError, OSError, asyncio.TimeoutError) as e:
+            logging.warning(f"Couldn't fetch index page of '{name}': {e}")
+            return None
+
+        if status == 304 and "body" in cached:
+            logging.debug(f"Index page of '{name}' not modified")
+            content_type = cached["content_type"]
+            body = cached["body"].encode()
+            etag = cached.get("etag")
+            last_modified = cached.get("last_modified")
+        elif status == 200:
+            content_type = response_headers.get("content-type", "")
+            etag = response_headers.get("etag")
+            last_modified = response_headers.get("last-modified")
+        else:
+            logging.warning(
+                f"Couldn't fetch index page of '{name}': status {status}"
+            )
+            return None
+
+        # a malformed page is a miss, it mustn't fail the other pages
+        try:
+            versions = parse_project_page(content_type, body)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            logging.warning(f"Couldn't parse index page of '{name}': {e}")
+            return None
+
+        if status == 200:
+            self._write_cache(
+                url,
+                {
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "content_type": content_type,
+                    "body": body.decode(),
+                },
+            )
+        return ProjectPage(
+            name=name,
+            versions=versions,
+            etag=etag,
+            last_modified=last_modified,
+        )
+
+    async def _request(
+        self,
+        url: str,
+        headers: Dict[str, str],
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        for _ in range(MAX_REDIRECTS + 1):
+            status, response_headers, body = await self._send(url, headers)
+            if status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response_headers.get("location", ""))
+                continue
+            return status, response_headers, body
+        raise IndexClientError(url, "too many redirects")
+
+    async def _send(
+        self,
+        url: str,
+        headers: Dict[str, str],
+    ) -> Tuple[int, Dict[str, str], bytes]:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            raise IndexClientError(url, f"unsupported scheme '{parts.scheme}'")
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname, port)
+        path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+        request = [f"GET {path} HTTP/1.1", f"Host: {_host(parts)}"]
+        if parts.username is not None:
+            # credentials in the index URL are sent as HTTP basic auth
+            credentials = (
+                f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            )
+            token = base64.b64encode(credentials.encode()).decode()
+            request.append(f"Authorization: Basic {token}")
+        request += [f"{k}: {v}" for k, v in headers.items()]
+        request += ["User-Agent: poetryup", "Connection: keep-alive", "", ""]
+
+        async with self._semaphore:
+            for attempt in range(2):
+                reader, writer, reused = await self._connect(key)
+                try:
+                    writer.write("\r\n".join(request).encode("latin-1"))
+                    await writer.drain()
+                    response = await asyncio.wait_for(
+                        self._read_response(reader),
+                        self.timeout,
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused and attempt == 0:
+                        # the server closed the idle connection, retry once on
+                        # a new connection
+                        continue
+                    raise IndexClientError(url, "connection closed")
+                except BaseException:
+                    writer.close()
+                    raise
+
+                status, response_headers, body, keep_alive = response
+                if keep_alive:
+                    self._idle.setdefault(key, []).append((reader, writer))
+                else:
+                    writer.close()
+                return status, response_headers, body
+
+        raise IndexClientError(url, "connection closed")  # pragma: no cover
+
+    async def _connect(self, key: Tuple) -> Tuple:
+        idle = self._idle.get(key)
+        if idle:
+            reader, writer = idle.pop()
+            return reader, writer, True
+
+        scheme, host, port = key
+        context = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port, ssl=context),
+            self.timeout,
+        )
+        self.connections_opened += 1
+        return reader, writer, False
+
+    async def _read_response(
+        self,
+        reader: asyncio.StreamReader,
+    ) -> Tuple[int, Dict[str, str], bytes, bool]:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        http_version, status, *_ = line.decode("latin-1").split(" ", 2)
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = (
+            http_version == "HTTP/1.1"
+            and headers.get("connection", "").lower() != "close"
+        )
+        if int(status) in (204, 304):
+            body = b""
+        elif "chunked" in headers.get("transfer-encoding", "").lower():
+            chunks = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    # skip trailers
+                    while (await reader.readline()) not in (b"\r\n", b"\n"):
+                        pass
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readline()
+            body = b"".join(chunks)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+
+        return int(status), headers, body, keep_alive
+
+    def _cache_path(self, url: str) -> Optional[Path]:
+        if self.cache_dir is None:
+            return None
+        # credentials don't belong in the cache, nor do they change the page
+        parts = urlsplit(url)
+        url = parts._replace(netloc=_host(parts)).geturl()
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / "index" / f"{digest}.json"
+
+    def _read_cache(self, url: str) -> Dict:
+        path = self._cache_path(url)
+        if path is None:
+            return {}
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self, url: str, entry: Dict) -> None:
+        path = self._cache_path(url)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(entry))
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.debug(f"Couldn't write index cache '{path}'")
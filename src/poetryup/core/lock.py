@@ -0,0 +1,255 @@
+import hashlib
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional, Union
+
+import tomlkit
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.version import InvalidVersion, Version
+
+from poetryup.core.lock_graph import LockGraph
+from poetryup.models.dependency import normalize_name
+
+try:
+    # the standard library parser is a lot faster than tomlkit, which is fine
+    # since the lock file is only ever patched as text by us
+    import tomllib
+except ImportError:  # python < 3.11
+    tomllib = None
+
+
+class Lock:
+    """A class to represent a poetry.lock file
+
+    Args:
+        lock_str: The poetry.lock file parsed as a string
+    """
+
+    def __init__(self, lock_str: str) -> None:
+        if tomllib is not None:
+            self.lock = tomllib.loads(lock_str)
+        else:
+            self.lock = tomlkit.loads(lock_str)
+        self._versions = None  # caches the name to version index
+        self._graph: Optional[LockGraph] = None  # caches the dependency graph
+
+    @property
+    def content_hash(self) -> Optional[str]:
+        """The hash of the pyproject content the lock was resolved for"""
+
+        content_hash = self.lock.get("metadata", {}).get("content-hash")
+        return str(content_hash) if content_hash is not None else None
+
+    @classmethod
+    def read(cls, path: Path) -> Union["Lock", None]:
+        """Read a poetry.lock file
+
+        Args:
+            path: The path of the poetry.lock file
+
+        Returns:
+            A lock if the file could be read and parsed, None otherwise
+        """
+
+        try:
+            lock_str = path.read_text()
+        except OSError:
+            logging.debug(f"Couldn't read lock file '{path}'")
+            return None
+
+        try:
+            return cls(lock_str)
+        except Exception:
+            logging.debug(f"Couldn't parse lock file '{path}'")
+            return None
+
+    @property
+    def versions(self) -> Dict[str, str]:
+        """The locked package versions indexed by their normalized name"""
+
+        if self._versions is not None:
+            # return cached versions
+            return self._versions
+
+        versions: Dict[str, str] = {}
+        for package in self.lock.get("package", []):
+            name = normalize_name(str(package["name"]))
+            # keep the first entry in case a package is locked more than once,
+            # which happens for packages with mutually exclusive markers
+            versions.setdefault(name, str(package["version"]))
+
+        self._versions = versions  # cache versions
+        return versions
+
+    @property
+    def graph(self) -> LockGraph:
+        """The dependency graph of the locked packages"""
+
+        if self._graph is None:
+            self._graph = LockGraph(self)
+        return self._graph
+
+    def version(self, name: str) -> Union[str, None]:
+        """Return the locked version of a package
+
+        Args:
+            name: The name of the package
+
+        Returns:
+            The locked version if found, None if not found
+        """
+
+        return self.versions.get(normalize_name(name))
+
+
+# the keys of the tool.poetry table hashed into the lock file by poetry 1.x,
+# the group key is only hashed if present
+_LEGACY_HASH_KEYS = ["dependencies", "source", "extras", "dev-dependencies"]
+_HASH_KEYS = [*_LEGACY_HASH_KEYS, "group"]
+
+_CONTENT_HASH_PATTERN = re.compile(
+    r'^(content-hash\s*=\s*)"[0-9a-fA-F]*"[ \t]*$',
+    re.MULTILINE,
+)
+
+
+def content_hash(table: Mapping[str, Any]) -> str:
+    """Compute the content hash of a pyproject the way poetry 1.x does
+
+    Poetry 2 hashes more of the pyproject, thus callers should compare the
+    hash of a known pyproject to its lock file before relying on it.
+
+    Args:
+        table: The tool.poetry table of the pyproject
+
+    Returns:
+        The sha256 hash of the relevant content
+    """
+
+    if hasattr(table, "unwrap"):
+        # convert tomlkit items into plain values, json can't encode booleans
+        table = table.unwrap()
+
+    relevant_content = {}
+    for key in _HASH_KEYS:
+        data = table.get(key)
+        if data is None and key not in _LEGACY_HASH_KEYS:
+            continue
+        relevant_content[key] = data
+
+    return hashlib.sha256(
+        json.dumps(relevant_content, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def replace_content_hash(lock_str: str, content_hash: str) -> Optional[str]:
+    """Replace the content hash of a poetry.lock file
+
+    Only the content-hash line changes, the rest of the file is kept as is.
+
+    Args:
+        lock_str: The poetry.lock file parsed as a string
+        content_hash: The new content hash
+
+    Returns:
+        The patched poetry.lock file, None if it has no content hash
+    """
+
+    lock_str, count = _CONTENT_HASH_PATTERN.subn(
+        lambda x: f'{x.group(1)}"{content_hash}"',
+        lock_str,
+        count=1,
+    )
+    return lock_str if count == 1 else None
+
+
+def _release_bound(release: List[int], index: int) -> str:
+    """Return the release bumped at the given index, e.g. 1.3 for 1.2.3 and 1"""
+
+    return ".".join(map(str, [*release[:index], release[index] + 1]))
+
+
+def _parse_specifier(constraint: str) -> str:
+    """Convert a single poetry constraint into a PEP 440 specifier"""
+
+    if constraint in ("", "*", "x", "X"):
+        return ""
+
+    if constraint.startswith("^"):
+        version = Version(constraint[1:])
+        release = list(version.release)
+        # bump the first non-zero release number, or the last one if all
+        # numbers are zero, e.g. ^0.2.3 allows versions up to 0.3.0
+        index = next(
+            (i for i, x in enumerate(release) if x != 0),
+            len(release) - 1,
+        )
+        return f">={version},<{_release_bound(release, index)}"
+
+    if constraint.startswith("~") and not constraint.startswith("~="):
+        version = Version(constraint[1:])
+        release = list(version.release)
+        index = 1 if len(release) > 1 else 0
+        return f">={version},<{_release_bound(release, index)}"
+
+    if constraint.startswith(("==", "!=", ">=", "<=", "~=", ">", "<")):
+        return constraint
+    if constraint.startswith("="):
+        return f"={constraint}"
+    return f"=={constraint}"
+
+
+def parse_constraint(constraint: str) -> Optional[List[SpecifierSet]]:
+    """Convert a poetry version constraint into PEP 440 specifier sets
+
+    Caret, tilde, wildcard, comparison and exact constraints are supported,
+    combined with commas or spaces and alternated with ||.
+
+    Args:
+        constraint: The poetry version constraint, e.g. '^1.2 || ~2.0.1'
+
+    Returns:
+        The alternative specifier sets, None if the constraint isn't supported
+    """
+
+    specifier_sets: List[SpecifierSet] = []
+    for alternative in re.split(r"\s*\|\|?\s*", constraint.strip()):
+        # attach operators to their versions before splitting the constraints
+        alternative = re.sub(r"(==|!=|>=|<=|~=|[=<>^~])\s+", r"\1", alternative)
+        try:
+            specifiers = [
+                _parse_specifier(x)
+                for x in re.split(r"[\s,]+", alternative)
+                if x
+            ]
+            specifier_sets.append(
+                SpecifierSet(",".join(x for x in specifiers if x))
+            )
+        except (InvalidSpecifier, InvalidVersion):
+            return None
+    return specifier_sets
+
+
+def allows(constraint: str, version: str) -> Optional[bool]:
+    """Check whether a poetry version constraint allows a version
+
+    Args:
+        constraint: The poetry version constraint
+        version: The version
+
+    Returns:
+        Whether the version is allowed, None if it can't be determined
+    """
+
+    specifier_sets = parse_constraint(constraint)
+    if specifier_sets is None:
+        return None
+    try:
+        parsed_version = Version(version)
+    except InvalidVersion:
+        return None
+    return any(
+        x.contains(parsed_version, prereleases=True) for x in specifier_sets
+    )
@@ -0,0 +1,156 @@
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Set, Tuple
+
+from poetryup.models.dependency import normalize_name
+
+if TYPE_CHECKING:
+    from poetryup.core.lock import Lock
+
+
+def _markers(spec: object) -> Optional[str]:
+    """Return the markers of a dependency specification, None if it has none
+
+    Specifications with several constraints apply if any of them applies.
+    """
+
+    specs = spec if isinstance(spec, list) else [spec]
+    markers = []
+    for x in specs:
+        marker = x.get("markers") if isinstance(x, dict) else None
+        if marker is None:
+            return None
+        markers.append(str(marker))
+    if len(markers) == 1:
+        return markers[0]
+    return " or ".join(f"({x})" for x in markers)
+
+
+class LockGraph:
+    """A class to represent the dependency graph of a poetry.lock file
+
+    Nodes are the normalized names of the locked packages, edges point from a
+    package to the locked packages listed in its [package.dependencies]
+    table. Packages locked more than once, e.g. with mutually exclusive
+    markers, are a single node with the edges of every entry.
+
+    The graph is built once per lock, see Lock.graph, every lookup is a dict
+    lookup and transitive dependencies are computed once per package.
+
+    Args:
+        lock: The parsed poetry.lock file
+    """
+
+    def __init__(self, lock: "Lock") -> None:
+        self.versions = lock.versions
+        self.edges: Dict[str, Set[str]] = {}
+        # the markers of the edges which only apply to some environments
+        # indexed by package and dependency
+        self.markers: Dict[Tuple[str, str], str] = {}
+        for package in lock.lock.get("package", []):
+            name = normalize_name(str(package["name"]))
+            targets = self.edges.setdefault(name, set())
+            for target, spec in package.get("dependencies", {}).items():
+                target = normalize_name(str(target))
+                targets.add(target)
+                marker = _markers(spec)
+                if marker is not None:
+                    self.markers[(name, target)] = marker
+        # edges to packages which aren't locked, e.g. excluded by markers,
+        # lead nowhere
+        for targets in self.edges.values():
+            targets.intersection_update(self.edges)
+
+        self.reverse: Dict[str, Set[str]] = {x: set() for x in self.edges}
+        for source, targets in self.edges.items():
+            for target in targets:
+                self.reverse[target].add(source)
+        self._closures: Dict[str, Set[str]] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return normalize_name(name) in self.edges
+
+    def dependencies(self, name: str) -> Set[str]:
+        """Return the locked packages a package depends on directly"""
+
+        return self.edges.get(normalize_name(name), set())
+
+    def dependents(self, name: str) -> Set[str]:
+        """Return the locked packages which depend on a package directly"""
+
+        return self.reverse.get(normalize_name(name), set())
+
+    def closure(self, name: str) -> Set[str]:
+        """Return the locked packages a package depends on transitively
+
+        Args:
+            name: The name of the package
+
+        Returns:
+            The normalized names of the packages, without the package itself
+            unless it's part of a cycle, empty if the package isn't locked,
+            the set is shared and mustn't be changed
+        """
+
+        name = normalize_name(name)
+        if name in self._closures:
+            return self._closures[name]
+
+        closure: Set[str] = set()
+        pending = list(self.edges.get(name, ()))
+        while pending:
+            node = pending.pop()
+            if node in closure:
+                continue
+            closure.add(node)
+            if node in self._closures:
+                # the closures of other packages are complete, even in cycles
+                closure.update(self._closures[node])
+            else:
+                pending.extend(self.edges[node])
+
+        self._closures[name] = closure
+        return closure
+
+    def fan_out(self, name: str) -> int:
+        """Return the number of packages a package depends on transitively"""
+
+        return len(self.closure(name) - {normalize_name(name)})
+
+    def components(self, roots: Iterable[str]) -> List[List[str]]:
+        """Partition packages into independently resolvable components
+
+        Two packages are in the same component if the packages they depend
+        on, directly or transitively, overlap.
+
+        Args:
+            roots: The names of the packages to partition, all of them must be
+                locked
+
+        Returns:
+            The normalized names of the packages of each component, in the
+            order the packages and components were first given
+
+        Raises:
+            KeyError when a package isn't locked
+        """
+
+        # union-find over the undirected graph, roots are linked to every
+        # package reachable from them
+        parents: Dict[str, str] = {}
+
+        def find(name: str) -> str:
+            parents.setdefault(name, name)
+            while parents[name] != name:
+                parents[name] = parents[parents[name]]
+                name = parents[name]
+            return name
+
+        for source, targets in self.edges.items():
+            for target in targets:
+                parents[find(source)] = find(target)
+
+        components: Dict[str, List[str]] = {}
+        for name in dict.fromkeys(normalize_name(x) for x in roots):
+            if name not in self.edges:
+                raise KeyError(name)
+            components.setdefault(find(name), []).append(name)
+        return list(components.values())
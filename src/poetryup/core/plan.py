@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+from poetryup.core.pyproject import Pyproject
+from poetryup.models.dependency import Dependency, normalize_name
+
+PLAN_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class PlannedUpdate:
+    """A class to represent a planned dependency update
+
+    Args:
+        name: The name of the dependency
+        group: The group of the dependency
+        old: The constraint of the dependency before the update
+        new: The constraint of the dependency after the update
+        lock_version: The version the dependency was resolved to
+    """
+
+    name: str
+    group: str
+    old: str
+    new: str
+    lock_version: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class Plan:
+    """A class to represent an update plan
+
+    A plan records the outcome of a resolution, it can be applied to
+    pyprojects without running the resolver again.
+
+    Args:
+        pyproject_hash: The sha256 hash of the planned pyproject.toml file
+        lock_hash: The sha256 hash of the planned poetry.lock file, if any
+        updates: The planned dependency updates
+    """
+
+    pyproject_hash: str
+    lock_hash: Optional[str] = None
+    updates: List[PlannedUpdate] = field(default_factory=list)
+
+    def dumps(self) -> str:
+        """Dumps plan into a JSON string."""
+
+        return json.dumps({"format": PLAN_FORMAT, **asdict(self)}, indent=2)
+
+    @classmethod
+    def loads(cls, plan_str: str) -> "Plan":
+        """Load a plan from a JSON string
+
+        Args:
+            plan_str: The plan parsed as a string
+
+        Returns:
+            The plan
+        """
+
+        plan = json.loads(plan_str)
+        if plan.get("format") != PLAN_FORMAT:
+            raise ValueError(f"Unsupported plan format '{plan.get('format')}'")
+        return cls(
+            pyproject_hash=plan["pyproject_hash"],
+            lock_hash=plan.get("lock_hash"),
+            updates=[PlannedUpdate(**x) for x in plan.get("updates", [])],
+        )
+
+
+def hash_text(text: Optional[str]) -> Optional[str]:
+    """Return the sha256 hash of a text, None if there is no text"""
+
+    if text is None:
+        return None
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def version_constraint(version: Union[str, Dict, List]) -> Optional[str]:
+    """Return the version constraint of a dependency, if it has one"""
+
+    if isinstance(version, str):
+        return str(version)
+    if isinstance(version, dict) and isinstance(version.get("version"), str):
+        return str(version["version"])
+    return None
+
+
+def create_plan(
+    pyproject: Pyproject,
+    original: Dict[Tuple[str, str], Optional[str]],
+    bumped_dependencies: List[Dependency],
+    pyproject_hash: str,
+    lock_hash: Optional[str],
+) -> Plan:
+    """Create a plan from bumped dependencies
+
+    Args:
+        pyproject: The pyproject the dependencies were bumped in
+        original: The constraints before resolution indexed by group and name
+        bumped_dependencies: The dependencies bumped to their lock version
+        pyproject_hash: The sha256 hash of the planned pyproject.toml file
+        lock_hash: The sha256 hash of the planned poetry.lock file
+
+    Returns:
+        The plan
+    """
+
+    lock_index = pyproject.index_dependencies(pyproject.lock_dependencies)
+
+    updates: List[PlannedUpdate] = []
+    for dependency in bumped_dependencies:
+        old = original.get((dependency.group, dependency.name))
+        new = version_constraint(dependency.version)
+        if old is None or new is None or old == new:
+            continue
+
+        lock_dependency = lock_index.get(dependency.normalized_name)
+        updates.append(
+            PlannedUpdate(
+                name=dependency.name,
+                group=dependency.group,
+                old=old,
+                new=new,
+                lock_version=(
+                    lock_dependency.version if lock_dependency else None
+                ),
+            )
+        )
+
+    return Plan(
+        pyproject_hash=pyproject_hash,
+        lock_hash=lock_hash,
+        updates=updates,
+    )
+
+
+def original_constraints(
+    pyproject: Pyproject,
+) -> Dict[Tuple[str, str], Optional[str]]:
+    """Return the constraints of the pyproject dependencies
+
+    Args:
+        pyproject: The pyproject
+
+    Returns:
+        The constraints indexed by group and name
+    """
+
+    return {
+        (x.group, x.name): version_constraint(x.version)
+        for x in pyproject.dependencies
+    }
+
+
+def apply_plan(pyproject: Pyproject, plan: Plan) -> List[Dependency]:
+    """Apply a plan to a pyproject
+
+    Dependencies whose constraint matches the planned old constraint get the
+    planned new constraint. Dependencies with another constraint are bumped
+    to the planned lock version according to their own constraint.
+
+    Args:
+        pyproject: The pyproject to apply the plan to
+        plan: The plan to apply
+
+    Returns:
+        The applied dependencies
+    """
+
+    dependencies = {
+        (x.group, x.normalized_name): x for x in pyproject.dependencies
+    }
+
+    applied: List[Dependency] = []
+    for update in plan.updates:
+        key = (update.group, normalize_name(update.name))
+        dependency = dependencies.get(key)
+        if dependency is None:
+            logging.info(f"Planned dependency '{update.name}' not found")
+            continue
+
+        if version_constraint(dependency.version) == update.old:
+            version = dependency.version
+            if isinstance(version, str):
+                version = update.new
+            else:
+                # copy the table, the dependency may not be applied
+                version = version.copy()
+                version["version"] = update.new
+            dependency = Dependency(
+                name=dependency.name,
+                version=version,
+                group=dependency.group,
+            )
+        elif update.lock_version is not None:
+            dependency = pyproject.bump_dependency(
+                dependency,
+                update.lock_version,
+            )
+        else:
+            continue
+
+        applied.append(dependency)
+
+    pyproject.apply_dependencies(applied)
+    return applied
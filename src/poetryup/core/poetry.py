@@ -1,54 +1,242 @@
+import importlib.util
+import json
 import logging
-from typing import List, Optional
+import os
+import shutil
+from enum import Enum
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
 
-from packaging import version as version_
+from poetryup.core.cmd import cmd_run, cmd_stream
 
-from poetryup.core.cmd import cmd_run
+if TYPE_CHECKING:
+    # packaging is imported when a version is probed, not at startup
+    from packaging.version import Version
+
+# poetry versions probed by this process, keyed by the resolved executable
+_versions: Dict[str, "Version"] = {}
+
+
+class Backend(str, Enum):
+    SUBPROCESS = "subprocess"
+    IN_PROCESS = "in-process"
+
+
+def create_poetry(
+    backend: Backend = Backend.SUBPROCESS,
+    cache_dir: Optional[Path] = None,
+    timestamps: bool = False,
+) -> "Poetry":
+    """Create a helper to run poetry commands with the given backend
+
+    The in-process backend requires poetry to be importable from the current
+    interpreter, the subprocess backend is used as a fallback otherwise.
+
+    Args:
+        backend: The backend used to run poetry commands
+        cache_dir: A directory to persist the probed poetry version in
+        timestamps: Prefix each line of live command output with the elapsed
+            time, only supported by the subprocess backend
+
+    Returns:
+        A helper to run poetry commands
+    """
+
+    if backend == Backend.IN_PROCESS:
+        if importlib.util.find_spec("poetry.console") is not None:
+            from poetryup.core.poetry_inprocess import InProcessPoetry
+
+            return InProcessPoetry(cache_dir=cache_dir)
+        logging.warning(
+            "Poetry isn't importable, falling back to the subprocess backend"
+        )
+    return Poetry(cache_dir=cache_dir, timestamps=timestamps)
 
 
 class Poetry:
-    """A helper class to run poetry commands"""
+    """A helper class to run poetry commands
+
+    Commands are run in a poetry subprocess, subclasses may override run to
+    use another backend.
+
+    Args:
+        cache_dir: A directory to persist the probed poetry version in across
+            runs, the version is only memoized in memory if not provided
+        timestamps: Prefix each line of live command output with the elapsed
+            time
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        timestamps: bool = False,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.timestamps = timestamps
 
     @property
-    def version(self) -> version_.Version:
+    def version(self) -> "Version":
         """Return the installed poetry version"""
 
+        from packaging import version as version_
+
+        executable = shutil.which("poetry")
+        executable = os.path.realpath(executable) if executable else "poetry"
+        if executable in _versions:
+            return _versions[executable]
+
+        # the executable is replaced when poetry is upgraded, thus its mtime
+        # invalidates the cached version
+        cache_key = None
+        cache: Dict[str, str] = {}
+        if self.cache_dir is not None and os.path.isfile(executable):
+            cache_key = f"{executable}:{os.stat(executable).st_mtime_ns}"
+            cache = self._read_version_cache()
+            if cache_key in cache:
+                _versions[executable] = version_.parse(cache[cache_key])
+                return _versions[executable]
+
         output = cmd_run(["poetry", "--version"], capture_output=True)
         # output is: 'Poetry (version x.y.z)'
         version = output.rsplit(" ", 1).pop().strip().replace(")", "")
-        return version_.parse(version)
+        _versions[executable] = version_.parse(version)
+
+        if cache_key is not None:
+            cache[cache_key] = version
+            self._write_version_cache(cache)
+
+        return _versions[executable]
+
+    def _read_version_cache(self) -> Dict[str, str]:
+        """Read the poetry version cache, an empty cache if unreadable"""
+
+        path = self.cache_dir / "poetry-version.json"
+        try:
+            return json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _write_version_cache(self, cache: Dict[str, str]) -> None:
+        """Write the poetry version cache, failures are ignored"""
+
+        path = self.cache_dir / "poetry-version.json"
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first so that concurrent runs never
+            # read a partially written cache
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(cache))
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.debug(f"Couldn't write poetry version cache '{path}'")
+
+    def run(self, args: List[str], capture_output: bool = False) -> str:
+        """Run a poetry command
 
-    def show(self) -> str:
+        Args:
+            args: The command arguments, e.g. ['show', '--tree']
+            capture_output: Capture command output
+
+        Returns:
+            The output from the command
+
+        Raises:
+            CommandError when command exists with non-zero exit code
+        """
+
+        return cmd_run(
+            ["poetry", *args],
+            capture_output=capture_output,
+            timestamps=self.timestamps,
+        )
+
+    def stream(self, args: List[str]) -> Iterator[str]:
+        """Run a poetry command and stream its output
+
+        Args:
+            args: The command arguments, e.g. ['show', '--tree']
+
+        Yields:
+            The output lines from the command
+
+        Raises:
+            CommandError when command exists with non-zero exit code
+        """
+
+        return cmd_stream(["poetry", *args])
+
+    def show(self) -> Iterator[str]:
         """Run poetry show command
 
         Returns:
-            The output from the poetry show command
+            The output lines from the poetry show command
+        """
+
+        return self.stream(["show", "--tree"])
+
+    def update(
+        self,
+        packages: List[str] = [],
+        lock_only: bool = False,
+        groups: List[str] = [],
+    ) -> None:
+        """Run poetry update command
+
+        Args:
+            packages: The packages to update, all packages if empty
+            lock_only: Whether to only update the lock file without installing
+                the packages
+            groups: The only groups to install, every group if empty or if
+                poetry doesn't support groups, i.e. before poetry 1.2.0
         """
 
-        return cmd_run(["poetry", "show", "--tree"], capture_output=True)
+        from packaging import version as version_
+
+        args = ["update", *packages, *(["--lock"] if lock_only else [])]
+        if groups and not lock_only:
+            if self.version >= version_.parse("1.2.0"):
+                # the default group is called main by poetry
+                only = dict.fromkeys(
+                    "main" if x == "default" else x for x in groups
+                )
+                args.extend(["--only", ",".join(only)])
+            else:
+                logging.debug("Poetry doesn't support groups, installing all")
+        self.run(args)
 
-    def update(self) -> None:
-        """Run poetry update command"""
+    def install(self) -> None:
+        """Run poetry install command"""
 
-        cmd_run(["poetry", "update"])
+        self.run(["install"])
+
+    def lock(self) -> None:
+        """Run poetry lock command without updating locked versions"""
+
+        self.run(["lock", "--no-update"])
 
     def add(
         self,
         packages: List[str],
         group: Optional[str],
+        lock_only: bool = False,
     ) -> None:
         """Run poetry add command
 
         Args:
             package: The package(s) to add
             group: The group the package(s) should be added to
+            lock_only: Whether to only update the lock file without installing
+                the package(s)
         """
 
+        from packaging import version as version_
+
+        args = ["add", *packages, *(["--lock"] if lock_only else [])]
         if group is None or group == "default":
-            cmd_run(["poetry", "add", *packages])
+            self.run(args)
         elif group == "dev" and self.version < version_.parse("1.2.0"):
-            cmd_run(["poetry", "add", *packages, f"--{group}"])
+            self.run([*args, f"--{group}"])
         elif self.version >= version_.parse("1.2.0"):
-            cmd_run(["poetry", "add", *packages, "--group", group])
+            self.run([*args, "--group", group])
         else:
             logging.warning(f"Couldn't add package(s) '{packages}'")
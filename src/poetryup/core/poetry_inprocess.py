@@ -0,0 +1,86 @@
+import logging
+from typing import Iterator, List
+
+from packaging import version as version_
+
+from poetryup.core.cmd import CommandError
+from poetryup.core.poetry import Poetry
+from poetryup.core.trace import span
+
+
+class InProcessPoetry(Poetry):
+    """A helper class to run poetry commands through poetry's Python API
+
+    Poetry is imported once and every command runs in the current process,
+    which avoids booting a new interpreter and poetry for each command.
+    Requires poetry>=1.2.0 to be importable from the current interpreter.
+    """
+
+    @property
+    def version(self) -> version_.Version:
+        """Return the installed poetry version"""
+
+        from poetry.__version__ import __version__
+
+        return version_.parse(__version__)
+
+    def run(self, args: List[str], capture_output: bool = False) -> str:
+        """Run a poetry command in-process
+
+        Args:
+            args: The command arguments, e.g. ['show', '--tree']
+            capture_output: Capture command output
+
+        Returns:
+            The output from the command
+
+        Raises:
+            CommandError when command exists with non-zero exit code
+        """
+
+        from cleo.io.inputs.argv_input import ArgvInput
+        from cleo.io.outputs.buffered_output import BufferedOutput
+        from poetry.console.application import Application
+
+        logging.debug(f"Run command in-process: 'poetry {' '.join(args)}'")
+
+        # a new application is created for each command since it caches the
+        # project configuration, which changes between commands
+        application = Application()
+        application.auto_exits(False)
+
+        output = BufferedOutput() if capture_output else None
+        with span(" ".join(["poetry", *args])):
+            return_code = application.run(
+                ArgvInput(["poetry", *args]),
+                output,
+                output,
+            )
+        if return_code != 0:
+            logging.debug(
+                f"Command 'poetry {' '.join(args)}' exited with non-zero"
+                f"exit code '{return_code}'"
+            )
+            raise CommandError(
+                cmd="".join(["poetry", *args]),
+                return_code=return_code,
+            )
+        return output.fetch() if capture_output else None
+
+    def stream(self, args: List[str]) -> Iterator[str]:
+        """Run a poetry command in-process and return its output lines
+
+        The output is buffered by poetry, thus lines are only available once
+        the command has finished.
+
+        Args:
+            args: The command arguments, e.g. ['show', '--tree']
+
+        Returns:
+            The output lines from the command
+
+        Raises:
+            CommandError when command exists with non-zero exit code
+        """
+
+        return iter(self.run(args, capture_output=True).splitlines())
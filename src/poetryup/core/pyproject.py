@@ -1,12 +1,63 @@
 import logging
+import os
 import re
 from collections import defaultdict
-from typing import Dict, List, Union
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
 
 import tomlkit
 
+from poetryup.core import sharding
+from poetryup.core.bisection import (
+    TrialPoetry,
+    find_blockers,
+    package_name,
+    scratch_copy,
+)
+from poetryup.core.cmd import CommandError
+from poetryup.core.dependency_filter import DependencyFilter
+from poetryup.core.lock import Lock
+from poetryup.core.lock_graph import LockGraph
 from poetryup.core.poetry import Poetry
-from poetryup.models.dependency import Constraint, Dependency
+from poetryup.core.toml_spans import scan_value_spans, splice
+from poetryup.core.trace import span
+from poetryup.models.dependency import Constraint, Dependency, normalize_name
+
+
+def order_by_fan_out(
+    dependency_groups: Dict[str, List[str]],
+    graph: LockGraph,
+) -> Dict[str, List[str]]:
+    """Order the packages to add by the number of packages they depend on
+
+    Packages which pull in the most locked packages, directly or
+    transitively, are added first, as are the groups containing them. The
+    solver then settles the most constrained parts of the graph before the
+    leaves, which saves backtracking.
+
+    Args:
+        dependency_groups: The packages to add indexed by group, e.g.
+            {'dev': ['foo@latest', 'bar[baz]@^1.2']}
+        graph: The dependency graph of the lock file
+
+    Returns:
+        The ordered packages indexed by group, in order
+    """
+
+    def fan_out(package: str) -> int:
+        return graph.fan_out(package_name(package))
+
+    ordered = {
+        group: sorted(packages, key=fan_out, reverse=True)
+        for group, packages in dependency_groups.items()
+    }
+    return dict(
+        sorted(
+            ordered.items(),
+            key=lambda x: max(map(fan_out, x[1]), default=0),
+            reverse=True,
+        )
+    )
 
 
 class Pyproject:
@@ -18,12 +69,35 @@ class Pyproject:
 
     Args:
         pyproject_str: The pyproject.toml file parsed as a string
+        lock_path: The path of the poetry.lock file, the lock versions are read
+            from the output of the poetry show command if not provided or if
+            the file can't be read
+        poetry: The helper used to run poetry commands
+        lock: The parsed poetry.lock file, read instead of lock_path if
+            provided
     """
 
-    def __init__(self, pyproject_str: str) -> None:
-        self.pyproject = tomlkit.loads(pyproject_str)
-        self.poetry = Poetry()
+    def __init__(
+        self,
+        pyproject_str: str,
+        lock_path: Optional[Path] = None,
+        poetry: Optional[Poetry] = None,
+        lock: Optional[Lock] = None,
+    ) -> None:
+        with span("parse pyproject.toml"):
+            self.pyproject = tomlkit.loads(pyproject_str)
+        self.pyproject_str = pyproject_str
+        # the tables of the dependency values set since parsing indexed by
+        # the full key of the value
+        self._changed_values: Dict[Tuple[str, ...], Dict] = {}
+        self.lock_path = lock_path
+        self.lock = lock
+        self.poetry = poetry if poetry is not None else Poetry()
         self._dependencies = None  # caches the dependencies
+        self._dependency_index = None  # caches the dependency index
+        # the packages which blocked updating their group to latest versions
+        # indexed by group, found by bisecting the group
+        self.blockers: Dict[str, List[str]] = {}
 
     @property
     def dependencies(self) -> List[Dependency]:
@@ -70,17 +144,49 @@ class Pyproject:
         self._dependencies = dependencies  # cache dependencies
         return dependencies
 
+    @property
+    def dependency_index(self) -> Dict[str, Dependency]:
+        """The pyproject dependencies indexed by their normalized name"""
+
+        if self._dependency_index is not None:
+            # return cached dependency index
+            return self._dependency_index
+
+        self._dependency_index = self.index_dependencies(self.dependencies)
+        return self._dependency_index
+
     @property
     def lock_dependencies(self) -> List[Dependency]:
         """The pyproject dependencies with their lock version"""
 
-        # run poetry show to get currently installed dependencies
-        output = self.poetry.show()
+        # read lock versions straight from the lock file when possible, which
+        # avoids starting poetry at all
+        lock = self.read_lock()
+        if lock is not None:
+            lock_dependencies: List[Dependency] = []
+            for dependency in self.dependencies:
+                lock_version = lock.version(dependency.name)
+                if lock_version is None:
+                    # dependency not locked, continue to next
+                    continue
+
+                lock_dependencies.append(
+                    Dependency(
+                        name=dependency.name,
+                        version=lock_version,
+                        group=dependency.group,
+                    )
+                )
+            return lock_dependencies
+
+        # fall back to poetry show to get currently installed dependencies,
+        # its output is parsed line by line as it arrives
+        lines = self.poetry.show()
 
         # create dependencies from each line of the output
         pattern = re.compile("^[a-zA-Z-]+")
-        lock_dependencies: List[Dependency] = []
-        for line in output.split("\n"):
+        lock_dependencies = []
+        for line in lines:
             if pattern.match(line) is None:
                 # not a matching line, continue to next
                 continue
@@ -89,7 +195,10 @@ class Pyproject:
             lock_name, lock_version, *_ = line.split()
 
             # search for dependency in pyproject
-            dependency = self.search_dependency(self.dependencies, lock_name)
+            dependency = self.search_dependency(
+                self.dependency_index,
+                lock_name,
+            )
             if dependency is None:
                 # dependency not found, continue to next
                 continue
@@ -104,6 +213,20 @@ class Pyproject:
 
         return lock_dependencies
 
+    def read_lock(self) -> Optional[Lock]:
+        """Return the parsed poetry.lock file
+
+        Returns:
+            The lock given to the pyproject, the lock read from lock_path
+            otherwise, None if there is none or it can't be read
+        """
+
+        if self.lock is not None:
+            return self.lock
+        if self.lock_path is not None:
+            return Lock.read(self.lock_path)
+        return None
+
     @property
     def bumped_dependencies(self) -> List[Dependency]:
         """The pyproject dependencies with their version bumped to lock version
@@ -113,24 +236,13 @@ class Pyproject:
         constraint '!=x.y.z' would completely change its meaning.
         """
 
-        lock_dependencies = self.lock_dependencies
+        lock_index = self.index_dependencies(self.lock_dependencies)
 
         bumped_dependencies: List[Dependency] = []
         for dependency in self.dependencies:
-            constraint = dependency.constraint
-
-            # check for dependencies whom version can't be bumped
-            if (
-                constraint == Constraint.MULTIPLE_CONSTRAINTS
-                or constraint == Constraint.MULTIPLE_REQUIREMENTS
-                or constraint == Constraint.WILDCARD
-            ):
-                bumped_dependencies.append(dependency)
-                continue
-
             # search for lock dependency
             lock_dependency = self.search_dependency(
-                lock_dependencies,
+                lock_index,
                 dependency.name,
             )
             if lock_dependency is None:
@@ -138,67 +250,156 @@ class Pyproject:
                 bumped_dependencies.append(dependency)
                 continue
 
-            bumped_version = None
-            if constraint == Constraint.CARET:
-                bumped_version = "^" + lock_dependency.version
-            elif constraint == Constraint.TILDE:
-                bumped_version = "~" + lock_dependency.version
-            elif constraint == Constraint.INEQUALITY:
-                version_str = ""
-                if isinstance(dependency.version, str):
-                    version_str = dependency.version
-                elif isinstance(dependency.version, Dict):
-                    version_str = dependency.version.get("version", "")
-
-                if version_str[:2] == ">=":
-                    bumped_version = ">=" + lock_dependency.version
-            elif constraint == Constraint.EXACT:
-                bumped_version = lock_dependency.version
-
-            version = dependency.version
-            if bumped_version is None:
-                # bump version can't be determined, version stays unchanged
-                pass
-            elif isinstance(version, str):
-                version = bumped_version
-            elif (
-                isinstance(version, Dict) and version.get("version") is not None
-            ):
-                version["version"] = bumped_version
-
             bumped_dependencies.append(
-                Dependency(
-                    name=dependency.name,
-                    version=version,
-                    group=dependency.group,
-                )
+                self.bump_dependency(dependency, lock_dependency.version)
             )
 
         return bumped_dependencies
 
+    def bump_dependency(
+        self,
+        dependency: Dependency,
+        lock_version: str,
+    ) -> Dependency:
+        """Bump the version of a dependency to a lock version
+
+        Args:
+            dependency: The dependency to bump
+            lock_version: The version to bump to
+
+        Returns:
+            The bumped dependency, unchanged if its constraint can't be bumped
+        """
+
+        constraint = dependency.constraint
+
+        # check for dependencies whom version can't be bumped
+        if (
+            constraint == Constraint.MULTIPLE_CONSTRAINTS
+            or constraint == Constraint.MULTIPLE_REQUIREMENTS
+            or constraint == Constraint.WILDCARD
+        ):
+            return dependency
+
+        bumped_version = None
+        if constraint == Constraint.CARET:
+            bumped_version = "^" + lock_version
+        elif constraint == Constraint.TILDE:
+            bumped_version = "~" + lock_version
+        elif constraint == Constraint.INEQUALITY:
+            version_str = ""
+            if isinstance(dependency.version, str):
+                version_str = dependency.version
+            elif isinstance(dependency.version, Dict):
+                version_str = dependency.version.get("version", "")
+
+            if version_str[:2] == ">=":
+                bumped_version = ">=" + lock_version
+        elif constraint == Constraint.EXACT:
+            bumped_version = lock_version
+
+        version = dependency.version
+        if bumped_version is None:
+            # bump version can't be determined, version stays unchanged
+            pass
+        elif isinstance(version, str):
+            version = bumped_version
+        elif isinstance(version, Dict) and version.get("version") is not None:
+            # copy the table, the dependency may not be applied
+            version = version.copy()
+            version["version"] = bumped_version
+
+        return Dependency(
+            name=dependency.name,
+            version=version,
+            group=dependency.group,
+        )
+
     def dumps(self) -> str:
-        """Dumps pyproject into a string."""
+        """Dumps pyproject into a string.
 
-        return tomlkit.dumps(self.pyproject)
+        Changed dependency values are patched into the original text, which
+        is returned as is if nothing changed. The whole pyproject is dumped
+        if the original text can't be patched.
+        """
 
-    def search_dependency(
+        with span("dump pyproject.toml"):
+            pyproject_str = self._patch_dependencies()
+            if pyproject_str is None:
+                logging.debug("Couldn't patch pyproject, dumping it instead")
+                pyproject_str = tomlkit.dumps(self.pyproject)
+            return pyproject_str
+
+    def _patch_dependencies(self) -> Optional[str]:
+        """Patch the changed dependency values into the original text
+
+        Only changes made with apply_dependencies are patched.
+
+        Returns:
+            The patched text, None if it can't be patched
+        """
+
+        if not self._changed_values:
+            return self.pyproject_str
+
+        spans = scan_value_spans(self.pyproject_str)
+        if spans is None:
+            return None
+
+        edits = []
+        for key, table in self._changed_values.items():
+            value_span = spans.get(key)
+            # tomlkit tables are dicts of their items, reading the dict
+            # directly is a lot faster than the mapping interface of tomlkit
+            value = dict.get(table, key[-1])
+            if value_span is None or not hasattr(value, "as_string"):
+                # e.g. dependencies added since parsing or dependencies
+                # written as tables
+                return None
+            edits.append((value_span, value.as_string()))
+
+        return splice(self.pyproject_str, edits)
+
+    def index_dependencies(
         self,
         dependencies: List[Dependency],
+    ) -> Dict[str, Dependency]:
+        """Index a list of dependencies by their normalized name
+
+        The first dependency wins if several dependencies share the same
+        normalized name, e.g. when a dependency is declared in multiple groups.
+
+        Args:
+            dependencies: A list of dependencies to index
+
+        Returns:
+            A mapping of normalized names to dependencies
+        """
+
+        index: Dict[str, Dependency] = {}
+        for dependency in dependencies:
+            index.setdefault(dependency.normalized_name, dependency)
+        return index
+
+    def search_dependency(
+        self,
+        dependencies: Union[List[Dependency], Dict[str, Dependency]],
         name: str,
     ) -> Union[Dependency, None]:
         """Search for a dependency by name given a list of dependencies
 
         Args:
-            dependencies: A list of dependencies to search in
+            dependencies: A list of dependencies, or a dependency index, to
+                search in
             name: Name of the dependency to search for
 
         Returns:
             A dependency if found, None if not found
         """
 
-        for dependency in dependencies:
-            if dependency.name == name or dependency.normalized_name == name:
-                return dependency
+        if not isinstance(dependencies, dict):
+            dependencies = self.index_dependencies(dependencies)
+        return dependencies.get(normalize_name(name))
 
     def filter_dependencies(
         self,
@@ -208,39 +409,28 @@ class Pyproject:
         exclude_names: List[str] = [],
         groups: List[str] = [],
     ) -> List[Dependency]:
-        """Search for a dependency by name given a list of dependencies
+        """Filter dependencies by constraint, name and group
+
+        The criteria are compiled once and dependencies are filtered in a
+        single pass, see DependencyFilter.
 
         Args:
             dependencies: A list of dependencies to filter
             without_constraints: The dependency constraints to ignore
-            names: The dependency names to include
-            exclude_names: The dependency names to exclude
+            names: The dependency names or name patterns to include
+            exclude_names: The dependency names or name patterns to exclude
             groups: The dependency groups to include
 
         Returns:
             A list of dependencies
         """
 
-        if without_constraints:
-            # remove deps whom constraint is in the provided constraint list
-            dependencies = [
-                x
-                for x in dependencies
-                if x.constraint not in without_constraints
-            ]
-        if names:
-            # remove deps whom name is NOT in the provided name list
-            dependencies = [x for x in dependencies if x.name in names]
-        if exclude_names:
-            # remove deps whom name is in the provided exclude_names list
-            dependencies = [
-                x for x in dependencies if x.name not in exclude_names
-            ]
-        if groups:
-            # remove deps whom group is NOT in the provided group list
-            dependencies = [x for x in dependencies if x.group in groups]
-
-        return dependencies
+        return DependencyFilter.compile(
+            tuple(without_constraints),
+            tuple(names),
+            tuple(exclude_names),
+            tuple(groups),
+        ).filter(dependencies)
 
     def update_dependencies(
         self,
@@ -249,15 +439,109 @@ class Pyproject:
         names: List[str] = [],
         exclude_names: List[str] = [],
         groups: List[str] = [],
-    ) -> None:
+        latest_versions: Dict[str, str] = {},
+        single_resolution: bool = False,
+        bisect: bool = False,
+        bisect_workers: Optional[int] = None,
+        shard: bool = False,
+        shard_workers: Optional[int] = None,
+    ) -> List[Dependency]:
         """Update dependencies and bump their version in pyproject
 
+        Runs the resolution, bumps the selected dependencies to their lock
+        version and applies them to the pyproject.
+
+        Args:
+            latest: Whether to update dependencies to their latest version
+            without_constraints: The dependency constraints to ignore
+            names: The dependency names to include
+            exclude_names: The dependency names to exclude
+            groups: The dependency groups to include
+            latest_versions: Known latest versions indexed by normalized name,
+                dependencies with a known latest version are pinned to it
+                instead of letting poetry search for it
+            single_resolution: Whether to resolve the latest versions of every
+                group at once instead of once per group
+            bisect: Whether to bisect groups which fail to update to their
+                latest versions for the packages blocking them
+            bisect_workers: The maximum number of trial resolutions to run in
+                parallel when bisecting
+            shard: Whether to resolve the components of the lock graph in
+                parallel when updating dependencies within their constraints
+            shard_workers: The maximum number of shards to resolve in parallel
+
+        Returns:
+            The selected dependencies bumped to their lock version
+        """
+
+        with span("resolve"):
+            self.resolve_dependencies(
+                latest,
+                without_constraints,
+                names,
+                exclude_names,
+                groups,
+                latest_versions,
+                single_resolution,
+                bisect,
+                bisect_workers,
+                shard,
+                shard_workers,
+            )
+        with span("bump"):
+            bumped_dependencies = self.bump_dependencies(
+                without_constraints,
+                names,
+                exclude_names,
+                groups,
+            )
+            self.apply_dependencies(bumped_dependencies)
+        return bumped_dependencies
+
+    def resolve_dependencies(
+        self,
+        latest: bool = False,
+        without_constraints: List[Constraint] = [],
+        names: List[str] = [],
+        exclude_names: List[str] = [],
+        groups: List[str] = [],
+        latest_versions: Dict[str, str] = {},
+        single_resolution: bool = False,
+        bisect: bool = False,
+        bisect_workers: Optional[int] = None,
+        shard: bool = False,
+        shard_workers: Optional[int] = None,
+        lock_only: bool = False,
+    ) -> None:
+        """Update dependencies in the lock file by running poetry
+
+        Within their constraints, only the dependencies selected by name or
+        group are updated, and only the selected groups are installed if
+        poetry supports groups.
+
         Args:
             latest: Whether to update dependencies to their latest version
             without_constraints: The dependency constraints to ignore
             names: The dependency names to include
             exclude_names: The dependency names to exclude
             groups: The dependency groups to include
+            latest_versions: Known latest versions indexed by normalized name,
+                dependencies with a known latest version are pinned to it
+                instead of letting poetry search for it
+            single_resolution: Whether to resolve the latest versions of every
+                group at once instead of once per group, falls back to once
+                per group if the single resolution fails
+            bisect: Whether to bisect groups which fail to update to their
+                latest versions for the packages blocking them, every other
+                package of the group is updated
+            bisect_workers: The maximum number of trial resolutions to run in
+                parallel when bisecting
+            shard: Whether to resolve the components of the lock graph in
+                parallel when updating dependencies within their constraints,
+                falls back to a single resolution if sharding fails
+            shard_workers: The maximum number of shards to resolve in parallel
+            lock_only: Whether to only update the lock file without installing
+                the dependencies
         """
 
         if latest:
@@ -273,11 +557,31 @@ class Pyproject:
             # to avoid version solver error in case dependencies depend on each
             # other
             dependency_groups = defaultdict(list)
+            # the constraints of the added dependencies indexed by group and
+            # normalized name, any version is allowed if the latest is unknown
+            targets: Dict[Tuple[str, str], str] = {}
+            lock = self.read_lock()
             for dependency in dependencies:
+                latest_version = latest_versions.get(dependency.normalized_name)
+                if (
+                    latest_version is not None
+                    and lock is not None
+                    and lock.version(dependency.name) == latest_version
+                ):
+                    # adding a package at its locked version leaves it and the
+                    # packages it depends on locked as they are
+                    logging.debug(
+                        f"'{dependency.name}' is locked to its latest version "
+                        f"{latest_version}, skipping it"
+                    )
+                    continue
+                target = f"^{latest_version}" if latest_version else "latest"
+                key = (dependency.group, dependency.normalized_name)
                 if isinstance(dependency.version, str):
                     dependency_groups[dependency.group].append(
-                        f"{dependency.name}@latest"
+                        f"{dependency.name}@{target}"
                     )
+                    targets[key] = target if latest_version else "*"
                 if (
                     isinstance(dependency.version, dict)
                     and "version" in dependency.version
@@ -287,36 +591,314 @@ class Pyproject:
                         continue
                     extras = ",".join(dependency.version.get("extras", []))
                     suffix = f"[{extras}]" if extras else ""
-                    package_version = f"{dependency.name}{suffix}@latest"
+                    package_version = f"{dependency.name}{suffix}@{target}"
                     dependency_groups[dependency.group].append(package_version)
+                    targets[key] = target if latest_version else "*"
 
-            for group, packages in dependency_groups.items():
-                self.poetry.add(
-                    packages=packages,
-                    group=group,
+            if lock is not None:
+                dependency_groups = order_by_fan_out(
+                    dependency_groups,
+                    lock.graph,
+                )
+
+            if (
+                single_resolution
+                and dependency_groups
+                and self.resolve_at_once(targets, lock_only)
+            ):
+                logging.info(
+                    f"Resolved {len(dependency_groups)} group(s) at once, "
+                    f"avoided {len(dependency_groups) - 1} solver pass(es)"
                 )
+                return
+
+            for group, packages in dependency_groups.items():
+                try:
+                    self.poetry.add(
+                        packages=packages,
+                        group=group,
+                        lock_only=lock_only,
+                    )
+                except CommandError:
+                    if not bisect:
+                        raise
+                    self.bisect_group(
+                        group,
+                        packages,
+                        bisect_workers,
+                        lock_only,
+                    )
         else:
+            # constraint and exclusion filters only apply when bumping, the
+            # packages to update are selected by name and group only
+            dependencies = self.filter_dependencies(
+                self.dependencies,
+                names=names,
+                groups=groups,
+            )
+            if (names or groups) and len(dependencies) < len(self.dependencies):
+                # only the selected packages are unlocked, the rest of the
+                # lock file is kept as is
+                if not dependencies:
+                    logging.info("No dependencies selected, skipping update")
+                    return
+                packages = list(dict.fromkeys(x.name for x in dependencies))
+                logging.info(
+                    f"Running poetry update command for {len(packages)} "
+                    "package(s)"
+                )
+                self.poetry.update(
+                    packages,
+                    lock_only=lock_only,
+                    groups=groups,
+                )
+                return
+
+            if shard and self.shard_update(shard_workers, lock_only):
+                return
             logging.info("Running poetry update command")
-            self.poetry.update()
+            self.poetry.update(lock_only=lock_only, groups=groups)
+
+    def bisect_group(
+        self,
+        group: str,
+        packages: List[str],
+        workers: Optional[int] = None,
+        lock_only: bool = False,
+    ) -> List[str]:
+        """Find the packages blocking a group update and update the others
+
+        Trial resolutions run on scratch copies of the project in the current
+        directory, which is only changed by the final update of the packages
+        which aren't blockers.
+
+        Args:
+            group: The group of the packages
+            packages: The packages which fail to be added together, e.g.
+                ['foo@latest', 'bar[baz]@^1.2']
+            workers: The maximum number of trial resolutions to run in
+                parallel
+            lock_only: Whether to only update the lock file without installing
+                the other packages
+
+        Returns:
+            The blockers
+
+        Raises:
+            CommandError when updating the other packages fails
+        """
+
+        project = Path.cwd()
+
+        def trial(chunk: List[str]) -> bool:
+            with span("trial", group=group, packages=len(chunk)):
+                with scratch_copy(project) as path:
+                    try:
+                        TrialPoetry(path, self.poetry.cache_dir).add(
+                            packages=chunk,
+                            group=group,
+                            lock_only=True,
+                        )
+                    except CommandError:
+                        return False
+                    return True
+
+        logging.info(f"Bisecting {len(packages)} package(s) of group '{group}'")
+        with span("bisect", group=group):
+            blockers = find_blockers(packages, trial, workers)
+        self.blockers[group] = blockers
+
+        others = [x for x in packages if x not in blockers]
+        if others:
+            self.poetry.add(packages=others, group=group, lock_only=lock_only)
+        if blockers:
+            names = ", ".join(f"'{package_name(x)}'" for x in blockers)
+            logging.warning(
+                f"Couldn't update {names} of group '{group}' to their latest "
+                f"version, updated the other {len(others)} package(s)"
+            )
+        return blockers
+
+    def shard_update(
+        self,
+        workers: Optional[int] = None,
+        lock_only: bool = False,
+    ) -> bool:
+        """Update dependencies with a resolution per component of the lock
+
+        Dependencies which share no locked packages, directly or
+        transitively, are resolved independently in scratch copies of the
+        project in the current directory. The lock files of the shards are
+        merged and verified against the whole project before the merged lock
+        file is installed.
+
+        Args:
+            workers: The maximum number of shards to resolve in parallel, the
+                number of CPUs by default
+            lock_only: Whether to only write the merged lock file without
+                installing it
+
+        Returns:
+            Whether the shards were resolved and verified, the project is left
+            unchanged otherwise
+        """
 
-        # bump versions in pyproject
-        bumped_dependencies = self.filter_dependencies(
+        project = Path.cwd()
+        lock = self.read_lock()
+        if lock is None:
+            logging.info("No lock file to shard, resolving at once")
+            return False
+
+        try:
+            components = lock.graph.components(
+                x.name for x in self.dependencies
+            )
+        except KeyError as e:
+            logging.info(f"'{e.args[0]}' isn't locked, resolving at once")
+            return False
+        shards = sharding.balance(components, workers or os.cpu_count() or 1)
+        if len(shards) < 2:
+            logging.info("Lock graph has a single shard, resolving at once")
+            return False
+
+        logging.info(
+            f"Resolving {len(components)} component(s) of the lock graph in "
+            f"{len(shards)} shard(s)"
+        )
+        pyproject_str = (project / "pyproject.toml").read_text()
+        with span("shards", shards=len(shards)):
+            lock_strs = sharding.lock_shards(
+                project,
+                pyproject_str,
+                shards,
+                self.poetry.cache_dir,
+            )
+        lock_str = (
+            sharding.merge_locks(lock_strs) if lock_strs is not None else None
+        )
+        verified_str = (
+            sharding.verify_lock(project, lock_str, self.poetry.cache_dir)
+            if lock_str is not None
+            else None
+        )
+        if verified_str is None:
+            logging.warning("Couldn't shard the resolution, resolving at once")
+            return False
+
+        (project / "poetry.lock").write_text(verified_str)
+        if not lock_only:
+            self.poetry.install()
+        return True
+
+    def resolve_at_once(
+        self,
+        targets: Dict[Tuple[str, str], str],
+        lock_only: bool = False,
+    ) -> bool:
+        """Update dependencies to target constraints with a single resolution
+
+        The target constraints are written to the pyproject.toml file in the
+        current directory before running poetry update on the dependencies.
+        The file is restored if the resolution fails.
+
+        Args:
+            targets: The target constraints indexed by group and normalized
+                name
+            lock_only: Whether to only update the lock file without installing
+                the dependencies
+
+        Returns:
+            Whether the resolution succeeded
+        """
+
+        path = Path("pyproject.toml")
+        pyproject_str = path.read_text()
+
+        # edit a copy, the constraints are bumped to the lock versions later
+        pyproject = Pyproject(pyproject_str, poetry=self.poetry)
+        packages: List[str] = []
+        dependencies: List[Dependency] = []
+        for dependency in pyproject.dependencies:
+            target = targets.get((dependency.group, dependency.normalized_name))
+            if target is None:
+                continue
+            packages.append(dependency.name)
+            if isinstance(dependency.version, str):
+                dependencies.append(
+                    Dependency(
+                        name=dependency.name,
+                        version=target,
+                        group=dependency.group,
+                    )
+                )
+            else:
+                version = dependency.version.copy()
+                version["version"] = target
+                dependencies.append(
+                    Dependency(
+                        name=dependency.name,
+                        version=version,
+                        group=dependency.group,
+                    )
+                )
+        pyproject.apply_dependencies(dependencies)
+        path.write_text(pyproject.dumps())
+
+        try:
+            self.poetry.update(sorted(set(packages)), lock_only=lock_only)
+        except CommandError as e:
+            logging.warning(
+                f"Single resolution failed with exit code '{e.return_code}', "
+                "falling back to one resolution per group"
+            )
+            path.write_text(pyproject_str)
+            return False
+        return True
+
+    def bump_dependencies(
+        self,
+        without_constraints: List[Constraint] = [],
+        names: List[str] = [],
+        exclude_names: List[str] = [],
+        groups: List[str] = [],
+    ) -> List[Dependency]:
+        """The selected dependencies with their version bumped to lock version
+
+        Args:
+            without_constraints: The dependency constraints to ignore
+            names: The dependency names to include
+            exclude_names: The dependency names to exclude
+            groups: The dependency groups to include
+
+        Returns:
+            A list of bumped dependencies
+        """
+
+        return self.filter_dependencies(
             self.bumped_dependencies,
             without_constraints,
             names,
             exclude_names,
             groups,
         )
+
+    def apply_dependencies(self, dependencies: List[Dependency]) -> None:
+        """Set the version of dependencies in pyproject
+
+        Args:
+            dependencies: The dependencies to set
+        """
+
         table = self.pyproject["tool"]["poetry"]
-        for dependency in bumped_dependencies:
+        for dependency in dependencies:
             if dependency.group == "default":
-                table["dependencies"][dependency.name] = dependency.version
+                path: Tuple[str, ...] = ("dependencies",)
             elif (
                 dependency.group == "dev"
                 and table.get("dev-dependencies", {}).get(dependency.name)
                 is not None
             ):
-                table["dev-dependencies"][dependency.name] = dependency.version
+                path = ("dev-dependencies",)
             elif (
                 table.get("group", {})
                 .get(dependency.group, {})
@@ -324,8 +906,16 @@ class Pyproject:
                 .get(dependency.name)
                 is not None
             ):
-                table["group"][dependency.group]["dependencies"][
-                    dependency.name
-                ] = dependency.version
+                path = ("group", dependency.group, "dependencies")
             else:
                 logging.warning(f"Couldn't bump dependency '{dependency.name}'")
+                continue
+
+            container = table
+            for key in path:
+                container = container[key]
+            container[dependency.name] = dependency.version
+            # remember the value so that dumps patches only changed values
+            self._changed_values[
+                ("tool", "poetry", *path, dependency.name)
+            ] = container
@@ -0,0 +1,241 @@
+import json
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Iterator, List, Optional, TextIO
+
+from poetryup.core.bisection import package_name
+from poetryup.core.dependency_filter import DependencyFilter
+from poetryup.core.plan import version_constraint
+from poetryup.core.pyproject import Pyproject
+from poetryup.models.dependency import Constraint, Dependency, normalize_name
+
+# the constraints which are never bumped to the lock version
+_UNSUPPORTED = {
+    None,
+    Constraint.WILDCARD,
+    Constraint.MULTIPLE_REQUIREMENTS,
+    Constraint.MULTIPLE_CONSTRAINTS,
+}
+
+
+class Action(str, Enum):
+    BUMPED = "bumped"
+    UNCHANGED = "unchanged"
+    SKIPPED = "skipped"
+
+
+class Reason(str, Enum):
+    EXCLUDED_CONSTRAINT = "excluded_constraint"
+    NOT_INCLUDED = "not_included"
+    EXCLUDED_NAME = "excluded_name"
+    EXCLUDED_GROUP = "excluded_group"
+    NOT_LOCKED = "not_locked"
+    UNSUPPORTED_CONSTRAINT = "unsupported_constraint"
+    UP_TO_DATE = "up_to_date"
+    BLOCKED = "blocked"
+
+
+# the reasons of DependencyFilter.reason
+_FILTER_REASONS = {
+    "constraint": Reason.EXCLUDED_CONSTRAINT,
+    "name": Reason.NOT_INCLUDED,
+    "excluded name": Reason.EXCLUDED_NAME,
+    "group": Reason.EXCLUDED_GROUP,
+}
+
+
+@dataclass(frozen=True)
+class Decision:
+    """A class to represent the decision about a dependency in a run
+
+    Args:
+        project: The directory of the project
+        name: The name of the dependency
+        group: The group of the dependency
+        constraint: The kind of the constraint, None if unknown, e.g. for git
+            dependencies
+        old: The constraint before the run, None if it has none
+        lock_version: The version the dependency is locked to, if any
+        fan_out: The number of locked packages the dependency depends on,
+            directly or transitively, None if it isn't in the lock file
+        new: The constraint after the run, None if it has none
+        action: Whether the dependency was bumped, unchanged or skipped
+        reason: Why the dependency wasn't bumped, or why it was bumped only to
+            the lock version, e.g. 'up_to_date'
+        decided_at: When the decision was made, in ISO 8601 format in UTC
+    """
+
+    project: str
+    name: str
+    group: str
+    constraint: Optional[Constraint]
+    old: Optional[str]
+    lock_version: Optional[str]
+    fan_out: Optional[int]
+    new: Optional[str]
+    action: Action
+    reason: Optional[Reason]
+    decided_at: str
+
+    def dumps(self) -> str:
+        """Dumps the decision into a single line JSON string"""
+
+        return json.dumps(
+            {
+                k: v.value if isinstance(v, Enum) else v
+                for k, v in asdict(self).items()
+            }
+        )
+
+
+def decide(
+    pyproject: Pyproject,
+    bumped_dependencies: List[Dependency],
+    without_constraints: List[Constraint] = [],
+    names: List[str] = [],
+    exclude_names: List[str] = [],
+    groups: List[str] = [],
+) -> Iterator[Decision]:
+    """Decide about every dependency of a pyproject
+
+    Args:
+        pyproject: The pyproject, with the dependencies before the run
+        bumped_dependencies: The selected dependencies bumped to their lock
+            version
+        without_constraints: The dependency constraints to ignore
+        names: The dependency names to include
+        exclude_names: The dependency names to exclude
+        groups: The dependency groups to include
+
+    Yields:
+        The decisions, one per dependency in pyproject order
+    """
+
+    dependency_filter = DependencyFilter.compile(
+        tuple(without_constraints),
+        tuple(names),
+        tuple(exclude_names),
+        tuple(groups),
+    )
+    lock_versions = {
+        x.normalized_name: x.version for x in pyproject.lock_dependencies
+    }
+    lock = pyproject.read_lock()
+    graph = lock.graph if lock is not None else None
+    bumped = {(x.group, x.normalized_name): x for x in bumped_dependencies}
+    blockers = {
+        (group, normalize_name(package_name(x)))
+        for group, packages in pyproject.blockers.items()
+        for x in packages
+    }
+    project = os.getcwd()
+
+    for dependency in pyproject.dependencies:
+        key = (dependency.group, dependency.normalized_name)
+        old = version_constraint(dependency.version)
+        lock_version = lock_versions.get(dependency.normalized_name)
+        new = old
+
+        filter_reason = dependency_filter.reason(dependency)
+        if filter_reason is not None:
+            action, reason = Action.SKIPPED, _FILTER_REASONS[filter_reason]
+        elif lock_version is None:
+            action, reason = Action.SKIPPED, Reason.NOT_LOCKED
+        else:
+            new = version_constraint(bumped[key].version)
+            if new != old:
+                action, reason = Action.BUMPED, None
+            elif _unsupported(dependency):
+                action, reason = Action.UNCHANGED, Reason.UNSUPPORTED_CONSTRAINT
+            else:
+                action, reason = Action.UNCHANGED, Reason.UP_TO_DATE
+            if key in blockers:
+                reason = Reason.BLOCKED
+
+        yield Decision(
+            project=project,
+            name=dependency.name,
+            group=dependency.group,
+            constraint=dependency.constraint,
+            old=old,
+            lock_version=lock_version,
+            fan_out=(
+                graph.fan_out(dependency.name)
+                if graph is not None and dependency.name in graph
+                else None
+            ),
+            new=new,
+            action=action,
+            reason=reason,
+            decided_at=datetime.now(timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+        )
+
+
+def _unsupported(dependency: Dependency) -> bool:
+    """Check whether the constraint of a dependency is never bumped"""
+
+    if dependency.constraint in _UNSUPPORTED:
+        return True
+    old = version_constraint(dependency.version)
+    if old is None:
+        return True
+    # only the lower bound of inequalities is bumped
+    return dependency.constraint == Constraint.INEQUALITY and old[:2] != ">="
+
+
+class ReportWriter:
+    """A class to represent a stream of decisions as NDJSON
+
+    Every decision is written on a line of its own and flushed right away,
+    thus the report can be consumed while the run progresses.
+
+    Args:
+        stream: The stream to write to
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self.written = 0
+
+    def __call__(self, decision: Decision) -> None:
+        self.stream.write(decision.dumps() + "\n")
+        self.stream.flush()
+        self.written += 1
+
+
+@contextmanager
+def open_report(path: str) -> Iterator[ReportWriter]:
+    """Open a report file, '-' for standard output
+
+    Reporting to standard output moves everything else written to standard
+    output, such as the output of poetry, to standard error, thus standard
+    output holds nothing but the report.
+
+    Args:
+        path: The path of the report file, '-' for standard output
+
+    Yields:
+        The report writer
+    """
+
+    if path != "-":
+        with open(path, "w") as stream:
+            yield ReportWriter(stream)
+        return
+
+    sys.stdout.flush()
+    stdout = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with os.fdopen(os.dup(stdout), "w") as stream:
+            yield ReportWriter(stream)
+    finally:
+        sys.stdout.flush()
+        os.dup2(stdout, 1)
+        os.close(stdout)
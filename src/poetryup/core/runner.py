@@ -0,0 +1,442 @@
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from poetryup.core.index import IndexClient, ProjectPage, select_latest_versions
+from poetryup.core.lock import Lock, allows, content_hash, replace_content_hash
+from poetryup.core.plan import (
+    Plan,
+    apply_plan,
+    create_plan,
+    hash_text,
+    original_constraints,
+)
+from poetryup.core.poetry import create_poetry
+from poetryup.core.pyproject import Pyproject
+from poetryup.core.report import Decision, decide
+from poetryup.core.state import State, default_cache_dir, fingerprint
+from poetryup.core.trace import span
+from poetryup.core.version_cache import VersionCache
+from poetryup.core.wheelhouse import Wheelhouse
+from poetryup.models.dependency import Dependency, normalize_name
+from poetryup.models.options import Options
+
+
+class HashMismatchError(Exception):
+    def __init__(self, path: str) -> None:
+        self.path = path
+        super().__init__(f"'{path}' doesn't match the hash recorded in plan")
+
+
+def _read_pyproject() -> str:
+    try:
+        return Path("pyproject.toml").read_text()
+    except FileNotFoundError:
+        raise Exception(
+            "poetryup couldn't find a pyproject.toml file in current directory"
+        )
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        return Path(path).read_text()
+    except FileNotFoundError:
+        return None
+
+
+def _read_lock() -> Optional[str]:
+    return _read_text("poetry.lock")
+
+
+def _write_text(path: str, text: str, current: Optional[str]) -> None:
+    # leave unchanged files alone, which keeps their modification time
+    if text == current:
+        logging.debug(f"'{path}' is unchanged, skipping write")
+        return
+    Path(path).write_text(text)
+
+
+def _selected_names(pyproject: Pyproject, options: Options) -> List[str]:
+    dependencies = pyproject.filter_dependencies(
+        pyproject.dependencies,
+        options.without_constraints,
+        options.names,
+        options.exclude_names,
+        options.groups,
+    )
+    return [x.name for x in dependencies]
+
+
+def _fetch_pages(names: List[str], options: Options) -> Dict[str, ProjectPage]:
+    # fetch index pages concurrently, which saves poetry from searching for
+    # latest versions one by one
+    client = IndexClient(options.index_url, cache_dir=options.cache_dir)
+    with span("fetch index pages"):
+        return client.fetch_pages(names)
+
+
+def _wheelhouse_pages(
+    names: List[str],
+    options: Options,
+) -> Dict[str, ProjectPage]:
+    # the wheelhouse keeps an index of its own, which is refreshed from the
+    # changed directories only
+    wheelhouse = Wheelhouse(
+        options.wheelhouse,
+        options.cache_dir or default_cache_dir(),
+    )
+    with span("read wheelhouse"):
+        return wheelhouse.pages(names)
+
+
+def _index_pages(
+    pyproject: Pyproject,
+    options: Options,
+) -> Optional[Dict[str, ProjectPage]]:
+    if not options.skip_unchanged:
+        return None
+    if options.wheelhouse is not None:
+        return _wheelhouse_pages(_selected_names(pyproject, options), options)
+    if not options.index_url:
+        return None
+    return _fetch_pages(_selected_names(pyproject, options), options)
+
+
+def latest_versions(
+    pyproject: Pyproject,
+    options: Options,
+    pages: Optional[Dict[str, ProjectPage]] = None,
+) -> Dict[str, str]:
+    """Look up the latest versions of the selected dependencies
+
+    Versions are looked up in the wheelhouse or the index of the options,
+    none are looked up unless the options update to latest versions.
+
+    Args:
+        pyproject: The pyproject of the dependencies
+        options: The options of the run
+        pages: The already fetched project pages of the dependencies, if any
+
+    Returns:
+        The latest versions indexed by normalized name
+    """
+
+    if not options.latest:
+        return {}
+    if options.wheelhouse is not None:
+        if pages is None:
+            names = _selected_names(pyproject, options)
+            pages = _wheelhouse_pages(names, options)
+        return select_latest_versions(pages)
+    if not options.index_url:
+        return {}
+
+    # latest versions are shared by every project using the same index, only
+    # packages without a fresh cache entry are looked up
+    cache = VersionCache(
+        (options.cache_dir or default_cache_dir()) / "versions.sqlite3",
+        ttl=options.cache_ttl,
+        max_entries=options.cache_size,
+    )
+    names = _selected_names(pyproject, options)
+    with span("read version cache"):
+        versions = cache.get(options.index_url, names)
+
+    missing = [x for x in names if normalize_name(x) not in versions]
+    if missing:
+        if pages is None:
+            pages = _fetch_pages(missing, options)
+        fetched = select_latest_versions(
+            {k: v for k, v in pages.items() if k not in versions}
+        )
+        cache.put(options.index_url, fetched)
+        versions.update(fetched)
+    return versions
+
+
+def _refresh_lock(resolved_str: str, pyproject_str: str) -> bool:
+    """Refresh the content hash of poetry.lock file without resolving
+
+    The lock file must be fresh for the resolved pyproject, and the locked
+    versions must satisfy every constraint changed since, so that resolving
+    again would produce the same lock file.
+
+    Args:
+        resolved_str: The pyproject.toml file the lock file was resolved for
+        pyproject_str: The new pyproject.toml file
+
+    Returns:
+        Whether the content hash was refreshed
+    """
+
+    lock_str = _read_lock()
+    if lock_str is None:
+        return False
+    try:
+        lock = Lock(lock_str)
+    except Exception:
+        return False
+
+    resolved = Pyproject(resolved_str)
+    pyproject = Pyproject(pyproject_str)
+    if lock.content_hash != content_hash(resolved.pyproject["tool"]["poetry"]):
+        # the hash algorithm differs, e.g. with poetry 2, or the lock is stale
+        logging.debug("Lock file isn't fresh, can't refresh its content hash")
+        return False
+
+    table, resolved_table = (
+        x.pyproject["tool"]["poetry"] for x in (pyproject, resolved)
+    )
+    if any(table.get(x) != resolved_table.get(x) for x in ("source", "extras")):
+        return False
+
+    resolved_versions = {
+        (x.group, x.normalized_name): x.version for x in resolved.dependencies
+    }
+    versions = {
+        (x.group, x.normalized_name): x.version for x in pyproject.dependencies
+    }
+    if versions.keys() != resolved_versions.keys():
+        return False
+
+    for (group, name), version in versions.items():
+        resolved_version = resolved_versions[(group, name)]
+        if version == resolved_version:
+            continue
+
+        constraint = version
+        if isinstance(version, dict) and isinstance(resolved_version, dict):
+            # only the version of a dependency may change
+            other, resolved_other = (
+                {k: v for k, v in x.items() if k != "version"}
+                for x in (version, resolved_version)
+            )
+            if other != resolved_other:
+                return False
+            constraint = version.get("version")
+        if not isinstance(constraint, str):
+            return False
+
+        lock_version = lock.version(name)
+        if lock_version is None or not allows(constraint, lock_version):
+            logging.debug(f"Lock version of '{name}' violates '{constraint}'")
+            return False
+
+    new_lock_str = replace_content_hash(
+        lock_str,
+        content_hash(pyproject.pyproject["tool"]["poetry"]),
+    )
+    if new_lock_str is None:
+        return False
+    _write_text("poetry.lock", new_lock_str, lock_str)
+    return True
+
+
+def run(
+    options: Options,
+    report: Optional[Callable[[Decision], None]] = None,
+) -> None:
+    """Update dependencies and bump their version in pyproject.toml file
+
+    The project in the current directory is updated.
+
+    Args:
+        options: The options of the run
+        report: Called with the decision about every dependency as soon as
+            the dependencies are bumped, before the lock file is refreshed
+
+    Raises:
+        CommandError when a poetry command exits with non-zero exit code
+    """
+
+    pyproject_str = _read_pyproject()
+    pyproject = Pyproject(
+        pyproject_str,
+        lock_path=Path("poetry.lock"),
+        poetry=create_poetry(
+            options.backend,
+            options.cache_dir,
+            options.timestamps,
+        ),
+    )
+    pages = _index_pages(pyproject, options)
+
+    state = None
+    if options.skip_unchanged and pages is None:
+        # without index pages new releases can't be detected
+        logging.warning(
+            "--skip-unchanged needs --index-url or --wheelhouse to detect "
+            "new releases, running anyway"
+        )
+    elif options.skip_unchanged:
+        state = State(Path.cwd(), options.cache_dir or default_cache_dir())
+        current = fingerprint(pyproject_str, _read_lock(), options, pages)
+        if state.fingerprint == current:
+            logging.info("Nothing changed since the last run, skipping")
+            return
+
+    bumped_dependencies = pyproject.update_dependencies(
+        options.latest,
+        options.without_constraints,
+        options.names,
+        options.exclude_names,
+        options.groups,
+        latest_versions(pyproject, options, pages),
+        options.single_resolution,
+        options.bisect,
+        options.bisect_workers,
+        options.shard,
+        options.shard_workers,
+    )
+    if report is not None:
+        for decision in decide(
+            pyproject,
+            bumped_dependencies,
+            options.without_constraints,
+            options.names,
+            options.exclude_names,
+            options.groups,
+        ):
+            report(decision)
+
+    resolved_str = Path("pyproject.toml").read_text()
+    pyproject_str = pyproject.dumps()
+    _write_text("pyproject.toml", pyproject_str, resolved_str)
+
+    # refresh the lock file after changes in pyproject.toml, the resolver only
+    # runs if the locked versions no longer satisfy the pyproject
+    with span("lock"):
+        if _refresh_lock(resolved_str, pyproject_str):
+            logging.info("Refreshed lock file content hash")
+        else:
+            pyproject.poetry.lock()
+
+    if state is not None:
+        state.save(
+            fingerprint(
+                Path("pyproject.toml").read_text(),
+                _read_lock(),
+                options,
+                pages,
+            )
+        )
+
+
+def plan(options: Options) -> Plan:
+    """Resolve updates of the project in the current directory into a plan
+
+    The resolution runs poetry without installing the dependencies, which may
+    change the pyproject.toml and poetry.lock files, both are restored
+    afterwards and a poetry.lock file created by the resolution is removed.
+
+    Args:
+        options: The options of the run
+
+    Returns:
+        The plan
+
+    Raises:
+        CommandError when a poetry command exits with non-zero exit code
+    """
+
+    pyproject_str = _read_pyproject()
+    lock_str = _read_lock()
+    pyproject = Pyproject(
+        pyproject_str,
+        lock_path=Path("poetry.lock"),
+        poetry=create_poetry(
+            options.backend,
+            options.cache_dir,
+            options.timestamps,
+        ),
+    )
+    original = original_constraints(pyproject)
+
+    try:
+        pyproject.resolve_dependencies(
+            options.latest,
+            options.without_constraints,
+            options.names,
+            options.exclude_names,
+            options.groups,
+            latest_versions(pyproject, options),
+            options.single_resolution,
+            options.bisect,
+            options.bisect_workers,
+            options.shard,
+            options.shard_workers,
+            lock_only=True,
+        )
+        bumped_dependencies = pyproject.bump_dependencies(
+            options.without_constraints,
+            options.names,
+            options.exclude_names,
+            options.groups,
+        )
+        return create_plan(
+            pyproject,
+            original,
+            bumped_dependencies,
+            hash_text(pyproject_str),
+            hash_text(lock_str),
+        )
+    finally:
+        _write_text(
+            "pyproject.toml",
+            pyproject_str,
+            _read_text("pyproject.toml"),
+        )
+        if lock_str is not None:
+            _write_text("poetry.lock", lock_str, _read_lock())
+        else:
+            # the resolution created a lock file the project didn't have
+            try:
+                Path("poetry.lock").unlink()
+            except FileNotFoundError:
+                pass
+
+
+def apply(plan: Plan, strict: bool = False) -> List[Dependency]:
+    """Apply a plan to the project in the current directory
+
+    The pyproject.toml file is rewritten and the content hash of the planned
+    poetry.lock file is refreshed, the resolver doesn't run.
+
+    Args:
+        plan: The plan to apply
+        strict: Whether the project files must match the hashes in the plan
+
+    Returns:
+        The applied dependencies
+
+    Raises:
+        HashMismatchError when strict and a project file doesn't match
+    """
+
+    pyproject_str = _read_pyproject()
+    lock_str = _read_lock()
+    for path, text, expected in [
+        ("pyproject.toml", pyproject_str, plan.pyproject_hash),
+        ("poetry.lock", lock_str, plan.lock_hash),
+    ]:
+        if hash_text(text) == expected:
+            continue
+        if strict:
+            raise HashMismatchError(path)
+        logging.info(f"'{path}' differs from the planned '{path}'")
+
+    pyproject = Pyproject(pyproject_str)
+    applied = apply_plan(pyproject, plan)
+    logging.info(f"Applied {len(applied)} of {len(plan.updates)} update(s)")
+    new_pyproject_str = pyproject.dumps()
+    _write_text("pyproject.toml", new_pyproject_str, pyproject_str)
+
+    # the planned lock file satisfies the planned constraints, other lock
+    # files are left to poetry
+    if (
+        lock_str is not None
+        and hash_text(lock_str) == plan.lock_hash
+        and _refresh_lock(pyproject_str, new_pyproject_str)
+    ):
+        logging.info("Refreshed lock file content hash")
+    return applied
@@ -0,0 +1,197 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import tomlkit
+
+from poetryup.core.bisection import TrialPoetry, scratch_copy
+from poetryup.core.cmd import CommandError
+from poetryup.core.lock import Lock
+from poetryup.core.trace import span
+from poetryup.models.dependency import normalize_name
+
+
+def balance(components: List[List[str]], shards: int) -> List[List[str]]:
+    """Pack components into at most a given number of shards
+
+    The largest components are packed first, each into the shard with the
+    fewest packages so far.
+
+    Args:
+        components: The packages of each component
+        shards: The maximum number of shards
+
+    Returns:
+        The packages of each non-empty shard
+    """
+
+    bins: List[List[str]] = [[] for _ in range(max(1, shards))]
+    for component in sorted(components, key=len, reverse=True):
+        min(bins, key=len).extend(component)
+    return [x for x in bins if x]
+
+
+def shard_pyproject(pyproject_str: str, names: Set[str]) -> str:
+    """Keep only some of the dependencies of a pyproject
+
+    Dependencies are removed from every group, and from the extras which
+    refer to them, the python dependency and the group tables are kept.
+
+    Args:
+        pyproject_str: The pyproject.toml file parsed as a string
+        names: The normalized names of the dependencies to keep
+
+    Returns:
+        The pyproject.toml file of the shard
+    """
+
+    pyproject = tomlkit.loads(pyproject_str)
+    table = pyproject["tool"]["poetry"]
+
+    tables = [table.get("dependencies", {}), table.get("dev-dependencies", {})]
+    for group in table.get("group", {}).values():
+        tables.append(group.get("dependencies", {}))
+    for dependencies in tables:
+        for name in list(dependencies):
+            if name != "python" and normalize_name(name) not in names:
+                del dependencies[name]
+
+    extras = table.get("extras", {})
+    for extra in list(extras):
+        kept = [x for x in extras[extra] if normalize_name(x) in names]
+        if kept:
+            extras[extra] = kept
+        else:
+            del extras[extra]
+
+    return tomlkit.dumps(pyproject)
+
+
+def merge_locks(lock_strs: List[str]) -> Optional[str]:
+    """Merge the poetry.lock files of shards into one
+
+    Packages locked by several shards must be locked to the same version.
+    The metadata of the first lock file is kept, the content hash is left to
+    be refreshed by poetry.
+
+    Args:
+        lock_strs: The poetry.lock files of the shards
+
+    Returns:
+        The merged poetry.lock file, None if shards locked a package to
+        different versions
+    """
+
+    packages: Dict[str, List[Dict]] = {}
+    versions: Dict[str, Set[str]] = {}
+    files: Dict[str, List] = {}
+    metadata = None
+    for lock_str in lock_strs:
+        lock = tomlkit.loads(lock_str).unwrap()
+        if metadata is None:
+            metadata = lock.get("metadata", {})
+
+        shard_packages: Dict[str, List[Dict]] = {}
+        for package in lock.get("package", []):
+            name = normalize_name(package["name"])
+            shard_packages.setdefault(name, []).append(package)
+        for name, entries in shard_packages.items():
+            shard_versions = {x["version"] for x in entries}
+            if name in versions and versions[name] != shard_versions:
+                logging.debug(f"Shards locked '{name}' to different versions")
+                return None
+            versions[name] = shard_versions
+            packages[name] = entries
+        files.update(lock.get("metadata", {}).get("files", {}))
+
+    metadata = dict(metadata or {})
+    if "files" in metadata:
+        # lock files before poetry 1.5 list the files of packages separately
+        metadata["files"] = dict(sorted(files.items()))
+    return tomlkit.dumps(
+        {
+            "package": [
+                x for _, entries in sorted(packages.items()) for x in entries
+            ],
+            "metadata": metadata,
+        }
+    )
+
+
+def lock_shards(
+    project: Path,
+    pyproject_str: str,
+    shards: List[List[str]],
+    cache_dir: Optional[Path] = None,
+) -> Optional[List[str]]:
+    """Lock each shard of a project in a scratch directory of its own
+
+    Shards are locked in parallel, each with poetry update of the shard's
+    dependencies only.
+
+    Args:
+        project: The directory of the project
+        pyproject_str: The pyproject.toml file of the project
+        shards: The normalized names of the dependencies of each shard
+        cache_dir: A directory to persist the probed poetry version in
+
+    Returns:
+        The poetry.lock file of each shard, None if any shard failed to lock
+    """
+
+    def lock_shard(names: List[str]) -> Optional[str]:
+        with span("shard", packages=len(names)):
+            with scratch_copy(project) as path:
+                (path / "pyproject.toml").write_text(
+                    shard_pyproject(pyproject_str, set(names))
+                )
+                try:
+                    TrialPoetry(path, cache_dir).update(lock_only=True)
+                except CommandError as e:
+                    logging.debug(f"Shard of {names} failed to lock: {e}")
+                    return None
+                return (path / "poetry.lock").read_text()
+
+    with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+        lock_strs = list(executor.map(lock_shard, shards))
+    if any(x is None for x in lock_strs):
+        return None
+    return lock_strs
+
+
+def verify_lock(
+    project: Path,
+    lock_str: str,
+    cache_dir: Optional[Path] = None,
+) -> Optional[str]:
+    """Verify a merged poetry.lock file against the whole project
+
+    Poetry locks the project in a scratch directory without updating the
+    merged versions, which only passes if they satisfy the project as a
+    whole.
+
+    Args:
+        project: The directory of the project
+        lock_str: The merged poetry.lock file
+        cache_dir: A directory to persist the probed poetry version in
+
+    Returns:
+        The poetry.lock file written by poetry, None if the merged versions
+        don't resolve the project or poetry changed any of them
+    """
+
+    with span("verify shards"):
+        with scratch_copy(project) as path:
+            (path / "poetry.lock").write_text(lock_str)
+            try:
+                TrialPoetry(path, cache_dir).lock()
+            except CommandError as e:
+                logging.debug(f"Merged lock file failed to verify: {e}")
+                return None
+            verified_str = (path / "poetry.lock").read_text()
+
+    if Lock(verified_str).versions != Lock(lock_str).versions:
+        logging.debug("Poetry changed the versions of the merged lock file")
+        return None
+    return verified_str
@@ -0,0 +1,107 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from poetryup.core.index import ProjectPage
+from poetryup.models.options import Options
+
+
+def default_cache_dir() -> Path:
+    """Return the default cache directory of poetryup"""
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(cache_home) / "poetryup"
+
+
+def fingerprint(
+    pyproject_str: str,
+    lock_str: Optional[str],
+    options: Options,
+    pages: Optional[Dict[str, ProjectPage]] = None,
+) -> str:
+    """Fingerprint everything that decides the outcome of a run
+
+    Args:
+        pyproject_str: The pyproject.toml file parsed as a string
+        lock_str: The poetry.lock file parsed as a string, if any
+        options: The options of the run
+        pages: The index pages of the selected dependencies, if known
+
+    Returns:
+        The sha256 hash of the inputs
+    """
+
+    inputs = {
+        "pyproject": hashlib.sha256(pyproject_str.encode()).hexdigest(),
+        "lock": (
+            hashlib.sha256(lock_str.encode()).hexdigest()
+            if lock_str is not None
+            else None
+        ),
+        "options": {
+            "latest": options.latest,
+            "without_constraints": sorted(
+                x.value for x in options.without_constraints
+            ),
+            "names": sorted(options.names),
+            "exclude_names": sorted(options.exclude_names),
+            "groups": sorted(options.groups),
+            "index_url": options.index_url,
+            "wheelhouse": (
+                str(options.wheelhouse.resolve())
+                if options.wheelhouse is not None
+                else None
+            ),
+        },
+        "index": (
+            {name: page.versions for name, page in sorted(pages.items())}
+            if pages is not None
+            else None
+        ),
+    }
+    return hashlib.sha256(
+        json.dumps(inputs, sort_keys=True).encode()
+    ).hexdigest()
+
+
+class State:
+    """A class to represent the state record of a project
+
+    The record holds the fingerprint of the last run, a run with the same
+    fingerprint can't change anything.
+
+    Args:
+        project: The directory of the project
+        cache_dir: The directory to keep the record in
+    """
+
+    def __init__(self, project: Path, cache_dir: Path) -> None:
+        digest = hashlib.sha256(str(project.resolve()).encode()).hexdigest()
+        self.path = cache_dir / "state" / f"{digest}.json"
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """The fingerprint of the last run, None if there is none"""
+
+        try:
+            return json.loads(self.path.read_text()).get("fingerprint")
+        except (OSError, ValueError):
+            return None
+
+    def save(self, fingerprint: str) -> None:
+        """Save the fingerprint of a run, failures are ignored
+
+        Args:
+            fingerprint: The fingerprint of the run
+        """
+
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}")
+            tmp_path.write_text(json.dumps({"fingerprint": fingerprint}))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logging.debug(f"Couldn't write state record '{self.path}'")
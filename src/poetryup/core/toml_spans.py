@@ -0,0 +1,176 @@
+import re
+from typing import Dict, List, Optional, Tuple
+
+# the span of a value in the source text, the end is exclusive
+Span = Tuple[int, int]
+
+_BARE_KEY = re.compile(r"[A-Za-z0-9_-]+")
+_BASIC_STRING = re.compile(r'"(?:[^"\\\n]|\\.)*"')
+_LITERAL_STRING = re.compile(r"'[^'\n]*'")
+_WHITESPACE = re.compile(r"[ \t]*")
+_SCALAR = re.compile(r"[^\s#,\]}]+")
+# the tokens which matter for finding the end of arrays and inline tables
+_NESTED_TOKEN = re.compile(
+    r'"""|\'\'\'|"(?:[^"\\\n]|\\.)*"|\'[^\'\n]*\'|#[^\n]*|[\[\]{}]'
+)
+_LINE_END = re.compile(r"[ \t]*(?:#[^\n]*)?(?:\r?\n|$)")
+# a line with a bare key and a string value, which most lines of a pyproject
+# are, is matched at once
+_SIMPLE_LINE = re.compile(
+    r'[ \t]*([A-Za-z0-9_-]+)[ \t]*=[ \t]*("(?:[^"\\\n]|\\.)*"|\'[^\'\n]*\')'
+    r"[ \t]*(?:#[^\n]*)?(?:\r?\n|$)"
+)
+
+
+class _ScanError(Exception):
+    """Raised when the text uses syntax the scanner doesn't support"""
+
+
+def _char(text: str, i: int) -> str:
+    """Return the character at an index, empty at the end of the text"""
+
+    return text[i] if i < len(text) else ""
+
+
+def _scan_key(text: str, i: int) -> Tuple[List[str], int]:
+    """Scan a dotted key, return its parts and the index after it"""
+
+    parts: List[str] = []
+    while True:
+        i = _WHITESPACE.match(text, i).end()
+        match = (
+            _BARE_KEY.match(text, i)
+            or _BASIC_STRING.match(text, i)
+            or _LITERAL_STRING.match(text, i)
+        )
+        if match is None:
+            raise _ScanError(f"Expected a key at {i}")
+        part = match.group()
+        if part[0] in "\"'":
+            if "\\" in part:
+                # escaped keys aren't worth decoding here
+                raise _ScanError(f"Unsupported escaped key at {i}")
+            part = part[1:-1]
+        parts.append(part)
+
+        i = _WHITESPACE.match(text, match.end()).end()
+        if _char(text, i) != ".":
+            return parts, i
+        i += 1
+
+
+def _scan_value(text: str, i: int) -> int:
+    """Scan a value, return the index after it"""
+
+    if text.startswith(('"""', "'''"), i):
+        raise _ScanError(f"Unsupported multi-line string at {i}")
+
+    match = _BASIC_STRING.match(text, i) or _LITERAL_STRING.match(text, i)
+    if match is not None:
+        return match.end()
+
+    if _char(text, i) in ("[", "{"):
+        depth = 0
+        for token in _NESTED_TOKEN.finditer(text, i):
+            value = token.group()
+            if value in ('"""', "'''"):
+                raise _ScanError(f"Unsupported multi-line string at {i}")
+            if value in ("[", "{"):
+                depth += 1
+            elif value in ("]", "}"):
+                depth -= 1
+                if depth == 0:
+                    return token.end()
+        raise _ScanError(f"Unterminated value at {i}")
+
+    match = _SCALAR.match(text, i)
+    if match is None:
+        raise _ScanError(f"Expected a value at {i}")
+    return match.end()
+
+
+def scan_value_spans(text: str) -> Optional[Dict[Tuple[str, ...], Span]]:
+    """Find the source spans of the values in a TOML document
+
+    Values are indexed by their full key, e.g. the value of 'foo' in the
+    '[tool.poetry.dependencies]' table by
+    ('tool', 'poetry', 'dependencies', 'foo'). Values in arrays of tables are
+    left out.
+
+    Args:
+        text: The TOML document
+
+    Returns:
+        The spans indexed by key, None if the document uses syntax which
+        isn't supported, e.g. multi-line strings
+    """
+
+    spans: Dict[Tuple[str, ...], Span] = {}
+    table: Optional[Tuple[str, ...]] = ()
+    i, length = 0, len(text)
+    try:
+        while i < length:
+            match = _SIMPLE_LINE.match(text, i)
+            if match is not None:
+                if table is not None:
+                    spans[(*table, match.group(1))] = match.span(2)
+                i = match.end()
+                continue
+
+            i = _WHITESPACE.match(text, i).end()
+            char = _char(text, i)
+            if char in ("", "\r", "\n", "#"):
+                i = text.find("\n", i)
+                i = length if i == -1 else i + 1
+                continue
+
+            if char == "[":
+                if text.startswith("[[", i):
+                    parts, i = _scan_key(text, i + 2)
+                    table = None  # keys of arrays of tables are ambiguous
+                    closing = "]]"
+                else:
+                    parts, i = _scan_key(text, i + 1)
+                    table = tuple(parts)
+                    closing = "]"
+                if not text.startswith(closing, i):
+                    raise _ScanError(f"Expected '{closing}' at {i}")
+                i += len(closing)
+            else:
+                parts, i = _scan_key(text, i)
+                if _char(text, i) != "=":
+                    raise _ScanError(f"Expected '=' at {i}")
+                start = _WHITESPACE.match(text, i + 1).end()
+                i = _scan_value(text, start)
+                if table is not None:
+                    spans[(*table, *parts)] = (start, i)
+
+            match = _LINE_END.match(text, i)
+            if match is None:
+                raise _ScanError(f"Expected end of line at {i}")
+            i = match.end()
+    except _ScanError:
+        return None
+    return spans
+
+
+def splice(text: str, edits: List[Tuple[Span, str]]) -> str:
+    """Replace spans of a text
+
+    Args:
+        text: The text
+        edits: The spans to replace with their replacement, spans must not
+            overlap
+
+    Returns:
+        The text with the spans replaced
+    """
+
+    chunks: List[str] = []
+    position = 0
+    for (start, end), replacement in sorted(edits):
+        chunks.append(text[position:start])
+        chunks.append(replacement)
+        position = end
+    chunks.append(text[position:])
+    return "".join(chunks)
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import resource
+except ImportError:  # not available on windows
+    resource = None
+
+
+@dataclass
+class Span:
+    """A class to represent a timed span of a run
+
+    Args:
+        name: The name of the span
+        start: The start time in seconds, relative to the tracer origin
+        depth: The nesting depth of the span
+        wall: The wall time in seconds
+        cpu: The CPU time of the current process in seconds
+        child_cpu: The CPU time of child processes, e.g. poetry, in seconds
+        args: Additional details of the span
+    """
+
+    name: str
+    start: float
+    depth: int
+    wall: float = 0.0
+    cpu: float = 0.0
+    child_cpu: float = 0.0
+    args: Dict[str, str] = field(default_factory=dict)
+
+
+def _child_cpu() -> float:
+    """Return the CPU time used by terminated child processes"""
+
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Tracer:
+    """A class to record the spans of a run
+
+    Spans are only recorded once the tracer is enabled, which keeps the
+    instrumentation free otherwise.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: List[Span] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+
+    @contextmanager
+    def span(self, name: str, **args: str) -> Iterator[None]:
+        """Record a span around a block of code
+
+        Args:
+            name: The name of the span
+            args: Additional details of the span
+        """
+
+        if not self.enabled:
+            yield
+            return
+
+        depth = getattr(self._local, "depth", 0)
+        span = Span(
+            name=name,
+            start=time.perf_counter() - self._origin,
+            depth=depth,
+            args=args,
+        )
+        self.spans.append(span)
+
+        cpu, child_cpu = time.process_time(), _child_cpu()
+        self._local.depth = depth + 1
+        try:
+            yield
+        finally:
+            self._local.depth = depth
+            span.wall = time.perf_counter() - self._origin - span.start
+            span.cpu = time.process_time() - cpu
+            span.child_cpu = _child_cpu() - child_cpu
+
+    def table(self) -> str:
+        """Format the recorded spans as a table"""
+
+        rows: List[Tuple[str, ...]] = [("SPAN", "WALL", "CPU", "CHILD CPU")]
+        for span in self.spans:
+            rows.append(
+                (
+                    "  " * span.depth + span.name,
+                    f"{span.wall:.3f}s",
+                    f"{span.cpu:.3f}s",
+                    f"{span.child_cpu:.3f}s",
+                )
+            )
+
+        width = max(len(row[0]) for row in rows)
+        return "\n".join(
+            row[0].ljust(width) + "".join(x.rjust(11) for x in row[1:])
+            for row in rows
+        )
+
+    def trace_events(self) -> Dict:
+        """Export the recorded spans in the trace event format
+
+        The format is understood by trace viewers such as chrome://tracing
+        and Perfetto.
+        https://docs.google.com/document/d/1CvAClvFfyA5R-PhYUmn5OOQtYMH4h6I0nSsKchNAySU
+        """
+
+        events = []
+        for span in self.spans:
+            events.append(
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": round(span.start * 1e6),
+                    "dur": round(span.wall * 1e6),
+                    "pid": os.getpid(),
+                    "tid": 0,
+                    "args": {
+                        **span.args,
+                        "cpu": round(span.cpu, 6),
+                        "child_cpu": round(span.child_cpu, 6),
+                    },
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def dumps(self) -> str:
+        """Dumps the trace events into a JSON string."""
+
+        return json.dumps(self.trace_events())
+
+
+# the tracer of the current process
+tracer = Tracer()
+
+
+def span(name: str, **args: str):
+    """Record a span around a block of code with the process tracer
+
+    Args:
+        name: The name of the span
+        args: Additional details of the span
+    """
+
+    return tracer.span(name, **args)
@@ -0,0 +1,127 @@
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Dict, List
+
+from poetryup.models.dependency import normalize_name
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS latest (
+    index_url TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (index_url, name)
+)
+"""
+
+
+class VersionCache:
+    """A class to represent a persistent cache of latest versions
+
+    Latest versions are cached by index URL and normalized package name in a
+    SQLite database, which can be shared by concurrent processes. Entries
+    expire after a TTL, the least recently used entries are evicted once the
+    cache holds more than max_entries entries. Failures to use the database
+    are logged and treated as cache misses.
+
+    Args:
+        path: The path of the database file
+        ttl: The number of seconds entries stay fresh, 0 disables the cache
+        max_entries: The maximum number of entries to keep
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        ttl: float = 3600.0,
+        max_entries: int = 10000,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # wait for concurrent writers instead of failing right away
+        connection = sqlite3.connect(str(self.path), timeout=30.0)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            # e.g. on file systems without shared memory support
+            pass
+        connection.execute(SCHEMA)
+        return connection
+
+    def get(self, index_url: str, names: List[str]) -> Dict[str, str]:
+        """Return the fresh latest versions of packages
+
+        Args:
+            index_url: The index the versions were looked up in
+            names: The names of the packages
+
+        Returns:
+            The latest versions indexed by normalized name, packages without
+            a fresh entry are left out
+        """
+
+        if self.ttl <= 0 or not names:
+            return {}
+
+        now = time.time()
+        normalized_names = sorted({normalize_name(x) for x in names})
+        placeholders = ",".join("?" * len(normalized_names))
+        try:
+            with closing(self._connect()) as connection, connection:
+                rows = connection.execute(
+                    "SELECT name, version FROM latest "
+                    f"WHERE index_url = ? AND name IN ({placeholders}) "
+                    "AND fetched_at > ?",
+                    [index_url, *normalized_names, now - self.ttl],
+                ).fetchall()
+                connection.executemany(
+                    "UPDATE latest SET accessed_at = ? "
+                    "WHERE index_url = ? AND name = ?",
+                    [(now, index_url, name) for name, _ in rows],
+                )
+        except (OSError, sqlite3.Error) as e:
+            logging.debug(f"Couldn't read version cache '{self.path}': {e}")
+            return {}
+
+        logging.debug(f"Found {len(rows)} latest version(s) in version cache")
+        return dict(rows)
+
+    def put(self, index_url: str, versions: Dict[str, str]) -> None:
+        """Store latest versions and evict the least recently used entries
+
+        Args:
+            index_url: The index the versions were looked up in
+            versions: The latest versions indexed by package name
+        """
+
+        if self.ttl <= 0 or not versions:
+            return
+
+        now = time.time()
+        try:
+            with closing(self._connect()) as connection, connection:
+                connection.executemany(
+                    "INSERT OR REPLACE INTO latest "
+                    "(index_url, name, version, fetched_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (index_url, normalize_name(name), version, now, now)
+                        for name, version in versions.items()
+                    ],
+                )
+                connection.execute(
+                    "DELETE FROM latest WHERE rowid IN ("
+                    "SELECT rowid FROM latest ORDER BY accessed_at DESC "
+                    "LIMIT -1 OFFSET ?)",
+                    [self.max_entries],
+                )
+        except (OSError, sqlite3.Error) as e:
+            logging.debug(f"Couldn't write version cache '{self.path}': {e}")
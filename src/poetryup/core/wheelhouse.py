@@ -0,0 +1,244 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+from poetryup.core.index import (
+    ProjectPage,
+    distribution_from_filename,
+    parse_project_page,
+)
+from poetryup.models.dependency import normalize_name
+
+# the project pages of a file-based simple index, e.g. 'simple/foo/index.html'
+INDEX_PAGES = {"index.html": "text/html", "index.json": "application/json"}
+
+# version of the on-disk index format, indexes of other versions are rebuilt
+FORMAT = 1
+
+# directories modified this recently are listed again on the next refresh,
+# files may still arrive within the resolution of their modification time
+RACY_SECONDS = 2.0
+
+
+class Wheelhouse:
+    """A class to represent a local directory of distributions
+
+    The directory may hold wheels and sdists, in any layout, or be a
+    file-based simple index with a project page per project, e.g.
+    'foo/index.html'. The available versions are looked up in an on-disk
+    index, which is refreshed incrementally: only directories whose
+    modification time changed since the last refresh are listed again, and
+    project pages are only parsed again if they changed.
+
+    Args:
+        path: The directory of distributions
+        cache_dir: A directory to keep the on-disk index in, the directory is
+            indexed from scratch on every refresh if not provided
+    """
+
+    def __init__(self, path: Path, cache_dir: Optional[Path] = None) -> None:
+        self.path = path
+        self.cache_dir = cache_dir
+        self.directories_listed = 0  # number of directories listed ever
+        self._versions: Optional[Dict[str, Set[str]]] = None
+
+    @property
+    def index_path(self) -> Optional[Path]:
+        """The path of the on-disk index"""
+
+        if self.cache_dir is None:
+            return None
+        resolved = str(self.path.resolve())
+        digest = hashlib.sha256(resolved.encode()).hexdigest()
+        return self.cache_dir / "wheelhouse" / f"{digest}.json"
+
+    def refresh(self) -> Dict[str, Set[str]]:
+        """Refresh the on-disk index from the directory
+
+        Returns:
+            The available versions indexed by normalized name
+        """
+
+        index = self._read_index()
+        directories: Dict[str, Dict] = {}
+        now = time.time()
+
+        pending = [""]
+        while pending:
+            relative = pending.pop()
+            directory = self.path / relative
+            try:
+                mtime_ns = directory.stat().st_mtime_ns
+            except OSError as e:
+                logging.warning(f"Couldn't read wheelhouse '{directory}': {e}")
+                continue
+
+            entry = index.get(relative)
+            if entry is None or entry["mtime_ns"] != mtime_ns:
+                try:
+                    entry = self._list(directory, mtime_ns, now, entry)
+                except OSError as e:
+                    logging.warning(
+                        f"Couldn't read wheelhouse '{directory}': {e}"
+                    )
+                    continue
+            else:
+                entry = self._refresh_pages(directory, entry)
+            directories[relative] = entry
+            pending.extend(
+                os.path.join(relative, x) for x in entry["directories"]
+            )
+
+        if directories != index:
+            self._write_index(directories)
+
+        versions: Dict[str, Set[str]] = {}
+        for entry in directories.values():
+            for name, version in entry["distributions"].values():
+                versions.setdefault(name, set()).add(version)
+            for page in entry["pages"].values():
+                versions.setdefault(page["name"], set()).update(
+                    page["versions"]
+                )
+        self._versions = versions
+        return versions
+
+    def pages(self, names: List[str]) -> Dict[str, ProjectPage]:
+        """Return the project pages of packages
+
+        The on-disk index is refreshed once per instance.
+
+        Args:
+            names: The names of the packages
+
+        Returns:
+            The project pages indexed by normalized name, packages without
+            any distribution are left out
+        """
+
+        versions = self._versions
+        if versions is None:
+            versions = self.refresh()
+
+        pages = {}
+        for name in {normalize_name(x) for x in names}:
+            if name in versions:
+                pages[name] = ProjectPage(
+                    name=name,
+                    versions=sorted(versions[name]),
+                )
+        return pages
+
+    def _list(
+        self,
+        directory: Path,
+        mtime_ns: int,
+        now: float,
+        previous: Optional[Dict],
+    ) -> Dict:
+        """Index the contents of a directory"""
+
+        self.directories_listed += 1
+        entry: Dict = {
+            # a directory modified this recently may change again within the
+            # resolution of its modification time, thus it's listed again
+            "mtime_ns": (
+                mtime_ns if now - mtime_ns / 1e9 >= RACY_SECONDS else None
+            ),
+            "directories": [],
+            "distributions": {},
+            "pages": {},
+        }
+        previous_pages = previous["pages"] if previous is not None else {}
+        with os.scandir(directory) as entries:
+            for x in entries:
+                if x.is_dir(follow_symlinks=False):
+                    entry["directories"].append(x.name)
+                elif x.name in INDEX_PAGES:
+                    if directory != self.path:
+                        entry["pages"][x.name] = self._parse_page(
+                            directory,
+                            x.name,
+                            previous_pages.get(x.name),
+                        )
+                else:
+                    distribution = distribution_from_filename(x.name)
+                    if distribution is not None:
+                        name, version = distribution
+                        entry["distributions"][x.name] = [
+                            normalize_name(name),
+                            version,
+                        ]
+        entry["directories"].sort()
+        return entry
+
+    def _refresh_pages(self, directory: Path, entry: Dict) -> Dict:
+        """Parse the changed project pages of an unchanged directory"""
+
+        pages = {
+            name: self._parse_page(directory, name, page)
+            for name, page in entry["pages"].items()
+        }
+        return {**entry, "pages": pages} if pages != entry["pages"] else entry
+
+    def _parse_page(
+        self,
+        directory: Path,
+        filename: str,
+        previous: Optional[Dict],
+    ) -> Dict:
+        """Parse the versions of a project page, unless it's unchanged"""
+
+        path = directory / filename
+        try:
+            stat = path.stat()
+            if previous is not None and previous.get("stat") == [
+                stat.st_mtime_ns,
+                stat.st_size,
+            ]:
+                return previous
+            versions = parse_project_page(
+                INDEX_PAGES[filename],
+                path.read_bytes(),
+            )
+        except (OSError, ValueError) as e:
+            logging.warning(f"Couldn't read project page '{path}': {e}")
+            return {"name": normalize_name(directory.name), "versions": []}
+
+        return {
+            "name": normalize_name(directory.name),
+            "versions": versions,
+            "stat": [stat.st_mtime_ns, stat.st_size],
+        }
+
+    def _read_index(self) -> Dict[str, Dict]:
+        path = self.index_path
+        if path is None:
+            return {}
+        try:
+            index = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if index.get("format") != FORMAT:
+            return {}
+        return index.get("directories", {})
+
+    def _write_index(self, directories: Dict[str, Dict]) -> None:
+        path = self.index_path
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # write to a temporary file first so that concurrent runs never
+            # read a partially written index
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(
+                json.dumps({"format": FORMAT, "directories": directories})
+            )
+            os.replace(tmp_path, path)
+        except OSError:
+            logging.debug(f"Couldn't write wheelhouse index '{path}'")
@@ -0,0 +1,306 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set
+
+import tomlkit
+
+from poetryup.core.cmd import CommandError
+from poetryup.core.report import Decision
+from poetryup.core.runner import run
+from poetryup.models.options import Options
+
+# directories which never contain workspace projects
+IGNORED_DIRS = {".git", ".hg", ".tox", ".venv", "node_modules", "__pycache__"}
+
+
+class CycleError(Exception):
+    def __init__(self, projects: List[Path]) -> None:
+        self.projects = projects
+        super().__init__(
+            "Path dependencies form a cycle between projects "
+            f"{', '.join(str(x) for x in projects)}"
+        )
+
+
+class InvalidProjectError(Exception):
+    def __init__(self, project: Path, message: str) -> None:
+        self.project = project
+        super().__init__(f"Couldn't read project '{project}': {message}")
+
+
+@dataclass(frozen=True)
+class ProjectResult:
+    """A class to represent the result of updating a workspace project
+
+    Args:
+        path: The directory of the project
+        status: One of 'updated', 'failed' or 'skipped'
+        return_code: The exit code of the failed poetry command, if any
+        duration: The time spent updating the project in seconds
+        message: Why the project failed or was skipped
+        decisions: The decisions about the dependencies of the project, if
+            they were reported
+    """
+
+    path: Path
+    status: str
+    return_code: int = 0
+    duration: float = 0.0
+    message: str = ""
+    decisions: List[Decision] = field(default_factory=list)
+
+
+def discover_projects(root: Path) -> List[Path]:
+    """Discover the poetry projects below a root directory
+
+    Args:
+        root: The directory to search in
+
+    Returns:
+        The sorted directories of the discovered projects
+
+    Raises:
+        InvalidProjectError when a pyproject.toml file can't be parsed
+    """
+
+    projects: List[Path] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        # prune ignored and hidden directories in-place
+        dirnames[:] = [
+            x for x in dirnames if x not in IGNORED_DIRS and x[:1] != "."
+        ]
+        if "pyproject.toml" not in filenames:
+            continue
+
+        path = Path(dirpath, "pyproject.toml")
+        try:
+            pyproject = tomlkit.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            raise InvalidProjectError(Path(dirpath).resolve(), str(e))
+        if "poetry" in pyproject.get("tool", {}):
+            projects.append(Path(dirpath).resolve())
+
+    return sorted(projects)
+
+
+def path_dependencies(project: Path) -> Set[Path]:
+    """Return the directories a project depends on through path dependencies
+
+    Args:
+        project: The directory of the project
+
+    Returns:
+        The resolved directories of the path dependencies
+    """
+
+    pyproject = tomlkit.loads((project / "pyproject.toml").read_text())
+    table = pyproject["tool"]["poetry"]
+
+    tables = [table.get("dependencies", {}), table.get("dev-dependencies", {})]
+    for group in table.get("group", {}).values():
+        tables.append(group.get("dependencies", {}))
+
+    paths: Set[Path] = set()
+    for dependencies in tables:
+        for version in dependencies.values():
+            versions = version if isinstance(version, list) else [version]
+            for version in versions:
+                if isinstance(version, dict) and "path" in version:
+                    paths.add((project / version["path"]).resolve())
+
+    return paths
+
+
+def order_projects(projects: List[Path]) -> List[List[Path]]:
+    """Order projects topologically by their path dependencies
+
+    Projects are grouped into levels, a project only depends on projects in
+    previous levels, thus projects within a level are independent of each
+    other. Path dependencies outside of the given projects are ignored.
+
+    Args:
+        projects: The directories of the projects
+
+    Returns:
+        The projects grouped into levels
+
+    Raises:
+        CycleError when path dependencies form a cycle
+    """
+
+    dependencies: Dict[Path, Set[Path]] = {
+        project: path_dependencies(project) & set(projects)
+        for project in projects
+    }
+
+    levels: List[List[Path]] = []
+    done: Set[Path] = set()
+    while len(done) < len(projects):
+        level = sorted(
+            project
+            for project, deps in dependencies.items()
+            if project not in done and deps <= done
+        )
+        if not level:
+            raise CycleError(sorted(set(projects) - done))
+        levels.append(level)
+        done.update(level)
+
+    return levels
+
+
+def _run_project(
+    project: Path,
+    options: Options,
+    report: bool = False,
+) -> ProjectResult:
+    """Update a single project, runs in a worker process
+
+    Decisions are collected in the result when reported, as the report can't
+    be written to from worker processes.
+    """
+
+    start = time.perf_counter()
+    decisions: List[Decision] = []
+    os.chdir(project)
+    try:
+        run(options, decisions.append if report else None)
+    except CommandError as e:
+        return ProjectResult(
+            path=project,
+            status="failed",
+            return_code=e.return_code,
+            duration=time.perf_counter() - start,
+            message=f"Command '{e.cmd}' failed",
+            decisions=decisions,
+        )
+    except Exception as e:
+        return ProjectResult(
+            path=project,
+            status="failed",
+            return_code=1,
+            duration=time.perf_counter() - start,
+            message=str(e),
+            decisions=decisions,
+        )
+    return ProjectResult(
+        path=project,
+        status="updated",
+        duration=time.perf_counter() - start,
+        decisions=decisions,
+    )
+
+
+def update_workspace(
+    root: Path,
+    options: Options,
+    max_workers: Optional[int] = None,
+    report: Optional[Callable[[Decision], None]] = None,
+) -> List[ProjectResult]:
+    """Update every poetry project of a workspace
+
+    Projects are updated after the projects they depend on, independent
+    projects are updated in parallel. Projects whose path dependencies failed
+    to update are skipped.
+
+    Args:
+        root: The root directory of the workspace
+        options: The options of the run, applied to every project
+        max_workers: The maximum number of projects to update in parallel
+        report: Called with the decisions about the dependencies of each
+            project as soon as the project is done
+
+    Returns:
+        The results of the projects, in update order
+
+    Raises:
+        InvalidProjectError when a pyproject.toml file can't be parsed
+        CycleError when path dependencies form a cycle
+    """
+
+    # projects run in their own directory, relative paths are resolved
+    # against the directory the workspace is updated from
+    options = replace(
+        options,
+        wheelhouse=(
+            options.wheelhouse.resolve()
+            if options.wheelhouse is not None
+            else None
+        ),
+        cache_dir=(
+            options.cache_dir.resolve()
+            if options.cache_dir is not None
+            else None
+        ),
+    )
+    projects = discover_projects(root)
+    levels = order_projects(projects)
+    logging.info(
+        f"Updating {len(projects)} project(s) in {len(levels)} level(s)"
+    )
+
+    results: Dict[Path, ProjectResult] = {}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for level in levels:
+            futures = {}
+            for project in level:
+                failed = [
+                    x
+                    for x in path_dependencies(project)
+                    if x in results and results[x].status != "updated"
+                ]
+                if failed:
+                    message = f"Dependency '{failed[0].name}' wasn't updated"
+                    results[project] = ProjectResult(
+                        path=project,
+                        status="skipped",
+                        message=message,
+                    )
+                    continue
+                futures[project] = executor.submit(
+                    _run_project,
+                    project,
+                    options,
+                    report is not None,
+                )
+            # report projects in completion order, a slow project doesn't
+            # hold back the records of the others
+            done = {v: k for k, v in futures.items()}
+            for future in as_completed(done):
+                results[done[future]] = future.result()
+                if report is not None:
+                    for decision in results[done[future]].decisions:
+                        report(decision)
+
+    return [results[x] for level in levels for x in level]
+
+
+def summarize(results: List[ProjectResult], root: Path) -> str:
+    """Summarize workspace results as a table
+
+    Args:
+        results: The results of the projects
+        root: The root directory of the workspace, paths are shown relative
+
+    Returns:
+        The summary table
+    """
+
+    rows = [("PROJECT", "STATUS", "TIME", "MESSAGE")]
+    for result in results:
+        path = os.path.relpath(result.path, root.resolve())
+        rows.append(
+            (path, result.status, f"{result.duration:.1f}s", result.message)
+        )
+
+    widths = [max(len(row[i]) for row in rows) for i in range(3)]
+    return "\n".join(
+        "  ".join(
+            [*(row[i].ljust(widths[i]) for i in range(3)), row[3]]
+        ).rstrip()
+        for row in rows
+    )
@@ -1,14 +1,18 @@
 #!/usr/bin/env python
 
 import logging
+from contextlib import ExitStack
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
 import typer
 
-from poetryup.core.cmd import CommandError, cmd_run
-from poetryup.core.pyproject import Pyproject
+from poetryup.core.poetry import Backend
 from poetryup.models.dependency import Constraint
+from poetryup.models.options import Options
+
+# modules which import tomlkit, packaging, asyncio or sqlite3 are imported by
+# the commands which need them, so that e.g. '--help' starts fast
 
 app = typer.Typer(add_completion=False)
 
@@ -22,8 +26,35 @@ def setup_logging(verbosity):
     logging.basicConfig(level=level)
 
 
-@app.command(deprecated=True)
+def setup_tracing(
+    ctx: typer.Context,
+    timings: bool,
+    trace: Optional[Path],
+) -> None:
+    """Record spans until the command finishes, then report them"""
+
+    if not timings and trace is None:
+        return
+
+    from poetryup.core.trace import span, tracer
+
+    tracer.enabled = True
+    stack = ExitStack()
+    stack.enter_context(span("poetryup"))
+
+    def report() -> None:
+        stack.close()
+        if timings:
+            typer.echo(tracer.table(), err=True)
+        if trace is not None:
+            trace.write_text(tracer.dumps())
+
+    ctx.call_on_close(report)
+
+
+@app.callback(invoke_without_command=True, deprecated=True)
 def poetryup(
+    ctx: typer.Context,
     latest: bool = typer.Option(
         default=False,
         help="Whether to update dependencies to their latest version.",
@@ -34,16 +65,130 @@ def poetryup(
     ),
     name: List[str] = typer.Option(
         default=[],
-        help="The dependency names to include.",
+        help=(
+            "The dependency names to include, glob patterns such as "
+            "'types-*' and regular expressions prefixed with 're:' match "
+            "several names."
+        ),
     ),
     exclude_name: List[str] = typer.Option(
         default=[],
-        help="The dependency names to exclude.",
+        help="The dependency names or name patterns to exclude.",
     ),
     group: List[str] = typer.Option(
         default=[],
         help="The dependency groups to include.",
     ),
+    backend: Backend = typer.Option(
+        default=Backend.SUBPROCESS,
+        help="How to run poetry, in-process requires poetry to be importable.",
+    ),
+    workspace: bool = typer.Option(
+        default=False,
+        help="Whether to update every poetry project below current directory.",
+    ),
+    workers: Optional[int] = typer.Option(
+        default=None,
+        min=1,
+        help="The maximum number of workspace projects to update in parallel.",
+    ),
+    index_url: Optional[str] = typer.Option(
+        default=None,
+        envvar="POETRYUP_INDEX_URL",
+        help="A simple index to look up latest versions in concurrently.",
+    ),
+    wheelhouse: Optional[Path] = typer.Option(
+        default=None,
+        exists=True,
+        file_okay=False,
+        envvar="POETRYUP_WHEELHOUSE",
+        help=(
+            "A local directory of wheels and sdists, or a file-based simple "
+            "index, to look up latest versions in without network access."
+        ),
+    ),
+    single_resolution: bool = typer.Option(
+        default=False,
+        help=(
+            "Whether to update the dependencies of every group to their "
+            "latest version with a single resolution, instead of one "
+            "resolution per group."
+        ),
+    ),
+    bisect: bool = typer.Option(
+        default=False,
+        help=(
+            "Whether to bisect a group which fails to update to its latest "
+            "versions for the packages blocking it, then update the others."
+        ),
+    ),
+    bisect_workers: Optional[int] = typer.Option(
+        default=None,
+        min=1,
+        help="The maximum number of trial resolutions to run in parallel.",
+    ),
+    shard: bool = typer.Option(
+        default=False,
+        help=(
+            "Whether to resolve independent components of the poetry.lock "
+            "dependency graph in parallel, then merge and verify their lock "
+            "files, when updating dependencies within their constraints."
+        ),
+    ),
+    shard_workers: Optional[int] = typer.Option(
+        default=None,
+        min=1,
+        help="The maximum number of shards to resolve in parallel.",
+    ),
+    timestamps: bool = typer.Option(
+        default=False,
+        help="Whether to prefix each line of poetry output with elapsed time.",
+    ),
+    skip_unchanged: bool = typer.Option(
+        default=False,
+        help=(
+            "Whether to skip the run if pyproject.toml, poetry.lock, the "
+            "options and the index pages of the selected dependencies are "
+            "unchanged since the last run. Requires --index-url or "
+            "--wheelhouse, without them the run is never skipped."
+        ),
+    ),
+    cache_dir: Optional[Path] = typer.Option(
+        default=None,
+        envvar="POETRYUP_CACHE_DIR",
+        help="A directory to cache data in across runs.",
+    ),
+    cache_ttl: float = typer.Option(
+        default=3600.0,
+        min=0,
+        envvar="POETRYUP_CACHE_TTL",
+        help=(
+            "The number of seconds latest versions looked up with "
+            "--index-url are cached for across projects, 0 disables the "
+            "cache."
+        ),
+    ),
+    cache_size: int = typer.Option(
+        default=10000,
+        min=1,
+        help="The maximum number of cached latest versions.",
+    ),
+    timings: bool = typer.Option(
+        default=False,
+        help="Whether to print wall and CPU time of each phase of the run.",
+    ),
+    trace: Optional[Path] = typer.Option(
+        default=None,
+        help="A file to export the phases of the run to as a JSON trace.",
+    ),
+    report: Optional[str] = typer.Option(
+        default=None,
+        help=(
+            "A file to stream the decision about every dependency to as "
+            "JSON lines, '-' for standard output, in which case any other "
+            "output goes to standard error."
+        ),
+    ),
     verbose: int = typer.Option(
         0,
         "--verbose",
@@ -54,31 +199,195 @@ def poetryup(
 ):
     """Update dependencies and bump their version in pyproject.toml file"""
     setup_logging(verbose)
+    setup_tracing(ctx, timings, trace)
+
+    from poetryup.core import dependency_filter
+    from poetryup.core.cmd import CommandError
+
+    options = Options(
+        latest=latest,
+        without_constraints=[Constraint.EXACT] if skip_exact else [],
+        names=name,
+        exclude_names=exclude_name,
+        groups=group,
+        backend=backend,
+        cache_dir=cache_dir,
+        index_url=index_url,
+        wheelhouse=wheelhouse,
+        timestamps=timestamps,
+        skip_unchanged=skip_unchanged,
+        single_resolution=single_resolution,
+        cache_ttl=cache_ttl,
+        cache_size=cache_size,
+        bisect=bisect,
+        bisect_workers=bisect_workers,
+        shard=shard,
+        shard_workers=shard_workers,
+    )
 
     try:
-        pyproject_str = Path("pyproject.toml").read_text()
-    except FileNotFoundError:
-        raise Exception(
-            "poetryup couldn't find a pyproject.toml file in current directory"
+        # fail early on invalid name patterns
+        dependency_filter.DependencyFilter.compile(
+            tuple(options.without_constraints),
+            tuple(options.names),
+            tuple(options.exclude_names),
+            tuple(options.groups),
         )
+    except dependency_filter.InvalidPatternError as e:
+        raise typer.BadParameter(str(e), param_hint="'--name'")
+
+    if ctx.invoked_subcommand is not None:
+        # the subcommand runs with the options given before it
+        ctx.obj = options
+        return
+
+    with ExitStack() as stack:
+        writer = None
+        if report is not None:
+            from poetryup.core.report import open_report
+
+            writer = stack.enter_context(open_report(report))
+
+        if workspace:
+            from poetryup.core.workspace import (
+                CycleError,
+                InvalidProjectError,
+                summarize,
+                update_workspace,
+            )
 
-    pyproject = Pyproject(pyproject_str)
-    without_constraint = [Constraint.EXACT] if skip_exact else []
+            try:
+                results = update_workspace(Path.cwd(), options, workers, writer)
+            except (CycleError, InvalidProjectError) as e:
+                typer.echo(str(e), err=True)
+                raise typer.Exit(1)
+            typer.echo(summarize(results, Path.cwd()))
+            if any(x.status != "updated" for x in results):
+                raise typer.Exit(1)
+            return
+
+        from poetryup.core.runner import run
+
+        try:
+            run(options, writer)
+        except CommandError as e:
+            raise typer.Exit(e.return_code)
+
+
+@app.command("plan")
+def plan_command(
+    ctx: typer.Context,
+    output: Path = typer.Argument(
+        "poetryup-plan.json",
+        help="The file to write the plan to.",
+    ),
+):
+    """Resolve updates into a plan file, leaving the project unchanged
+
+    Options given before the command select the updates, e.g.
+    'poetryup --latest plan'.
+    """
+
+    from poetryup.core.cmd import CommandError
+    from poetryup.core.runner import plan
 
     try:
-        pyproject.update_dependencies(
-            latest,
-            without_constraint,
-            name,
-            exclude_name,
-            group,
-        )
+        update_plan = plan(ctx.obj)
     except CommandError as e:
         raise typer.Exit(e.return_code)
 
-    Path("pyproject.toml").write_text(pyproject.dumps())
-    # refresh the lock file after changes in pyproject.toml
-    cmd_run(["poetry", "lock", "--no-update"])
+    output.write_text(update_plan.dumps())
+    typer.echo(f"Planned {len(update_plan.updates)} update(s) in '{output}'")
+
+
+@app.command("apply")
+def apply_command(
+    plan_file: Path = typer.Argument(
+        "poetryup-plan.json",
+        help="The plan file to apply.",
+    ),
+    strict: bool = typer.Option(
+        default=False,
+        help="Whether the project files must match the planned files.",
+    ),
+):
+    """Apply a plan file to pyproject.toml file without resolving"""
+
+    from poetryup.core.plan import Plan
+    from poetryup.core.runner import HashMismatchError, apply
+
+    try:
+        apply(Plan.loads(plan_file.read_text()), strict)
+    except HashMismatchError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
+
+
+@app.command("daemon")
+def daemon_command(
+    ctx: typer.Context,
+    socket_path: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        envvar="POETRYUP_SOCKET",
+        help="The Unix socket to serve requests on.",
+    ),
+    idle_timeout: Optional[float] = typer.Option(
+        default=None,
+        min=0,
+        help="The number of seconds without requests to stop after.",
+    ),
+):
+    """Keep projects parsed in memory and serve requests on a Unix socket
+
+    Requests are JSON objects on a line of their own, e.g.
+    '{"command": "bumps", "project": "/path/to/project"}'. Options given
+    before the command are the defaults of requests.
+    """
+
+    from poetryup.core.daemon import DaemonError, default_socket_path, serve
+
+    try:
+        serve(socket_path or default_socket_path(), ctx.obj, idle_timeout)
+    except DaemonError as e:
+        typer.echo(str(e), err=True)
+        raise typer.Exit(1)
+
+
+@app.command("query")
+def query_command(
+    ctx: typer.Context,
+    command: str = typer.Argument(
+        ...,
+        help="The request: bumps, outdated, apply, ping or shutdown.",
+    ),
+    socket_path: Optional[Path] = typer.Option(
+        None,
+        "--socket",
+        envvar="POETRYUP_SOCKET",
+        help="The Unix socket the daemon serves requests on.",
+    ),
+):
+    """Send a request about current directory to a daemon, print the result
+
+    Options given before the command select the dependencies, e.g.
+    'poetryup --group dev query bumps'.
+    """
+
+    import json
+
+    from poetryup.core import daemon
+
+    try:
+        result = daemon.request(
+            socket_path or daemon.default_socket_path(),
+            command,
+            options=daemon.request_options(ctx.obj),
+        )
+    except (daemon.DaemonError, OSError) as e:
+        typer.echo(f"Request failed: {e}", err=True)
+        raise typer.Exit(1)
+    typer.echo(json.dumps(result, indent=2))
 
 
 if __name__ == "__main__":
@@ -1,6 +1,41 @@
-from dataclasses import dataclass
+import re
+import sys
+from dataclasses import FrozenInstanceError
 from enum import Enum
-from typing import Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+_normalize_pattern = re.compile(r"[-_.]+")
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a package name
+
+    https://www.python.org/dev/peps/pep-0503/#normalized-names
+
+    Args:
+        name: The name to normalize
+
+    Returns:
+        The normalized name
+    """
+
+    return _normalize_pattern.sub("-", name).lower()
+
+
+# interned normalized names indexed by name, names repeat across groups and
+# projects
+_normalized_names: Dict[str, str] = {}
+_NORMALIZED_NAMES_SIZE = 65536
+
+
+def _normalize_interned(name: str) -> str:
+    normalized_name = _normalized_names.get(name)
+    if normalized_name is None:
+        if len(_normalized_names) >= _NORMALIZED_NAMES_SIZE:
+            _normalized_names.clear()
+        normalized_name = sys.intern(normalize_name(name))
+        _normalized_names[name] = normalized_name
+    return normalized_name
 
 
 class Constraint(str, Enum):
@@ -14,45 +49,104 @@ class Constraint(str, Enum):
     MULTIPLE_CONSTRAINTS = "multiple_constraint"
 
 
-@dataclass(frozen=True)
+def classify_constraint(
+    version: Union[str, Dict, List]
+) -> Optional[Constraint]:
+    """Classify the constraint of a dependency version
+
+    Args:
+        version: The version of the dependency
+
+    Returns:
+        The constraint, None if the version has no known constraint
+    """
+
+    if isinstance(version, list):
+        return Constraint.MULTIPLE_CONSTRAINTS
+
+    if not isinstance(version, str):
+        # tomlkit tables are dicts of their items, reading the dict directly
+        # is a lot faster than the mapping interface of tomlkit
+        version = dict.get(version, "version", "")
+
+    if "," in version:
+        return Constraint.MULTIPLE_REQUIREMENTS
+    elif version[:1] == "^":
+        return Constraint.CARET
+    elif version[:1] == "~":
+        return Constraint.TILDE
+    elif "*" in version:
+        return Constraint.WILDCARD
+    elif version.startswith((">", "<", ">=", "<=", "!=")):
+        return Constraint.INEQUALITY
+    elif version[:1].isdigit():
+        return Constraint.EXACT
+    return None
+
+
+# assigns attributes of frozen instances
+_set_attribute = object.__setattr__
+
+
 class Dependency:
     """A class to represent a dependency
 
+    Dependencies are immutable and compare like a frozen dataclass of their
+    name, version and group. The normalized name and the constraint are
+    computed once, names and groups are interned since projects repeat them
+    a lot. The version of a dependency may be a table, which must not be
+    changed to another constraint after the dependency was created.
+
     Args:
         name: The name of the dependency
         version: The version of the dependency
         group: The group of the dependency
     """
 
+    __slots__ = ("name", "version", "group", "normalized_name", "constraint")
+
     name: str
     version: Union[str, Dict, List]
     group: str
+    normalized_name: str
+    constraint: Optional[Constraint]
 
-    @property
-    def normalized_name(self) -> str:
-        # https://www.python.org/dev/peps/pep-0503/#normalized-names
-        return self.name.replace("_", "-").lower()
+    def __init__(
+        self,
+        name: str,
+        version: Union[str, Dict, List],
+        group: str,
+    ) -> None:
+        name = sys.intern(str(name))
+        _set_attribute(self, "name", name)
+        _set_attribute(self, "version", version)
+        _set_attribute(self, "group", sys.intern(str(group)))
+        _set_attribute(self, "normalized_name", _normalize_interned(name))
+        _set_attribute(self, "constraint", classify_constraint(version))
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name: str) -> None:
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.version, self.group) == (
+            other.name,
+            other.version,
+            other.group,
+        )
 
-    @property
-    def constraint(self) -> Constraint:
-        if isinstance(self.version, List):
-            return Constraint.MULTIPLE_CONSTRAINTS
+    def __hash__(self) -> int:
+        return hash((self.name, self.version, self.group))
 
-        version = (
-            self.version
-            if isinstance(self.version, str)
-            else self.version.get("version", "")
+    def __repr__(self) -> str:
+        return (
+            f"Dependency(name={self.name!r}, version={self.version!r}, "
+            f"group={self.group!r})"
         )
 
-        if "," in version:
-            return Constraint.MULTIPLE_REQUIREMENTS
-        elif version[:1] == "^":
-            return Constraint.CARET
-        elif version[:1] == "~":
-            return Constraint.TILDE
-        elif "*" in version:
-            return Constraint.WILDCARD
-        elif version.startswith((">", "<", ">=", "<=", "!=")):
-            return Constraint.INEQUALITY
-        elif version[:1].isdigit():
-            return Constraint.EXACT
+    def __reduce__(self) -> Tuple:
+        return (self.__class__, (self.name, self.version, self.group))
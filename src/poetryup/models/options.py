@@ -0,0 +1,59 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from poetryup.core.poetry import Backend
+from poetryup.models.dependency import Constraint
+
+
+@dataclass(frozen=True)
+class Options:
+    """A class to represent the options of a poetryup run
+
+    Args:
+        latest: Whether to update dependencies to their latest version
+        without_constraints: The dependency constraints to ignore
+        names: The dependency names to include
+        exclude_names: The dependency names to exclude
+        groups: The dependency groups to include
+        backend: The backend used to run poetry commands
+        cache_dir: A directory to cache data in across runs
+        index_url: A simple index to look up latest versions in, poetry looks
+            them up itself if not provided
+        wheelhouse: A local directory of distributions or a file-based simple
+            index to look up latest versions in instead of index_url
+        timestamps: Whether to prefix live poetry output with elapsed times
+        skip_unchanged: Whether to skip the run when nothing changed since the
+            last run
+        single_resolution: Whether to update dependencies of every group to
+            their latest version with a single resolution
+        cache_ttl: The number of seconds latest versions looked up in the
+            index are cached for, 0 disables the cache
+        cache_size: The maximum number of cached latest versions
+        bisect: Whether to bisect groups which fail to update to their latest
+            version for the packages blocking them and update the others
+        bisect_workers: The maximum number of trial resolutions to run in
+            parallel when bisecting
+        shard: Whether to resolve the components of the lock graph in
+            parallel when updating dependencies within their constraints
+        shard_workers: The maximum number of shards to resolve in parallel
+    """
+
+    latest: bool = False
+    without_constraints: List[Constraint] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    exclude_names: List[str] = field(default_factory=list)
+    groups: List[str] = field(default_factory=list)
+    backend: Backend = Backend.SUBPROCESS
+    cache_dir: Optional[Path] = None
+    index_url: Optional[str] = None
+    wheelhouse: Optional[Path] = None
+    timestamps: bool = False
+    skip_unchanged: bool = False
+    single_resolution: bool = False
+    cache_ttl: float = 3600.0
+    cache_size: int = 10000
+    bisect: bool = False
+    bisect_workers: Optional[int] = None
+    shard: bool = False
+    shard_workers: Optional[int] = None
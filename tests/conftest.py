@@ -28,7 +28,7 @@ def mock_poetry_commands(mocker: MockerFixture) -> None:
         "poetryup_extras",
     ]
     s = " 0.2.0 Some description\n└── some-package >=0.10.2,<0.11.0\n"
-    return_value = s.join(dependencies) + s
+    return_value = (s.join(dependencies) + s).splitlines()
 
     mocker.patch.object(
         Poetry,
@@ -0,0 +1,85 @@
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from poetryup.core.bisection import (
+    TrialPoetry,
+    find_blockers,
+    package_name,
+    scratch_copy,
+)
+
+PACKAGES = [f"p{i}@latest" for i in range(10)]
+
+
+def test_package_name() -> None:
+    assert package_name("foo@latest") == "foo"
+    assert package_name("foo_bar[baz,qux]@^1.2") == "foo_bar"
+
+
+@pytest.mark.parametrize(
+    "blockers",
+    [
+        [],
+        ["p3@latest"],
+        ["p0@latest", "p9@latest"],
+        ["p2@latest", "p3@latest", "p4@latest", "p7@latest"],
+    ],
+)
+def test_find_blockers(blockers: List[str]) -> None:
+    trials = []
+    lock = threading.Lock()
+
+    def trial(packages: List[str]) -> bool:
+        with lock:
+            trials.append(packages)
+        return not set(packages) & set(blockers)
+
+    assert find_blockers(PACKAGES, trial, workers=4) == blockers
+    # far fewer trials than packages, in case of a single blocker
+    if len(blockers) == 1:
+        assert len(trials) <= 2 * 4 + 1
+
+
+def test_find_blockers_in_combination() -> None:
+    # p1 and p6 can't be updated together but both can be on their own
+    def trial(packages: List[str]) -> bool:
+        return not {"p1@latest", "p6@latest"} <= set(packages)
+
+    blockers = find_blockers(PACKAGES, trial)
+
+    assert blockers in [["p1@latest"], ["p6@latest"]]
+    assert trial([x for x in PACKAGES if x not in blockers])
+
+
+def test_find_blockers_single_package() -> None:
+    assert find_blockers(["p0@latest"], lambda x: False) == ["p0@latest"]
+
+
+def test_scratch_copy(tmp_path: Path) -> None:
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "pyproject.toml").write_text("[tool.poetry]\n")
+
+    with scratch_copy(project) as path:
+        assert path.parent == tmp_path
+        assert (path / "pyproject.toml").read_text() == "[tool.poetry]\n"
+        assert not (path / "poetry.lock").exists()
+        (path / "pyproject.toml").write_text("changed")
+
+    assert not path.exists()
+    assert (project / "pyproject.toml").read_text() == "[tool.poetry]\n"
+
+
+def test_trial_poetry(mocker: MockerFixture, tmp_path: Path) -> None:
+    mock = mocker.patch("poetryup.core.bisection.cmd_run", return_value="")
+    TrialPoetry(tmp_path).add(["foo@latest"], "default", lock_only=True)
+    mock.assert_called_once_with(
+        ["poetry", "add", "foo@latest", "--lock"],
+        capture_output=True,
+        cwd=tmp_path,
+        env={"POETRY_VIRTUALENVS_CREATE": "false"},
+    )
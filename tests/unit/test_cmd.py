@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from poetryup.core.cmd import CommandError, cmd_run, cmd_stream
+
+
+def test_cmd_stream() -> None:
+    lines = cmd_stream(
+        [sys.executable, "-c", "print('foo'); print('bar', flush=True)"]
+    )
+    assert list(lines) == ["foo", "bar"]
+
+
+def test_cmd_stream_is_lazy() -> None:
+    # the process never stops writing, it's killed once the generator closes
+    lines = cmd_stream(
+        [sys.executable, "-c", "while True: print('foo', flush=True)"]
+    )
+    assert next(lines) == "foo"
+    assert next(lines) == "foo"
+    lines.close()
+
+
+def test_cmd_stream_error() -> None:
+    lines = cmd_stream(
+        [sys.executable, "-c", "print('foo'); raise SystemExit(3)"]
+    )
+    assert next(lines) == "foo"
+    with pytest.raises(CommandError) as e:
+        next(lines)
+    assert e.value.return_code == 3
+
+
+def test_cmd_run_capture_output() -> None:
+    output = cmd_run(
+        [sys.executable, "-c", "print('foo')"],
+        capture_output=True,
+    )
+    assert output == "foo\n"
+
+
+def test_cmd_run_timestamps(capsys: pytest.CaptureFixture) -> None:
+    cmd_run([sys.executable, "-c", "print('foo')"], timestamps=True)
+    output = capsys.readouterr().out
+    assert output.startswith("[")
+    assert output.endswith("s] foo\n")
@@ -0,0 +1,180 @@
+import os
+import shutil
+import socket
+import stat
+import threading
+from pathlib import Path
+
+import pytest
+
+from poetryup.core import daemon
+from poetryup.core.daemon import Daemon, DaemonError, request, serve
+from poetryup.core.pyproject import Pyproject
+
+fixtures = Path(os.path.dirname(__file__)) / "fixtures"
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    path = tmp_path / "project"
+    path.mkdir()
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", path)
+    shutil.copy(fixtures / "input_lock/poetry.lock", path)
+    return path
+
+
+def _respond(daemon: Daemon, **request) -> object:
+    response = daemon.respond(request)
+    assert response["ok"], response.get("error")
+    return response["result"]
+
+
+def test_bumps(project: Path) -> None:
+    daemon = Daemon()
+    plan = _respond(daemon, command="bumps", project=str(project))
+
+    updates = {x["name"]: x for x in plan["updates"]}
+    assert updates["poetryup"]["old"] == "^0.1.0"
+    assert updates["poetryup"]["new"] == "^0.2.0"
+
+    plan = _respond(
+        daemon,
+        command="bumps",
+        project=str(project),
+        options={"groups": ["default"]},
+    )
+    assert [x["name"] for x in plan["updates"]] == ["poetryup"]
+    assert (daemon.projects.misses, daemon.projects.hits) == (1, 1)
+
+
+def test_bumps_reparses_changed_project(project: Path) -> None:
+    daemon = Daemon()
+    _respond(daemon, command="bumps", project=str(project))
+
+    pyproject = project / "pyproject.toml"
+    pyproject.write_text(pyproject.read_text().replace("^0.1.0", "^0.2.0"))
+    plan = _respond(daemon, command="bumps", project=str(project))
+
+    assert "poetryup" not in [x["name"] for x in plan["updates"]]
+    assert daemon.projects.misses == 2
+
+
+def test_outdated(project: Path, tmp_path: Path) -> None:
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    (wheelhouse / "poetryup-0.3.0-py3-none-any.whl").touch()
+    (wheelhouse / "poetryup_caret-0.2.0.tar.gz").touch()
+
+    outdated = _respond(
+        Daemon(),
+        command="outdated",
+        project=str(project),
+        options={"wheelhouse": str(wheelhouse)},
+    )
+
+    assert outdated == [
+        {
+            "name": "poetryup",
+            "group": "default",
+            "lock_version": "0.2.0",
+            "latest_version": "0.3.0",
+        }
+    ]
+
+
+def test_apply(project: Path) -> None:
+    daemon = Daemon()
+    result = _respond(
+        daemon,
+        command="apply",
+        project=str(project),
+        options={"names": ["poetryup", "poetryup_caret"]},
+    )
+
+    assert result == {"applied": ["poetryup", "poetryup_caret"]}
+    dependencies = Pyproject((project / "pyproject.toml").read_text())
+    assert dependencies.dependency_index["poetryup"].version == "^0.2.0"
+    assert dependencies.dependency_index["poetryup-tilde"].version == "~0.1.0"
+
+    plan = _respond(daemon, command="bumps", project=str(project))
+    assert "poetryup" not in [x["name"] for x in plan["updates"]]
+
+
+@pytest.mark.parametrize(
+    "request_, error",
+    [
+        ({"command": "upgrade"}, "Unknown command 'upgrade'"),
+        ({"command": "bumps", "options": {"foo": 1}}, "Unknown option(s)"),
+        ({"command": "bumps", "project": "/nonexistent"}, "Couldn't read"),
+        ({"command": "outdated"}, "needs an index URL"),
+    ],
+)
+def test_errors(request_: dict, error: str, project: Path) -> None:
+    response = Daemon().respond({"project": str(project), **request_})
+    assert not response["ok"]
+    assert error in response["error"]
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"),
+    reason="requires Unix sockets",
+)
+def test_serve(project: Path, tmp_path: Path) -> None:
+    socket_path = tmp_path / "poetryup.sock"
+    thread = threading.Thread(target=serve, args=(socket_path,))
+    thread.start()
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            threading.Event().wait(0.05)
+
+        assert request(socket_path, "ping")["pid"] == os.getpid()
+        assert stat.S_IMODE(socket_path.stat().st_mode) == 0o600
+        plan = request(socket_path, "bumps", project=project)
+        assert plan["updates"]
+
+        with pytest.raises(DaemonError):
+            serve(socket_path)
+        with pytest.raises(DaemonError, match="Unknown command"):
+            request(socket_path, "upgrade", project=project)
+    finally:
+        request(socket_path, "shutdown")
+        thread.join(5)
+
+    assert not thread.is_alive()
+    assert not socket_path.exists()
+
+
+@pytest.mark.skipif(
+    not hasattr(socket, "AF_UNIX"),
+    reason="requires Unix sockets",
+)
+def test_serve_closes_stalled_connections(
+    capsys: pytest.CaptureFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    assert daemon._Handler.timeout == daemon.CONNECTION_TIMEOUT
+    monkeypatch.setattr(daemon._Handler, "timeout", 0.2)
+    socket_path = tmp_path / "poetryup.sock"
+    thread = threading.Thread(target=serve, args=(socket_path,))
+    thread.start()
+    try:
+        for _ in range(100):
+            if socket_path.exists():
+                break
+            threading.Event().wait(0.05)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stalled:
+            stalled.connect(str(socket_path))
+            stalled.sendall(b'{"command": "ping"')
+            # the stalled connection doesn't block other clients for long
+            assert request(socket_path, "ping", timeout=5.0)["pid"]
+    finally:
+        request(socket_path, "shutdown")
+        thread.join(5)
+
+    assert not thread.is_alive()
+    # stalled connections are closed quietly
+    assert "Traceback" not in capsys.readouterr().err
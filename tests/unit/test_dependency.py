@@ -1,4 +1,10 @@
-from poetryup.models.dependency import Constraint, Dependency
+import copy
+import pickle
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from poetryup.models.dependency import Constraint, Dependency, normalize_name
 
 
 def test_normalized_name() -> None:
@@ -10,6 +16,11 @@ def test_normalized_name() -> None:
     assert dependency.normalized_name == "poetry-up"
 
 
+def test_normalize_name() -> None:
+    assert normalize_name("Poetry.Up") == "poetry-up"
+    assert normalize_name("poetry__-.up") == "poetry-up"
+
+
 def test_constraint() -> None:
     dependency = Dependency(
         name="poetryup",
@@ -62,3 +73,39 @@ def test_constraint() -> None:
         group="default",
     )
     assert dependency.constraint == Constraint.MULTIPLE_CONSTRAINTS
+
+
+def test_dependency_is_frozen() -> None:
+    dependency = Dependency(name="poetryup", version="^0.1.0", group="dev")
+    with pytest.raises(FrozenInstanceError):
+        dependency.version = "^0.2.0"
+    with pytest.raises(FrozenInstanceError):
+        del dependency.name
+    with pytest.raises(AttributeError):
+        dependency.other = "other"
+
+
+def test_dependency_equality() -> None:
+    dependency = Dependency(name="poetryup", version="^0.1.0", group="dev")
+    assert dependency == Dependency(
+        name="poetryup",
+        version="^0.1.0",
+        group="dev",
+    )
+    assert dependency != Dependency(
+        name="poetryup",
+        version="^0.2.0",
+        group="dev",
+    )
+    assert len({dependency, copy.copy(dependency)}) == 1
+    assert pickle.loads(pickle.dumps(dependency)) == dependency
+    assert repr(dependency) == (
+        "Dependency(name='poetryup', version='^0.1.0', group='dev')"
+    )
+
+
+def test_dependency_interns_names() -> None:
+    first = Dependency(name="".join(["Poetry", "_Up"]), version="*", group="g")
+    second = Dependency(name="".join(["Poetry", "_Up"]), version="*", group="g")
+    assert first.name is second.name
+    assert first.normalized_name is second.normalized_name
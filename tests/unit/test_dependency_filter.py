@@ -0,0 +1,111 @@
+import pytest
+
+from poetryup.core.dependency_filter import (
+    DependencyFilter,
+    InvalidPatternError,
+    is_pattern,
+)
+from poetryup.models.dependency import Constraint, Dependency
+
+dependencies = [
+    Dependency(name="requests", version="^2.28.0", group="default"),
+    Dependency(name="types_requests", version="^2.28.0", group="dev"),
+    Dependency(name="types-PyYAML", version="6.0.0", group="dev"),
+    Dependency(name="boto3", version="~1.26.0", group="aws"),
+    Dependency(name="botocore", version={"version": "*"}, group="aws"),
+    Dependency(name="pytest", version=">=7.0.0", group="dev"),
+]
+
+
+def names(selected):
+    return [x.name for x in selected]
+
+
+def test_is_pattern() -> None:
+    assert is_pattern("types-*")
+    assert is_pattern("boto?")
+    assert is_pattern("re:^boto")
+    assert not is_pattern("types-requests")
+
+
+def test_filter_nothing() -> None:
+    assert DependencyFilter().filter(dependencies) == dependencies
+
+
+def test_filter_names() -> None:
+    selected = DependencyFilter(names=["Requests", "types.pyyaml"]).filter(
+        dependencies
+    )
+    assert names(selected) == ["requests", "types-PyYAML"]
+
+
+def test_filter_glob() -> None:
+    selected = DependencyFilter(names=["types_*", "pytest"]).filter(
+        dependencies
+    )
+    assert names(selected) == ["types_requests", "types-PyYAML", "pytest"]
+
+
+def test_filter_regex() -> None:
+    selected = DependencyFilter(names=["re:^boto(3|core)$"]).filter(
+        dependencies
+    )
+    assert names(selected) == ["boto3", "botocore"]
+
+    selected = DependencyFilter(exclude_names=["re:yaml"]).filter(dependencies)
+    assert "types-PyYAML" not in names(selected)
+
+
+def test_filter_exclude_names() -> None:
+    selected = DependencyFilter(
+        names=["types-*", "requests"],
+        exclude_names=["types-pyyaml"],
+    ).filter(dependencies)
+    assert names(selected) == ["requests", "types_requests"]
+
+
+def test_filter_without_constraints() -> None:
+    selected = DependencyFilter(
+        without_constraints=[Constraint.EXACT, Constraint.WILDCARD],
+    ).filter(dependencies)
+    assert names(selected) == ["requests", "types_requests", "boto3", "pytest"]
+
+
+def test_filter_groups() -> None:
+    selected = DependencyFilter(groups=["aws", "default"]).filter(dependencies)
+    assert names(selected) == ["requests", "boto3", "botocore"]
+
+
+def test_matches() -> None:
+    dependency_filter = DependencyFilter(groups=["dev"], names=["py*"])
+    assert dependency_filter.matches(dependencies[5])
+    assert not dependency_filter.matches(dependencies[0])
+
+
+def test_compile_is_cached() -> None:
+    assert DependencyFilter.compile((), ("a",)) is DependencyFilter.compile(
+        (), ("a",)
+    )
+
+
+def test_invalid_regex() -> None:
+    with pytest.raises(InvalidPatternError):
+        DependencyFilter(names=["re:("])
+
+
+def test_reason() -> None:
+    dependency_filter = DependencyFilter(
+        without_constraints=[Constraint.EXACT],
+        names=["re:^(types|boto)"],
+        exclude_names=["botocore"],
+        groups=["dev", "aws"],
+    )
+    assert [dependency_filter.reason(x) for x in dependencies] == [
+        "name",
+        None,
+        "constraint",
+        None,
+        "excluded name",
+        "name",
+    ]
+    assert DependencyFilter(groups=["aws"]).reason(dependencies[0]) == "group"
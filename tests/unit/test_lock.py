@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import pytest
+import tomlkit
+
+from poetryup.core.lock import Lock, allows, content_hash, replace_content_hash
+
+lock_path = Path(
+    os.path.join(
+        os.path.dirname(__file__),
+        "fixtures/input_lock/poetry.lock",
+    )
+)
+
+
+def test_versions() -> None:
+    lock = Lock(lock_path.read_text())
+    assert lock.versions["poetryup"] == "0.2.0"
+    assert lock.versions["poetryup-extras"] == "0.2.0"
+    assert lock.versions["some-package"] == "0.10.2"
+
+
+def test_version_by_name() -> None:
+    lock = Lock(lock_path.read_text())
+    assert lock.version("poetryup_caret") == "0.2.0"
+    assert lock.version("Poetryup_Capital") == "0.2.0"
+    assert lock.version("non_existent") is None
+
+
+def test_read_non_existent(tmp_path: Path) -> None:
+    assert Lock.read(tmp_path / "poetry.lock") is None
+
+
+def test_read_invalid(tmp_path: Path) -> None:
+    path = tmp_path / "poetry.lock"
+    path.write_text("[[package]\n")
+    assert Lock.read(path) is None
+
+
+def test_content_hash() -> None:
+    pyproject = tomlkit.loads(
+        '[tool.poetry]\nname = "poetryup"\n\n'
+        '[tool.poetry.dependencies]\npython = "^3.7"\n'
+        'foo = { version = "^1.0", optional = true }\n'
+    )
+    expected = hashlib.sha256(
+        json.dumps(
+            {
+                "dependencies": {
+                    "python": "^3.7",
+                    "foo": {"version": "^1.0", "optional": True},
+                },
+                "source": None,
+                "extras": None,
+                "dev-dependencies": None,
+            },
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+    assert content_hash(pyproject["tool"]["poetry"]) == expected
+
+
+def test_replace_content_hash() -> None:
+    lock_str = lock_path.read_text()
+    replaced = replace_content_hash(lock_str, "ab" * 32)
+    assert Lock(replaced).content_hash == "ab" * 32
+    assert replaced.replace("ab" * 32, "0" * 64) == lock_str
+    assert replace_content_hash("[metadata]\n", "ab" * 32) is None
+
+
+@pytest.mark.parametrize(
+    "constraint, version, expected",
+    [
+        ("^1.2.3", "1.9.0", True),
+        ("^1.2.3", "2.0.0", False),
+        ("^1.2.3", "1.2.2", False),
+        ("^0.2.3", "0.2.9", True),
+        ("^0.2.3", "0.3.0", False),
+        ("^0.0.3", "0.0.4", False),
+        ("~1.2.3", "1.2.9", True),
+        ("~1.2.3", "1.3.0", False),
+        ("~1", "1.9", True),
+        ("1.2.*", "1.2.5", True),
+        ("*", "3.0", True),
+        ("0.2.0", "0.2.0", True),
+        ("==0.2.0", "0.2.1", False),
+        (">=1.2, <2.0", "1.5", True),
+        (">= 1.2 < 2.0", "2.0", False),
+        ("^1.0 || ^3.0", "3.1", True),
+        ("^1.0 || ^3.0", "2.1", False),
+        ("^1.0.0a1", "1.0.0a2", True),
+        ("not a constraint", "1.0", None),
+        ("^1.0", "not a version", None),
+    ],
+)
+def test_allows(constraint: str, version: str, expected: bool) -> None:
+    assert allows(constraint, version) is expected
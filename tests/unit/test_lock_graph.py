@@ -0,0 +1,124 @@
+from typing import Dict, List
+
+import pytest
+import tomlkit
+
+from poetryup.core.lock import Lock
+from poetryup.core.lock_graph import LockGraph
+
+
+def _graph() -> LockGraph:
+    packages = [
+        {"name": "app_a", "version": "1.0", "dependencies": {"Shared": "*"}},
+        {"name": "app-b", "version": "1.0", "dependencies": {"shared": "*"}},
+        {"name": "shared", "version": "1.0"},
+        {"name": "tool", "version": "1.0", "dependencies": {"colorama": "*"}},
+        {"name": "tool", "version": "2.0", "dependencies": {"click": "*"}},
+        {"name": "click", "version": "1.0"},
+        {"name": "alone", "version": "1.0", "dependencies": {"missing": "*"}},
+    ]
+    return LockGraph(Lock(tomlkit.dumps({"package": packages})))
+
+
+def test_edges() -> None:
+    graph = _graph()
+
+    assert graph.edges["app-a"] == {"shared"}
+    # edges of every entry, unlocked packages are left out
+    assert graph.edges["tool"] == {"click"}
+    assert graph.edges["alone"] == set()
+    assert "App.A" in graph
+    assert "missing" not in graph
+
+
+def test_components() -> None:
+    components = _graph().components(["tool", "app-a", "alone", "App_B"])
+
+    assert components == [["tool"], ["app-a", "app-b"], ["alone"]]
+
+
+def test_components_unlocked() -> None:
+    with pytest.raises(KeyError):
+        _graph().components(["app-a", "missing"])
+
+
+def _lock(packages: List[Dict]) -> Lock:
+    return Lock(tomlkit.dumps({"package": packages}))
+
+
+def test_reverse() -> None:
+    graph = _graph()
+
+    assert graph.dependents("shared") == {"app-a", "app-b"}
+    assert graph.dependents("app-a") == set()
+    assert graph.dependencies("Tool") == {"click"}
+    assert graph.dependencies("missing") == set()
+
+
+def test_markers() -> None:
+    graph = LockGraph(
+        _lock(
+            [
+                {
+                    "name": "app",
+                    "version": "1.0",
+                    "dependencies": {
+                        "colorama": {
+                            "version": "*",
+                            "markers": 'sys_platform == "win32"',
+                        },
+                        "numpy": [
+                            {
+                                "version": "<2",
+                                "markers": 'python_version < "3.9"',
+                            },
+                            {
+                                "version": ">=2",
+                                "markers": 'python_version >= "3.9"',
+                            },
+                        ],
+                        "click": [
+                            {
+                                "version": "<8",
+                                "markers": 'python_version < "3.7"',
+                            },
+                            {"version": ">=8"},
+                        ],
+                    },
+                },
+            ]
+        )
+    )
+
+    assert graph.markers == {
+        ("app", "colorama"): 'sys_platform == "win32"',
+        ("app", "numpy"): (
+            '(python_version < "3.9") or (python_version >= "3.9")'
+        ),
+    }
+
+
+def test_closure() -> None:
+    graph = LockGraph(
+        _lock(
+            [
+                {"name": "a", "version": "1", "dependencies": {"b": "*"}},
+                {"name": "b", "version": "1", "dependencies": {"c": "*"}},
+                {"name": "c", "version": "1", "dependencies": {"b": "*"}},
+                {"name": "d", "version": "1", "dependencies": {"a": "*"}},
+                {"name": "e", "version": "1"},
+            ]
+        )
+    )
+
+    assert graph.closure("b") == {"b", "c"}
+    assert graph.closure("a") == {"b", "c"}
+    assert graph.closure("d") == {"a", "b", "c"}
+    assert graph.closure("missing") == set()
+    assert [graph.fan_out(x) for x in "abcde"] == [2, 1, 1, 3, 0]
+
+
+def test_lock_graph_is_cached() -> None:
+    lock = _lock([{"name": "a", "version": "1"}])
+    assert lock.graph is lock.graph
+    assert lock.graph.versions == {"a": "1"}
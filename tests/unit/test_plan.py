@@ -0,0 +1,187 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+import tomlkit
+from pytest_mock import MockerFixture
+
+from poetryup.core.lock import Lock, content_hash, replace_content_hash
+from poetryup.core.plan import (
+    Plan,
+    PlannedUpdate,
+    apply_plan,
+    create_plan,
+    hash_text,
+    original_constraints,
+)
+from poetryup.core.poetry import Poetry
+from poetryup.core.pyproject import Pyproject
+from poetryup.core.runner import HashMismatchError, apply, plan
+from poetryup.models.options import Options
+
+fixtures = Path(os.path.dirname(__file__)) / "fixtures"
+pyproject_str = (fixtures / "input_pyproject/pyproject.toml").read_text()
+expected_pyproject_str = (
+    fixtures / "expected_pyproject/pyproject.toml"
+).read_text()
+
+
+def _hash(pyproject_str: str) -> str:
+    return content_hash(tomlkit.loads(pyproject_str)["tool"]["poetry"])
+
+
+def create_fixture_plan() -> Plan:
+    pyproject = Pyproject(pyproject_str)
+    original = original_constraints(pyproject)
+    return create_plan(
+        pyproject,
+        original,
+        pyproject.bump_dependencies(),
+        hash_text(pyproject_str),
+        None,
+    )
+
+
+def test_create_plan(
+    mock_poetry_commands,
+) -> None:
+    update_plan = create_fixture_plan()
+
+    assert update_plan.pyproject_hash == hash_text(pyproject_str)
+    assert update_plan.updates[0] == PlannedUpdate(
+        name="poetryup",
+        group="default",
+        old="^0.1.0",
+        new="^0.2.0",
+        lock_version="0.2.0",
+    )
+    # unchanged dependencies aren't planned
+    names = [x.name for x in update_plan.updates]
+    assert "poetryup_wildcard" not in names
+    assert "poetryup_restricted" in names
+
+
+def test_dumps_loads(
+    mock_poetry_commands,
+) -> None:
+    update_plan = create_fixture_plan()
+    assert Plan.loads(update_plan.dumps()) == update_plan
+
+
+def test_loads_unsupported_format() -> None:
+    with pytest.raises(ValueError):
+        Plan.loads('{"format": 0}')
+
+
+def test_apply_plan(
+    mock_poetry_commands,
+) -> None:
+    update_plan = create_fixture_plan()
+
+    pyproject = Pyproject(pyproject_str)
+    apply_plan(pyproject, update_plan)
+    assert pyproject.dumps() == expected_pyproject_str
+
+
+def test_apply_plan_copies_tables(
+    mock_poetry_commands,
+) -> None:
+    update_plan = create_fixture_plan()
+
+    pyproject = Pyproject(pyproject_str)
+    restricted = next(
+        x for x in pyproject.dependencies if x.name == "poetryup_restricted"
+    )
+    apply_plan(pyproject, update_plan)
+    # the parsed dependency keeps its constraint
+    assert restricted.version["version"] == "^0.1.0"
+
+
+def test_apply_plan_other_constraint(
+    mock_poetry_commands,
+) -> None:
+    update_plan = Plan(
+        pyproject_hash="",
+        updates=[
+            PlannedUpdate(
+                name="poetryup-caret",
+                group="main",
+                old="^0.0.1",
+                new="^0.3.0",
+                lock_version="0.3.0",
+            ),
+            PlannedUpdate(
+                name="poetryup_tilde",
+                group="main",
+                old="~0.1.0",
+                new="~0.3.0",
+                lock_version="0.3.0",
+            ),
+        ],
+    )
+
+    pyproject = Pyproject(pyproject_str)
+    apply_plan(pyproject, update_plan)
+    table = pyproject.pyproject["tool"]["poetry"]["group"]["main"]
+    assert table["dependencies"]["poetryup_caret"] == "^0.3.0"
+    assert table["dependencies"]["poetryup_tilde"] == "~0.3.0"
+
+
+def test_plan_and_apply(
+    mock_poetry_commands,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+
+    update_plan = plan(Options())
+    # planning leaves the project unchanged
+    assert Path("pyproject.toml").read_text() == pyproject_str
+
+    apply(update_plan, strict=True)
+    assert Path("pyproject.toml").read_text() == expected_pyproject_str
+
+    with pytest.raises(HashMismatchError):
+        apply(update_plan, strict=True)
+
+
+def test_plan_and_apply_refreshes_lock_hash(
+    mock_poetry_commands,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    lock_str = (fixtures / "input_lock/poetry.lock").read_text()
+    Path("poetry.lock").write_text(
+        replace_content_hash(lock_str, _hash(pyproject_str))
+    )
+
+    apply(plan(Options()), strict=True)
+
+    assert Lock(Path("poetry.lock").read_text()).content_hash == _hash(
+        Path("pyproject.toml").read_text()
+    )
+
+
+def test_plan_resolves_lock_only(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    update = mocker.patch.object(
+        Poetry,
+        "update",
+        side_effect=lambda *args, **kwargs: Path("poetry.lock").touch(),
+    )
+
+    plan(Options())
+
+    update.assert_called_once_with(lock_only=True, groups=[])
+    # the lock file created by the resolution is removed
+    assert not Path("poetry.lock").exists()
@@ -1,6 +1,21 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
 from pytest_mock import MockerFixture
 
-from poetryup.core.poetry import Poetry
+from poetryup.core import poetry as poetry_
+from poetryup.core.cmd import CommandError
+from poetryup.core.poetry import Backend, Poetry, create_poetry
+from poetryup.core.poetry_inprocess import InProcessPoetry
+
+
+@pytest.fixture(autouse=True)
+def clear_versions() -> None:
+    """Clear the poetry versions memoized by previous tests"""
+
+    poetry_._versions.clear()
 
 
 def test_version_poetry_1_1_x(
@@ -23,3 +38,155 @@ def test_version_poetry_1_2_x(
     )
     poetry = Poetry()
     assert poetry.version.base_version == "1.2.3"
+
+
+def test_version_memoized(
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch(
+        "poetryup.core.poetry.cmd_run",
+        return_value="Poetry (version 1.2.3)",
+    )
+    assert Poetry().version.base_version == "1.2.3"
+    assert Poetry().version.base_version == "1.2.3"
+    mock.assert_called_once()
+
+
+def test_version_disk_cache(
+    mocker: MockerFixture,
+    tmp_path: Path,
+) -> None:
+    executable = tmp_path / "poetry"
+    executable.write_text("")
+    mocker.patch(
+        "poetryup.core.poetry.shutil.which",
+        return_value=str(executable),
+    )
+    mock = mocker.patch(
+        "poetryup.core.poetry.cmd_run",
+        return_value="Poetry (version 1.2.3)",
+    )
+    assert Poetry(cache_dir=tmp_path).version.base_version == "1.2.3"
+    mock.assert_called_once()
+
+    # a new process only has the disk cache
+    poetry_._versions.clear()
+    assert Poetry(cache_dir=tmp_path).version.base_version == "1.2.3"
+    mock.assert_called_once()
+
+    # upgrading poetry replaces the executable and invalidates the cache
+    poetry_._versions.clear()
+    mtime = os.stat(executable).st_mtime_ns + 1_000_000_000
+    os.utime(executable, ns=(mtime, mtime))
+    assert Poetry(cache_dir=tmp_path).version.base_version == "1.2.3"
+    assert mock.call_count == 2
+
+
+def test_run(
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch("poetryup.core.poetry.cmd_run", return_value=None)
+    Poetry().lock()
+    mock.assert_called_once_with(
+        ["poetry", "lock", "--no-update"],
+        capture_output=False,
+        timestamps=False,
+    )
+
+
+def test_update_lock_only(
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch("poetryup.core.poetry.cmd_run", return_value=None)
+    Poetry().update(["foo"], lock_only=True)
+    mock.assert_called_once_with(
+        ["poetry", "update", "foo", "--lock"],
+        capture_output=False,
+        timestamps=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "version, args",
+    [
+        ("1.1.15", []),
+        ("1.2.0", ["--only", "main,dev"]),
+    ],
+)
+def test_update_groups(
+    mocker: MockerFixture,
+    version: str,
+    args: list,
+) -> None:
+    mocker.patch(
+        "poetryup.core.poetry.cmd_run",
+        return_value=f"Poetry (version {version})",
+    )
+    poetry = Poetry()
+    run = mocker.patch.object(poetry, "run")
+    poetry.update(["foo"], groups=["default", "dev", "main"])
+    run.assert_called_once_with(["update", "foo", *args])
+
+
+def test_create_poetry_in_process_fallback(
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch(
+        "poetryup.core.poetry.importlib.util.find_spec",
+        return_value=None,
+    )
+    poetry = create_poetry(Backend.IN_PROCESS)
+    assert type(poetry) is Poetry
+
+
+def test_create_poetry_in_process(
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch(
+        "poetryup.core.poetry.importlib.util.find_spec",
+        return_value=object(),
+    )
+    poetry = create_poetry(Backend.IN_PROCESS)
+    assert isinstance(poetry, InProcessPoetry)
+
+
+def test_in_process_run(
+    mocker: MockerFixture,
+) -> None:
+    application = mocker.MagicMock()
+    application.return_value.run.return_value = 0
+    output = mocker.MagicMock()
+    output.return_value.fetch.return_value = "poetryup 0.2.0"
+    mocker.patch.dict(
+        sys.modules,
+        {
+            "cleo.io.inputs.argv_input": mocker.MagicMock(),
+            "cleo.io.outputs.buffered_output": mocker.MagicMock(
+                BufferedOutput=output
+            ),
+            "poetry.console.application": mocker.MagicMock(
+                Application=application
+            ),
+        },
+    )
+    assert list(InProcessPoetry().show()) == ["poetryup 0.2.0"]
+    application.return_value.auto_exits.assert_called_once_with(False)
+
+
+def test_in_process_run_error(
+    mocker: MockerFixture,
+) -> None:
+    application = mocker.MagicMock()
+    application.return_value.run.return_value = 1
+    mocker.patch.dict(
+        sys.modules,
+        {
+            "cleo.io.inputs.argv_input": mocker.MagicMock(),
+            "cleo.io.outputs.buffered_output": mocker.MagicMock(),
+            "poetry.console.application": mocker.MagicMock(
+                Application=application
+            ),
+        },
+    )
+    with pytest.raises(CommandError):
+        InProcessPoetry().update()
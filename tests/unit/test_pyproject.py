@@ -1,9 +1,14 @@
 import os
 from pathlib import Path
+from typing import List, Optional
 from unittest.mock import call
 
+import pytest
+import tomlkit
 from pytest_mock import MockerFixture
 
+from poetryup.core.cmd import CommandError
+from poetryup.core.lock import Lock
 from poetryup.core.pyproject import Poetry, Pyproject
 from poetryup.models.dependency import Constraint, Dependency
 
@@ -14,6 +19,13 @@ pyproject_str = Path(
     )
 ).read_text()
 
+lock_path = Path(
+    os.path.join(
+        os.path.dirname(__file__),
+        "fixtures/input_lock/poetry.lock",
+    )
+)
+
 expected_pyproject_str = Path(
     os.path.join(
         os.path.dirname(__file__),
@@ -63,6 +75,32 @@ def test_update_dependencies(
     }
 
 
+def test_update_dependencies_from_lock_file(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch.object(
+        Poetry,
+        "show",
+        return_value=[],
+    )
+    pyproject = Pyproject(pyproject_str, lock_path=lock_path)
+    pyproject.update_dependencies()
+
+    mock.assert_not_called()
+    assert pyproject.dumps() == expected_pyproject_str
+
+
+def test_update_dependencies_lock_file_fallback(
+    mock_poetry_commands,
+    tmp_path: Path,
+) -> None:
+    pyproject = Pyproject(pyproject_str, lock_path=tmp_path / "poetry.lock")
+    pyproject.update_dependencies()
+
+    assert pyproject.dumps() == expected_pyproject_str
+
+
 def test_update_dependencies_latest(
     mock_poetry_commands,
     mocker: MockerFixture,
@@ -76,10 +114,7 @@ def test_update_dependencies_latest(
     pyproject.update_dependencies(latest=True)
 
     calls = [
-        call(
-            packages=["poetryup@latest"],
-            group="default",
-        ),
+        call(packages=["poetryup@latest"], group="default", lock_only=False),
         call(
             packages=[
                 "poetryup_caret@latest",
@@ -97,6 +132,7 @@ def test_update_dependencies_latest(
                 "poetryup_extras[foo,bar]@latest",
             ],
             group="main",
+            lock_only=False,
         ),
     ]
     mock.assert_has_calls(calls)
@@ -118,10 +154,7 @@ def test_update_dependencies_latest_skip_exact(
     )
 
     calls = [
-        call(
-            packages=["poetryup@latest"],
-            group="default",
-        ),
+        call(packages=["poetryup@latest"], group="default", lock_only=False),
         call(
             packages=[
                 "poetryup_caret@latest",
@@ -139,6 +172,7 @@ def test_update_dependencies_latest_skip_exact(
                 "poetryup_extras[foo,bar]@latest",
             ],
             group="main",
+            lock_only=False,
         ),
     ]
     mock.assert_has_calls(calls)
@@ -174,6 +208,7 @@ def test_update_dependencies_latest_with_specific_group(
                 "poetryup_extras[foo,bar]@latest",
             ],
             group="main",
+            lock_only=False,
         ),
     ]
     mock.assert_has_calls(calls)
@@ -192,10 +227,7 @@ def test_update_dependencies_latest_with_specific_name(
     pyproject.update_dependencies(latest=True, names=["poetryup"])
 
     calls = [
-        call(
-            packages=["poetryup@latest"],
-            group="default",
-        ),
+        call(packages=["poetryup@latest"], group="default", lock_only=False),
     ]
     mock.assert_has_calls(calls)
 
@@ -231,11 +263,176 @@ def test_update_dependencies_latest_with_exclude_names(
                 "poetryup_extras[foo,bar]@latest",
             ],
             group="main",
+            lock_only=False,
+        ),
+    ]
+    mock.assert_has_calls(calls)
+
+
+def test_update_dependencies_latest_with_latest_versions(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch.object(
+        Poetry,
+        "add",
+        return_value=None,
+    )
+    pyproject = Pyproject(pyproject_str)
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup", "poetryup_extras", "poetryup_caret"],
+        latest_versions={"poetryup": "0.3.0", "poetryup-extras": "0.4.0"},
+    )
+
+    calls = [
+        call(packages=["poetryup@^0.3.0"], group="default", lock_only=False),
+        call(
+            packages=[
+                "poetryup_caret@latest",
+                "poetryup_extras[foo,bar]@^0.4.0",
+            ],
+            group="main",
+            lock_only=False,
         ),
     ]
     mock.assert_has_calls(calls)
 
 
+def test_update_dependencies_latest_single_resolution(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    pyprojects = []
+    update = mocker.patch.object(
+        Poetry,
+        "update",
+        side_effect=lambda x, lock_only=False: pyprojects.append(
+            Path("pyproject.toml").read_text()
+        ),
+    )
+    monkeypatch.chdir(tmp_path)
+    Path("pyproject.toml").write_text(pyproject_str)
+
+    pyproject = Pyproject(pyproject_str)
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup", "poetryup_extras", "poetryup_caret"],
+        latest_versions={"poetryup": "0.3.0"},
+        single_resolution=True,
+    )
+
+    assert not add.called
+    update.assert_called_once_with(
+        ["poetryup", "poetryup_caret", "poetryup_extras"], lock_only=False
+    )
+    resolved = Pyproject(pyprojects[0]).dependency_index
+    assert resolved["poetryup"].version == "^0.3.0"
+    assert resolved["poetryup-caret"].version == "*"
+    assert resolved["poetryup-extras"].version == {
+        "version": "*",
+        "extras": ["foo", "bar"],
+    }
+
+
+def test_update_dependencies_latest_single_resolution_fallback(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    mocker.patch.object(
+        Poetry,
+        "update",
+        side_effect=CommandError(cmd="poetry update", return_code=1),
+    )
+    monkeypatch.chdir(tmp_path)
+    Path("pyproject.toml").write_text(pyproject_str)
+
+    pyproject = Pyproject(pyproject_str)
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup", "poetryup_caret"],
+        single_resolution=True,
+    )
+
+    assert Path("pyproject.toml").read_text() == pyproject_str
+    add.assert_has_calls(
+        [
+            call(
+                packages=["poetryup@latest"], group="default", lock_only=False
+            ),
+            call(
+                packages=["poetryup_caret@latest"],
+                group="main",
+                lock_only=False,
+            ),
+        ]
+    )
+
+
+def test_update_dependencies_latest_bisect(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    failing = ["poetryup_caret@latest", "poetryup_tilde@latest"]
+
+    def add_packages(
+        packages: List[str], group: str, lock_only: bool = False
+    ) -> None:
+        if packages == failing:
+            raise CommandError(cmd="poetry add", return_code=1)
+
+    add = mocker.patch.object(Poetry, "add", side_effect=add_packages)
+    find_blockers = mocker.patch(
+        "poetryup.core.pyproject.find_blockers",
+        return_value=["poetryup_tilde@latest"],
+    )
+
+    pyproject = Pyproject(pyproject_str)
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup_caret", "poetryup_tilde"],
+        bisect=True,
+        bisect_workers=2,
+    )
+
+    assert find_blockers.call_args[0][0] == failing
+    assert find_blockers.call_args[0][2] == 2
+    add.assert_has_calls(
+        [
+            call(packages=failing, group="main", lock_only=False),
+            call(
+                packages=["poetryup_caret@latest"],
+                group="main",
+                lock_only=False,
+            ),
+        ]
+    )
+    assert pyproject.blockers == {"main": ["poetryup_tilde@latest"]}
+
+
+def test_update_dependencies_latest_without_bisect(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    mocker.patch.object(
+        Poetry,
+        "add",
+        side_effect=CommandError(cmd="poetry add", return_code=1),
+    )
+    find_blockers = mocker.patch("poetryup.core.pyproject.find_blockers")
+
+    pyproject = Pyproject(pyproject_str)
+    with pytest.raises(CommandError):
+        pyproject.update_dependencies(latest=True, names=["poetryup_caret"])
+    assert not find_blockers.called
+
+
 def test_search_dependency(
     mock_poetry_commands,
 ) -> None:
@@ -260,6 +457,18 @@ def test_search_dependency_by_normalized_name(
     assert actual == expected
 
 
+def test_search_dependency_in_index(
+    mock_poetry_commands,
+) -> None:
+    pyproject = Pyproject(pyproject_str)
+    expected = pyproject.dependencies[1]
+    actual = pyproject.search_dependency(
+        pyproject.dependency_index,
+        "Poetryup.Caret",
+    )
+    assert actual == expected
+
+
 def test_search_dependency_non_existent(
     mock_poetry_commands,
 ) -> None:
@@ -321,6 +530,29 @@ def test_filter_dependencies_name(
     assert actual == [expected]
 
 
+def test_filter_dependencies_normalized_name(
+    mock_poetry_commands,
+) -> None:
+    dependencies = [
+        Dependency(
+            name="poetryup_exact",
+            version="0.1.0",
+            group="default",
+        ),
+        Dependency(
+            name="poetryup_caret",
+            version="^0.1.0",
+            group="dev",
+        ),
+    ]
+    pyproject = Pyproject(pyproject_str)
+    actual = pyproject.filter_dependencies(
+        dependencies=dependencies,
+        exclude_names=["Poetryup.Exact"],
+    )
+    assert actual == [dependencies[1]]
+
+
 def test_filter_dependencies_group(
     mock_poetry_commands,
 ) -> None:
@@ -352,3 +584,241 @@ def test_dumps(
     pyproject.update_dependencies()
 
     assert pyproject.dumps() == expected_pyproject_str
+
+
+def test_dumps_unchanged() -> None:
+    pyproject = Pyproject(pyproject_str)
+    pyproject.dependencies
+    assert pyproject.dumps() is pyproject_str
+
+
+def test_dumps_patches_changed_values() -> None:
+    source = (
+        "[tool.poetry]\n"
+        'name = "x"\n\n'
+        "[tool.poetry.dependencies]\n"
+        "python   =   '^3.7'  # kept as is\n"
+        'foo = {version="^1.0",extras=["a"]}\n'
+        'bar = "^2.0"\n'
+    )
+    pyproject = Pyproject(source)
+    dependencies = pyproject.dependency_index
+    pyproject.apply_dependencies(
+        [
+            pyproject.bump_dependency(dependencies["foo"], "1.5.0"),
+            pyproject.bump_dependency(dependencies["bar"], "2.0.0"),
+        ]
+    )
+    assert pyproject.dumps() == source.replace('"^1.0"', '"^1.5.0"').replace(
+        '"^2.0"', '"^2.0.0"'
+    )
+    assert pyproject.dumps() == tomlkit.dumps(pyproject.pyproject)
+
+
+def test_bump_dependency_keeps_table() -> None:
+    pyproject = Pyproject(
+        "[tool.poetry.dependencies]\n"
+        'foo = {version = "^1.0", extras = ["a"]}\n'
+    )
+    dependency = pyproject.dependency_index["foo"]
+    bumped = pyproject.bump_dependency(dependency, "1.5.0")
+
+    assert bumped.version["version"] == "^1.5.0"
+    assert dependency.version["version"] == "^1.0"
+    assert pyproject.dumps() == pyproject.pyproject_str
+
+
+def test_dumps_falls_back() -> None:
+    source = (
+        '[tool.poetry]\nname = "x"\ndescription = """\nmulti-line\n"""\n\n'
+        '[tool.poetry.dependencies]\nfoo = "^1.0"\n'
+    )
+    pyproject = Pyproject(source)
+    pyproject.apply_dependencies(
+        [Dependency(name="foo", version="^1.5", group="default")]
+    )
+    assert pyproject.dumps() == source.replace("^1.0", "^1.5")
+
+    # dependencies added since parsing can't be patched
+    pyproject = Pyproject(source.replace('"""\nmulti-line\n"""', '"x"'))
+    pyproject.apply_dependencies(
+        [Dependency(name="bar", version="^2.0", group="default")]
+    )
+    assert pyproject.dumps().endswith('foo = "^1.0"\nbar = "^2.0"\n')
+
+
+def test_update_dependencies_shard(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    Path("pyproject.toml").write_text(pyproject_str)
+    lock = tomlkit.loads(lock_path.read_text())
+    # only the dependencies of the main group share a package
+    for package in lock["package"]:
+        if package["name"] in ["poetryup", "poetryup-git"]:
+            del package["dependencies"]
+    Path("poetry.lock").write_text(tomlkit.dumps(lock))
+
+    lock_shards = mocker.patch(
+        "poetryup.core.sharding.lock_shards",
+        return_value=[lock_path.read_text()],
+    )
+    mocker.patch(
+        "poetryup.core.sharding.verify_lock",
+        return_value="verified",
+    )
+    update = mocker.patch.object(Poetry, "update")
+    install = mocker.patch.object(Poetry, "install")
+
+    pyproject = Pyproject(pyproject_str, lock_path=Path("poetry.lock"))
+    pyproject.update_dependencies(shard=True, shard_workers=2)
+
+    shards = lock_shards.call_args[0][2]
+    assert len(shards) == 2
+    assert sorted(len(x) for x in shards) == [2, 15]
+    assert Path("poetry.lock").read_text() == "verified"
+    assert install.called
+    assert not update.called
+
+
+@pytest.mark.parametrize(
+    "shard_workers, verified",
+    [(1, "verified"), (2, None)],
+)
+def test_update_dependencies_shard_falls_back(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    shard_workers: int,
+    verified: str,
+) -> None:
+    lock_shards = mocker.patch(
+        "poetryup.core.sharding.lock_shards",
+        return_value=[lock_path.read_text()],
+    )
+    mocker.patch(
+        "poetryup.core.sharding.verify_lock",
+        return_value=verified,
+    )
+    update = mocker.patch.object(Poetry, "update")
+
+    # the packages of the fixture lock all depend on some-package, thus they
+    # form a single component
+    lock = tomlkit.loads(lock_path.read_text())
+    if shard_workers > 1:
+        for package in lock["package"]:
+            package.pop("dependencies", None)
+    pyproject = Pyproject(pyproject_str, lock=Lock(tomlkit.dumps(lock)))
+    pyproject.update_dependencies(shard=True, shard_workers=shard_workers)
+
+    assert lock_shards.called == (shard_workers > 1)
+    assert update.called
+
+
+def test_update_dependencies_latest_orders_by_fan_out(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    lock = tomlkit.loads(lock_path.read_text())
+    # poetryup-tilde pulls in poetryup-exact, which pulls in some-package
+    for package in lock["package"]:
+        if package["name"] == "poetryup-tilde":
+            package["dependencies"]["poetryup-exact"] = "*"
+
+    pyproject = Pyproject(pyproject_str, lock=Lock(tomlkit.dumps(lock)))
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup", "poetryup_caret", "poetryup_tilde", "poetryup_git"],
+    )
+
+    assert add.call_args_list == [
+        call(
+            packages=["poetryup_tilde@latest", "poetryup_caret@latest"],
+            group="main",
+            lock_only=False,
+        ),
+        call(packages=["poetryup@latest"], group="default", lock_only=False),
+    ]
+
+
+def test_update_dependencies_latest_skips_locked_latest_versions(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    pyproject = Pyproject(pyproject_str, lock_path=lock_path)
+    pyproject.update_dependencies(
+        latest=True,
+        names=["poetryup", "poetryup_caret", "poetryup_tilde"],
+        latest_versions={"poetryup": "0.2.0", "poetryup-caret": "0.3.0"},
+    )
+
+    assert add.call_args_list == [
+        call(
+            packages=["poetryup_caret@^0.3.0", "poetryup_tilde@latest"],
+            group="main",
+            lock_only=False,
+        ),
+    ]
+    table = pyproject.pyproject["tool"]["poetry"]["dependencies"]
+    assert table["poetryup"] == "^0.2.0"
+
+
+@pytest.mark.parametrize(
+    "criteria, packages, groups",
+    [
+        ({}, None, []),
+        ({"without_constraints": [Constraint.EXACT]}, None, []),
+        ({"exclude_names": ["poetryup"]}, None, []),
+        (
+            {"groups": ["default", "main", "dev"]},
+            None,
+            ["default", "main", "dev"],
+        ),
+        (
+            {"names": ["poetryup", "Poetryup_Capital"], "groups": ["main"]},
+            ["Poetryup_Capital"],
+            ["main"],
+        ),
+        (
+            {"names": ["poetryup_caret", "poetryup"]},
+            ["poetryup", "poetryup_caret"],
+            [],
+        ),
+        (
+            {
+                "names": ["poetryup_exact"],
+                "without_constraints": [Constraint.EXACT],
+            },
+            ["poetryup_exact"],
+            [],
+        ),
+    ],
+)
+def test_update_dependencies_targeted(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    criteria: dict,
+    packages: Optional[List[str]],
+    groups: List[str],
+) -> None:
+    update = mocker.patch.object(Poetry, "update")
+    Pyproject(pyproject_str).update_dependencies(**criteria)
+
+    if packages is None:
+        update.assert_called_once_with(lock_only=False, groups=groups)
+    else:
+        update.assert_called_once_with(packages, lock_only=False, groups=groups)
+
+
+def test_update_dependencies_targeted_nothing_selected(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+) -> None:
+    update = mocker.patch.object(Poetry, "update")
+    Pyproject(pyproject_str).update_dependencies(names=["missing"])
+
+    assert not update.called
@@ -0,0 +1,142 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from poetryup.core.lock import Lock
+from poetryup.core.pyproject import Pyproject
+from poetryup.core.report import Action, Decision, Reason, ReportWriter, decide
+from poetryup.models.dependency import Constraint
+
+fixtures = Path(os.path.dirname(__file__)) / "fixtures"
+
+
+def _pyproject(pyproject_str: str = "") -> Pyproject:
+    return Pyproject(
+        pyproject_str
+        or (fixtures / "input_pyproject/pyproject.toml").read_text(),
+        lock=Lock((fixtures / "input_lock/poetry.lock").read_text()),
+    )
+
+
+def _decide(pyproject: Pyproject, **criteria) -> List[Decision]:
+    bumped_dependencies = pyproject.bump_dependencies(**criteria)
+    return list(decide(pyproject, bumped_dependencies, **criteria))
+
+
+def test_decide() -> None:
+    decisions = {x.name: x for x in _decide(_pyproject())}
+
+    assert len(decisions) == len(_pyproject().dependencies)
+    caret = decisions["poetryup_caret"]
+    assert caret.group == "main"
+    assert caret.constraint == Constraint.CARET
+    assert (caret.old, caret.lock_version, caret.new) == (
+        "^0.1.0",
+        "0.2.0",
+        "^0.2.0",
+    )
+    assert (caret.action, caret.reason) == (Action.BUMPED, None)
+    assert caret.project == os.getcwd()
+
+    for name in [
+        "poetryup_wildcard",
+        "poetryup_inequality_not_equal",
+        "poetryup_multiple_constraints",
+        "poetryup_git",
+    ]:
+        assert decisions[name].action == Action.UNCHANGED
+        assert decisions[name].reason == Reason.UNSUPPORTED_CONSTRAINT
+    assert decisions["poetryup_git"].old is None
+    assert decisions["poetryup_restricted"].new == "^0.2.0"
+
+
+def test_decide_skipped() -> None:
+    pyproject_str = (fixtures / "input_pyproject/pyproject.toml").read_text()
+    pyproject = _pyproject(
+        pyproject_str.replace(
+            'poetryup_extras = { version = "^0.1.0"',
+            'missing = "^0.1.0"\npoetryup_extras = { version = "^0.2.0"',
+        )
+    )
+    decisions = {
+        x.name: x
+        for x in _decide(
+            pyproject,
+            without_constraints=[Constraint.TILDE],
+            exclude_names=["poetryup_caret"],
+            groups=["main"],
+        )
+    }
+
+    assert decisions["poetryup"].reason == Reason.EXCLUDED_GROUP
+    assert decisions["poetryup_caret"].reason == Reason.EXCLUDED_NAME
+    assert decisions["poetryup_tilde"].reason == Reason.EXCLUDED_CONSTRAINT
+    assert decisions["missing"].action == Action.SKIPPED
+    assert decisions["missing"].reason == Reason.NOT_LOCKED
+    assert decisions["missing"].new == "^0.1.0"
+    assert decisions["poetryup_extras"].action == Action.UNCHANGED
+    assert decisions["poetryup_extras"].reason == Reason.UP_TO_DATE
+
+
+def test_decide_blocked() -> None:
+    pyproject = _pyproject()
+    pyproject.blockers = {"main": ["poetryup-tilde@latest"]}
+    decisions = {x.name: x for x in _decide(pyproject, names=["poetryup*"])}
+
+    assert decisions["poetryup_tilde"].reason == Reason.BLOCKED
+    assert decisions["poetryup_caret"].reason is None
+
+
+def test_report_writer(tmp_path: Path) -> None:
+    path = tmp_path / "report.ndjson"
+    with open(path, "w") as stream:
+        writer = ReportWriter(stream)
+        for decision in _decide(_pyproject(), names=["poetryup"]):
+            writer(decision)
+            # every record is readable as soon as it's written
+            assert len(path.read_text().splitlines()) == writer.written
+
+    records = [json.loads(x) for x in path.read_text().splitlines()]
+    assert records[0] == {
+        "project": os.getcwd(),
+        "name": "poetryup",
+        "group": "default",
+        "constraint": "caret",
+        "old": "^0.1.0",
+        "lock_version": "0.2.0",
+        "fan_out": 1,
+        "new": "^0.2.0",
+        "action": "bumped",
+        "reason": None,
+        "decided_at": records[0]["decided_at"],
+    }
+    assert records[0]["decided_at"].endswith("+00:00")
+    assert records[1]["action"] == "skipped"
+    assert records[1]["reason"] == "not_included"
+
+
+@pytest.mark.skipif(os.name != "posix", reason="requires file descriptors")
+def test_open_report_stdout() -> None:
+    code = (
+        "import os\n"
+        "from poetryup.core.report import open_report\n"
+        "with open_report('-') as writer:\n"
+        "    print('poetry output')\n"
+        "    os.system('echo subprocess output')\n"
+        "    writer.stream.write('record\\n')\n"
+        "print('after')\n"
+    )
+    process = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert process.stdout == "record\nafter\n"
+    assert process.stderr == "poetry output\nsubprocess output\n"
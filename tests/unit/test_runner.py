@@ -0,0 +1,177 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+import tomlkit
+from pytest_mock import MockerFixture
+
+from poetryup.core.index import IndexClient
+from poetryup.core.lock import Lock, content_hash, replace_content_hash
+from poetryup.core.poetry import Poetry
+from poetryup.core.runner import run
+from poetryup.core.version_cache import VersionCache
+from poetryup.models.options import Options
+
+fixtures = Path(os.path.dirname(__file__)) / "fixtures"
+
+
+def _hash(pyproject_str: str) -> str:
+    return content_hash(tomlkit.loads(pyproject_str)["tool"]["poetry"])
+
+
+@pytest.fixture
+def project(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> Path:
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    shutil.copy(fixtures / "input_lock/poetry.lock", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_run_refreshes_lock_hash(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    lock = mocker.patch.object(Poetry, "lock", return_value=None)
+    pyproject_str = Path("pyproject.toml").read_text()
+    lock_str = replace_content_hash(
+        Path("poetry.lock").read_text(),
+        _hash(pyproject_str),
+    )
+    Path("poetry.lock").write_text(lock_str)
+
+    run(Options())
+
+    new_pyproject_str = Path("pyproject.toml").read_text()
+    assert new_pyproject_str != pyproject_str
+    assert not lock.called
+    assert Lock(Path("poetry.lock").read_text()).content_hash == _hash(
+        new_pyproject_str
+    )
+
+
+def test_run_relocks_stale_lock(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    lock = mocker.patch.object(Poetry, "lock", return_value=None)
+    lock_str = Path("poetry.lock").read_text()
+
+    run(Options())
+
+    assert lock.call_count == 1
+    assert Path("poetry.lock").read_text() == lock_str
+
+
+def test_run_relocks_unsatisfied_constraint(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    lock = mocker.patch.object(Poetry, "lock", return_value=None)
+    pyproject_str = Path("pyproject.toml").read_text()
+    lock_str = Path("poetry.lock").read_text()
+    Path("poetry.lock").write_text(
+        replace_content_hash(lock_str, _hash(pyproject_str)).replace(
+            'name = "poetryup"\nversion = "0.2.0"',
+            'name = "poetryup"\nversion = "not a version"',
+        )
+    )
+
+    run(Options())
+
+    assert lock.call_count == 1
+
+
+def test_run_latest_uses_version_cache(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+    tmp_path: Path,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    fetch_pages = mocker.patch.object(IndexClient, "fetch_pages")
+    options = Options(
+        latest=True,
+        names=["poetryup"],
+        index_url="http://127.0.0.1:1/simple/",
+        cache_dir=tmp_path / "cache",
+    )
+    VersionCache(tmp_path / "cache/versions.sqlite3").put(
+        options.index_url,
+        {"poetryup": "0.3.0"},
+    )
+
+    run(options)
+
+    assert not fetch_pages.called
+    add.assert_called_once_with(
+        packages=["poetryup@^0.3.0"], group="default", lock_only=False
+    )
+
+
+def test_run_latest_uses_wheelhouse(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+    tmp_path: Path,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    fetch_pages = mocker.patch.object(IndexClient, "fetch_pages")
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    (wheelhouse / "poetryup-0.4.0-py3-none-any.whl").touch()
+    (wheelhouse / "poetryup-0.5.0a1.tar.gz").touch()
+
+    run(
+        Options(
+            latest=True,
+            names=["poetryup"],
+            index_url="http://127.0.0.1:1/simple/",
+            wheelhouse=wheelhouse,
+            cache_dir=tmp_path / "cache",
+        )
+    )
+
+    assert not fetch_pages.called
+    add.assert_called_once_with(
+        packages=["poetryup@^0.4.0"], group="default", lock_only=False
+    )
+
+
+def test_run_leaves_unchanged_pyproject_alone(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    pyproject = Path("pyproject.toml")
+    pyproject.write_text(
+        '[tool.poetry]\nname = "x"\n\n'
+        '[tool.poetry.dependencies]\npoetryup = "^0.2.0"\n'
+    )
+    os.utime(pyproject, ns=(0, 0))
+
+    run(Options())
+
+    assert pyproject.stat().st_mtime_ns == 0
+
+
+def test_run_reports_decisions(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    decisions: list = []
+
+    run(Options(groups=["default"]), decisions.append)
+
+    assert len(decisions) == 17
+    assert [(x.name, x.action) for x in decisions if x.action != "skipped"] == [
+        ("poetryup", "bumped")
+    ]
@@ -0,0 +1,183 @@
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+import tomlkit
+from pytest_mock import MockerFixture
+
+from poetryup.core.bisection import TrialPoetry
+from poetryup.core.cmd import CommandError
+from poetryup.core.lock import Lock
+from poetryup.core.sharding import (
+    balance,
+    lock_shards,
+    merge_locks,
+    shard_pyproject,
+    verify_lock,
+)
+
+pyproject_str = """\
+[tool.poetry]
+name = "app"
+
+[tool.poetry.dependencies]
+python = "^3.8"
+Requests = "^2.28"
+boto3 = "^1.26"
+
+[tool.poetry.group.dev.dependencies]
+pytest = "^7.0"
+
+[tool.poetry.extras]
+aws = ["boto3"]
+all = ["boto3", "requests"]
+"""
+
+# the versions poetry locks the dependencies and their dependencies to
+RESOLVED = {
+    "requests": {"requests": "2.31.0", "urllib3": "2.0.0"},
+    "boto3": {"boto3": "1.28.0", "botocore": "1.31.0"},
+    "pytest": {"pytest": "7.4.0"},
+}
+
+
+def _lock(versions: Dict[str, str], files: bool = False) -> str:
+    lock: Dict = {
+        "package": [{"name": k, "version": v} for k, v in versions.items()],
+        "metadata": {"lock-version": "1.1", "content-hash": "0"},
+    }
+    if files:
+        lock["metadata"]["files"] = {k: [] for k in versions}
+    return tomlkit.dumps(lock)
+
+
+def test_balance() -> None:
+    components = [["a"], ["b", "c", "d"], ["e", "f"], ["g"]]
+
+    assert balance(components, 2) == [["b", "c", "d", "g"], ["e", "f", "a"]]
+    assert balance(components, 8) == [["b", "c", "d"], ["e", "f"], ["a"], ["g"]]
+    assert balance(components, 1) == [["b", "c", "d", "e", "f", "a", "g"]]
+
+
+def test_shard_pyproject() -> None:
+    pyproject = tomlkit.loads(shard_pyproject(pyproject_str, {"boto3"}))
+    table = pyproject["tool"]["poetry"]
+
+    assert table["dependencies"] == {"python": "^3.8", "boto3": "^1.26"}
+    assert table["group"]["dev"]["dependencies"] == {}
+    assert table["extras"] == {"aws": ["boto3"], "all": ["boto3"]}
+
+    pyproject = tomlkit.loads(shard_pyproject(pyproject_str, {"pytest"}))
+    assert pyproject["tool"]["poetry"]["extras"] == {}
+
+
+def test_merge_locks() -> None:
+    lock_str = merge_locks(
+        [
+            _lock({"urllib3": "2.0.0", "requests": "2.31.0"}, files=True),
+            _lock({"certifi": "2023.7.22", "urllib3": "2.0.0"}, files=True),
+        ]
+    )
+
+    lock = tomlkit.loads(lock_str)
+    assert [x["name"] for x in lock["package"]] == [
+        "certifi",
+        "requests",
+        "urllib3",
+    ]
+    assert list(lock["metadata"]["files"]) == ["certifi", "requests", "urllib3"]
+    assert lock["metadata"]["lock-version"] == "1.1"
+
+
+def test_merge_locks_conflict() -> None:
+    assert (
+        merge_locks([_lock({"urllib3": "2.0.0"}), _lock({"urllib3": "1.26.0"})])
+        is None
+    )
+
+
+@pytest.fixture
+def project(tmp_path: Path) -> Path:
+    path = tmp_path / "app"
+    path.mkdir()
+    (path / "pyproject.toml").write_text(pyproject_str)
+    (path / "poetry.lock").write_text(_lock({}))
+    return path
+
+
+@pytest.fixture
+def trial_poetry(mocker: MockerFixture) -> List[List[str]]:
+    """Lock the dependencies of scratch pyprojects to RESOLVED versions"""
+
+    shards: List[List[str]] = []
+
+    def update(self: TrialPoetry, lock_only: bool) -> None:
+        assert lock_only
+        pyproject = tomlkit.loads((self.path / "pyproject.toml").read_text())
+        table = pyproject["tool"]["poetry"]
+        names = [
+            x.lower()
+            for x in [
+                *table["dependencies"],
+                *table["group"]["dev"]["dependencies"],
+            ]
+            if x != "python"
+        ]
+        if "pytest" in names and len(names) > 1:
+            raise CommandError(cmd="poetry update --lock", return_code=1)
+        shards.append(names)
+        versions = {k: v for x in names for k, v in RESOLVED[x].items()}
+        (self.path / "poetry.lock").write_text(_lock(versions))
+
+    mocker.patch.object(
+        TrialPoetry, "update", autospec=True, side_effect=update
+    )
+    mocker.patch.object(TrialPoetry, "lock", autospec=True)
+    return shards
+
+
+def test_lock_shards(project: Path, trial_poetry: List[List[str]]) -> None:
+    lock_strs = lock_shards(
+        project,
+        pyproject_str,
+        [["requests", "boto3"], ["pytest"]],
+    )
+
+    assert sorted(trial_poetry) == [["pytest"], ["requests", "boto3"]]
+    assert lock_strs is not None
+    lock_str = merge_locks(lock_strs)
+    assert Lock(lock_str).versions == {
+        **RESOLVED["boto3"],
+        **RESOLVED["pytest"],
+        **RESOLVED["requests"],
+    }
+    assert verify_lock(project, lock_str) == lock_str
+    # scratch copies are removed, the project is unchanged
+    assert sorted(x.name for x in project.parent.iterdir()) == ["app"]
+    assert (project / "poetry.lock").read_text() == _lock({})
+
+
+def test_lock_shards_failure(
+    project: Path,
+    trial_poetry: List[List[str]],
+) -> None:
+    shards = [["requests"], ["boto3", "pytest"]]
+    assert lock_shards(project, pyproject_str, shards) is None
+
+
+def test_verify_lock_changed_versions(
+    mocker: MockerFixture,
+    project: Path,
+) -> None:
+    def lock(self: TrialPoetry) -> None:
+        (self.path / "poetry.lock").write_text(_lock({"urllib3": "1.26.0"}))
+
+    mocker.patch.object(TrialPoetry, "lock", autospec=True, side_effect=lock)
+    assert verify_lock(project, _lock({"urllib3": "2.0.0"})) is None
+
+    mocker.patch.object(
+        TrialPoetry,
+        "lock",
+        side_effect=CommandError(cmd="poetry lock", return_code=1),
+    )
+    assert verify_lock(project, _lock({"urllib3": "2.0.0"})) is None
@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import poetryup
+
+# modules only the commands need, importing them at startup slows down e.g.
+# 'poetryup --help'
+LAZY_MODULES = [
+    "asyncio",
+    "concurrent.futures",
+    "packaging.specifiers",
+    "packaging.version",
+    "poetryup.core.index",
+    "poetryup.core.lock",
+    "poetryup.core.plan",
+    "poetryup.core.pyproject",
+    "poetryup.core.runner",
+    "poetryup.core.workspace",
+    "sqlite3",
+    "ssl",
+    "tomlkit",
+]
+
+# the budget of importing the CLI, relative to importing typer which the CLI
+# can't start without, so that it holds on slow and fast machines alike
+BUDGET = 3.0
+
+RUNS = 3
+
+
+def import_times() -> Dict[str, int]:
+    """Import the CLI in a fresh interpreter
+
+    Returns:
+        The cumulative import time in microseconds indexed by module name
+    """
+
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(Path(poetryup.__file__).parent.parent),
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import poetryup.main"],
+        env=env,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    # lines are: 'import time: self [us] | cumulative | imported package'
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_startup_imports_lazily() -> None:
+    times = import_times()
+    assert "poetryup.main" in times
+    assert [x for x in LAZY_MODULES if x in times] == []
+
+
+def test_startup_budget() -> None:
+    # the fastest run is the least disturbed by other processes
+    ratio = min(
+        x["poetryup.main"] / x["typer"]
+        for x in (import_times() for _ in range(RUNS))
+    )
+    assert ratio <= BUDGET, (
+        f"Importing the CLI takes {ratio:.1f} times as long as importing "
+        f"typer, the budget is {BUDGET:.1f}"
+    )
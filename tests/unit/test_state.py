@@ -0,0 +1,150 @@
+import os
+import shutil
+from dataclasses import replace
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from poetryup.core.index import IndexClient, ProjectPage
+from poetryup.core.poetry import Poetry
+from poetryup.core.runner import run
+from poetryup.core.state import State, fingerprint
+from poetryup.models.options import Options
+
+fixtures = Path(os.path.dirname(__file__)) / "fixtures"
+
+
+def test_fingerprint() -> None:
+    base = fingerprint("pyproject", "lock", Options())
+    assert base == fingerprint("pyproject", "lock", Options())
+    assert base != fingerprint("changed", "lock", Options())
+    assert base != fingerprint("pyproject", None, Options())
+    assert base != fingerprint("pyproject", "lock", Options(latest=True))
+    assert base != fingerprint(
+        "pyproject",
+        "lock",
+        Options(),
+        {"poetryup": ProjectPage(name="poetryup", versions=["0.2.0"])},
+    )
+
+
+def test_fingerprint_ignores_option_order() -> None:
+    assert fingerprint("", None, Options(names=["a", "b"])) == fingerprint(
+        "", None, Options(names=["b", "a"])
+    )
+
+
+def test_state(tmp_path: Path) -> None:
+    state = State(tmp_path / "project", tmp_path / "cache")
+    assert state.fingerprint is None
+
+    state.save("fingerprint")
+    assert State(tmp_path / "project", tmp_path / "cache").fingerprint == (
+        "fingerprint"
+    )
+    assert State(tmp_path / "other", tmp_path / "cache").fingerprint is None
+
+
+def test_run_skip_unchanged(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    update = mocker.patch.object(Poetry, "update", return_value=None)
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    fetch_pages = mocker.patch.object(
+        IndexClient,
+        "fetch_pages",
+        return_value={
+            "poetryup": ProjectPage(name="poetryup", versions=["0.2.0"])
+        },
+    )
+    project = tmp_path / "project"
+    project.mkdir()
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", project)
+    monkeypatch.chdir(project)
+    options = Options(
+        skip_unchanged=True,
+        cache_dir=tmp_path / "cache",
+        index_url="http://127.0.0.1:1/simple/",
+    )
+
+    run(options)
+    assert update.call_count == 1
+
+    # nothing changed since the last run
+    run(options)
+    assert update.call_count == 1
+
+    # other options may change the outcome
+    run(replace(options, groups=["main"]))
+    assert update.call_count == 2
+
+    pyproject = Path("pyproject.toml")
+    pyproject.write_text(pyproject.read_text() + "\n")
+    run(options)
+    assert update.call_count == 3
+
+    # a new release within the constraints may change the outcome
+    fetch_pages.return_value = {
+        "poetryup": ProjectPage(name="poetryup", versions=["0.2.0", "0.2.1"])
+    }
+    run(options)
+    assert update.call_count == 4
+
+
+def test_run_skip_unchanged_latest(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    add = mocker.patch.object(Poetry, "add", return_value=None)
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    fetch_pages = mocker.patch.object(
+        IndexClient,
+        "fetch_pages",
+        return_value={
+            "poetryup": ProjectPage(name="poetryup", versions=["0.2.0"])
+        },
+    )
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    options = Options(
+        latest=True,
+        skip_unchanged=True,
+        cache_dir=tmp_path / "cache",
+        index_url="http://127.0.0.1:1/simple/",
+        names=["poetryup"],
+    )
+
+    run(options)
+    run(options)
+    assert add.call_count == 1
+
+    # a new release changes the fingerprint
+    fetch_pages.return_value = {
+        "poetryup": ProjectPage(name="poetryup", versions=["0.2.0", "0.3.0"])
+    }
+    run(options)
+    assert add.call_count == 2
+
+
+def test_run_skip_unchanged_without_index(
+    mock_poetry_commands,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    update = mocker.patch.object(Poetry, "update", return_value=None)
+    mocker.patch.object(Poetry, "lock", return_value=None)
+    shutil.copy(fixtures / "input_pyproject/pyproject.toml", tmp_path)
+    monkeypatch.chdir(tmp_path)
+    options = Options(skip_unchanged=True, cache_dir=tmp_path / "cache")
+
+    # new releases can't be detected, thus the run is never skipped
+    run(options)
+    run(options)
+    assert update.call_count == 2
@@ -0,0 +1,62 @@
+from poetryup.core.toml_spans import scan_value_spans, splice
+
+text = """\
+# comment
+title = "spans"
+
+[tool.poetry.dependencies]
+python = "^3.7"  # comment
+"dotted.name" = '1.0'
+extras = { version = "^1.0", extras = ["a", "b"] }
+multiple = [
+    { version = "1.0", python = "<3.8" },  # [comment]
+    { version = "2.0", python = ">=3.8" },
+]
+dotted.version = "^2.0"
+enabled = true
+
+[[tool.poetry.source]]
+name = "private"
+"""
+
+
+def value(key):
+    spans = scan_value_spans(text)
+    return text[slice(*spans[key])]
+
+
+def test_scan_value_spans() -> None:
+    assert value(("title",)) == '"spans"'
+    prefix = ("tool", "poetry", "dependencies")
+    assert value((*prefix, "python")) == '"^3.7"'
+    assert value((*prefix, "dotted.name")) == "'1.0'"
+    assert value((*prefix, "extras")) == (
+        '{ version = "^1.0", extras = ["a", "b"] }'
+    )
+    assert value((*prefix, "multiple")).startswith("[\n    {")
+    assert value((*prefix, "multiple")).endswith("},\n]")
+    assert value((*prefix, "dotted", "version")) == '"^2.0"'
+    assert value((*prefix, "enabled")) == "true"
+
+
+def test_scan_value_spans_skips_arrays_of_tables() -> None:
+    spans = scan_value_spans(text)
+    assert not any(x[-1] == "name" for x in spans)
+
+
+def test_scan_value_spans_unsupported() -> None:
+    assert scan_value_spans('description = """\nmulti-line\n"""\n') is None
+    assert scan_value_spans("key value\n") is None
+    assert scan_value_spans('"esc\\"aped" = "1.0"\n') is None
+
+
+def test_scan_value_spans_crlf() -> None:
+    spans = scan_value_spans('[a]\r\nb = "1"\r\nc = "2"\r\n')
+    assert spans == {("a", "b"): (9, 12), ("a", "c"): (18, 21)}
+
+
+def test_splice() -> None:
+    assert splice("a = 1, b = 2", [((11, 12), "20"), ((4, 5), "10")]) == (
+        "a = 10, b = 20"
+    )
+    assert splice("unchanged", []) == "unchanged"
@@ -0,0 +1,64 @@
+import json
+import sys
+
+from poetryup.core.cmd import cmd_run
+from poetryup.core.trace import Tracer, tracer
+
+
+def test_span_disabled() -> None:
+    trace = Tracer()
+    with trace.span("run"):
+        pass
+    assert trace.spans == []
+
+
+def test_span() -> None:
+    trace = Tracer()
+    trace.enabled = True
+    with trace.span("run"):
+        with trace.span("resolve", group="dev"):
+            sum(range(10000))
+    with trace.span("lock"):
+        pass
+
+    assert [(x.name, x.depth) for x in trace.spans] == [
+        ("run", 0),
+        ("resolve", 1),
+        ("lock", 0),
+    ]
+    run, resolve, lock = trace.spans
+    assert run.wall >= resolve.wall > 0
+    assert resolve.start >= run.start
+    assert lock.start >= run.start + run.wall
+    assert resolve.args == {"group": "dev"}
+
+    table = trace.table().splitlines()
+    assert table[0].split() == ["SPAN", "WALL", "CPU", "CHILD", "CPU"]
+    assert table[2].startswith("  resolve")
+
+
+def test_trace_events() -> None:
+    trace = Tracer()
+    trace.enabled = True
+    with trace.span("run", command="update"):
+        pass
+
+    events = json.loads(trace.dumps())["traceEvents"]
+    assert len(events) == 1
+    assert events[0]["name"] == "run"
+    assert events[0]["ph"] == "X"
+    assert events[0]["dur"] >= 0
+    assert events[0]["args"]["command"] == "update"
+    assert set(events[0]["args"]) == {"command", "cpu", "child_cpu"}
+
+
+def test_span_records_child_process(monkeypatch) -> None:
+    trace = Tracer()
+    trace.enabled = True
+    monkeypatch.setattr(tracer, "span", trace.span)
+
+    cmd_run([sys.executable, "-c", "sum(range(100000))"])
+
+    assert len(trace.spans) == 1
+    assert trace.spans[0].name.startswith(sys.executable)
+    assert trace.spans[0].child_cpu >= 0
@@ -0,0 +1,80 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from poetryup.core.version_cache import VersionCache
+
+INDEX_URL = "https://pypi.org/simple/"
+
+
+def test_get_put(tmp_path: Path) -> None:
+    cache = VersionCache(tmp_path / "versions.sqlite3")
+    assert cache.get(INDEX_URL, ["poetryup"]) == {}
+
+    cache.put(INDEX_URL, {"Poetryup_Caret": "0.3.0", "poetryup": "0.2.0"})
+    assert cache.get(INDEX_URL, ["poetryup-caret", "other"]) == {
+        "poetryup-caret": "0.3.0"
+    }
+    assert cache.get("https://example.com/simple/", ["poetryup"]) == {}
+
+    cache.put(INDEX_URL, {"poetryup": "0.4.0"})
+    assert cache.get(INDEX_URL, ["poetryup"]) == {"poetryup": "0.4.0"}
+
+
+def test_ttl(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    cache = VersionCache(tmp_path / "versions.sqlite3", ttl=60)
+    cache.put(INDEX_URL, {"poetryup": "0.2.0"})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+    assert cache.get(INDEX_URL, ["poetryup"]) == {"poetryup": "0.2.0"}
+    monkeypatch.setattr(time, "time", lambda: now + 90)
+    assert cache.get(INDEX_URL, ["poetryup"]) == {}
+
+
+def test_disabled(tmp_path: Path) -> None:
+    cache = VersionCache(tmp_path / "versions.sqlite3", ttl=0)
+    cache.put(INDEX_URL, {"poetryup": "0.2.0"})
+    assert cache.get(INDEX_URL, ["poetryup"]) == {}
+    assert not (tmp_path / "versions.sqlite3").exists()
+
+
+def test_evicts_least_recently_used(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    clock = iter(range(1000))
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + next(clock))
+    cache = VersionCache(tmp_path / "versions.sqlite3", max_entries=2)
+
+    cache.put(INDEX_URL, {"a": "1.0"})
+    cache.put(INDEX_URL, {"b": "1.0"})
+    cache.get(INDEX_URL, ["a"])  # b is now the least recently used
+    cache.put(INDEX_URL, {"c": "1.0"})
+
+    assert cache.get(INDEX_URL, ["a", "b", "c"]) == {"a": "1.0", "c": "1.0"}
+
+
+def test_concurrent_access(tmp_path: Path) -> None:
+    def use_cache(i: int) -> None:
+        cache = VersionCache(tmp_path / "versions.sqlite3")
+        cache.put(INDEX_URL, {f"package-{i}": "1.0"})
+        cache.get(INDEX_URL, [f"package-{i}"])
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(use_cache, range(32)))
+
+    cache = VersionCache(tmp_path / "versions.sqlite3")
+    names = [f"package-{i}" for i in range(32)]
+    assert len(cache.get(INDEX_URL, names)) == 32
+
+
+def test_unusable_database(tmp_path: Path) -> None:
+    path = tmp_path / "versions.sqlite3"
+    path.write_text("not a database")
+    cache = VersionCache(path)
+    cache.put(INDEX_URL, {"poetryup": "0.2.0"})
+    assert cache.get(INDEX_URL, ["poetryup"]) == {}
@@ -0,0 +1,120 @@
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from poetryup.core.wheelhouse import Wheelhouse
+
+
+def _age(*paths: Path) -> None:
+    # files arriving after the last refresh change the modification time
+    for path in paths:
+        os.utime(path, ns=(0, 0))
+
+
+@pytest.fixture
+def wheelhouse_dir(tmp_path: Path) -> Path:
+    path = tmp_path / "wheelhouse"
+    (path / "nested").mkdir(parents=True)
+    for filename in [
+        "Foo_Bar-1.0.0-py3-none-any.whl",
+        "foo.bar-1.1.0.tar.gz",
+        "baz-2.0.0rc1-py3-none-any.whl",
+        "README.txt",
+    ]:
+        (path / filename).touch()
+    (path / "nested/baz-1.9.0.zip").touch()
+    _age(path, path / "nested")
+    return path
+
+
+def test_pages(wheelhouse_dir: Path) -> None:
+    pages = Wheelhouse(wheelhouse_dir).pages(["foo_bar", "baz", "missing"])
+
+    assert pages.keys() == {"foo-bar", "baz"}
+    assert pages["foo-bar"].versions == ["1.0.0", "1.1.0"]
+    assert pages["baz"].versions == ["1.9.0", "2.0.0rc1"]
+
+
+def test_pages_unreadable_directory(
+    wheelhouse_dir: Path,
+    mocker: MockerFixture,
+) -> None:
+    scandir = os.scandir
+
+    def scan(path: Path) -> object:
+        if Path(path).name == "nested":
+            raise PermissionError(13, "Permission denied", str(path))
+        return scandir(path)
+
+    mocker.patch("poetryup.core.wheelhouse.os.scandir", side_effect=scan)
+    pages = Wheelhouse(wheelhouse_dir).pages(["baz"])
+
+    # the readable directories are still indexed
+    assert pages["baz"].versions == ["2.0.0rc1"]
+
+
+def test_pages_file_based_index(tmp_path: Path) -> None:
+    (tmp_path / "simple/foo-bar").mkdir(parents=True)
+    (tmp_path / "simple/index.html").write_text(
+        '<a href="foo-bar/">foo-bar</a>'
+    )
+    (tmp_path / "simple/foo-bar/index.html").write_text(
+        '<a href="../../files/foo_bar-1.0.tar.gz">foo_bar-1.0.tar.gz</a>\n'
+        '<a href="foo_bar-2.0.tar.gz" data-yanked="">foo_bar-2.0.tar.gz</a>\n'
+    )
+
+    pages = Wheelhouse(tmp_path / "simple").pages(["foo_bar"])
+
+    assert pages["foo-bar"].versions == ["1.0"]
+
+
+def test_refresh_is_incremental(wheelhouse_dir: Path, tmp_path: Path) -> None:
+    cache_dir = tmp_path / "cache"
+    wheelhouse = Wheelhouse(wheelhouse_dir, cache_dir)
+    wheelhouse.refresh()
+    assert wheelhouse.directories_listed == 2
+
+    # nothing changed, the on-disk index is used as is
+    wheelhouse = Wheelhouse(wheelhouse_dir, cache_dir)
+    assert wheelhouse.refresh()["foo-bar"] == {"1.0.0", "1.1.0"}
+    assert wheelhouse.directories_listed == 0
+
+    # only the directory a file arrived in is listed again
+    (wheelhouse_dir / "nested/foo_bar-1.2.0-py3-none-any.whl").touch()
+    wheelhouse = Wheelhouse(wheelhouse_dir, cache_dir)
+    assert wheelhouse.refresh()["foo-bar"] == {"1.0.0", "1.1.0", "1.2.0"}
+    assert wheelhouse.directories_listed == 1
+
+
+def test_refresh_lists_racy_directories_again(
+    wheelhouse_dir: Path,
+    tmp_path: Path,
+) -> None:
+    # a directory modified just now may still change within the resolution of
+    # its modification time
+    os.utime(wheelhouse_dir / "nested")
+    Wheelhouse(wheelhouse_dir, tmp_path / "cache").refresh()
+
+    wheelhouse = Wheelhouse(wheelhouse_dir, tmp_path / "cache")
+    wheelhouse.refresh()
+    assert wheelhouse.directories_listed == 1
+
+
+def test_refresh_parses_changed_pages(tmp_path: Path) -> None:
+    page = tmp_path / "simple/foo/index.html"
+    page.parent.mkdir(parents=True)
+    page.write_text('<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>')
+    _age(page.parent.parent, page.parent)
+    Wheelhouse(tmp_path / "simple", tmp_path / "cache").refresh()
+
+    # the page is rewritten in place, its directory is unchanged
+    page.write_text(
+        '<a href="foo-1.0.tar.gz">foo-1.0.tar.gz</a>'
+        '<a href="foo-1.1.tar.gz">foo-1.1.tar.gz</a>'
+    )
+    _age(page.parent)
+    wheelhouse = Wheelhouse(tmp_path / "simple", tmp_path / "cache")
+    assert wheelhouse.refresh() == {"foo": {"1.0", "1.1"}}
+    assert wheelhouse.directories_listed == 0
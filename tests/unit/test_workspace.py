@@ -0,0 +1,176 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+
+import pytest
+from pytest_mock import MockerFixture
+
+from poetryup.core.workspace import (
+    CycleError,
+    InvalidProjectError,
+    ProjectResult,
+    discover_projects,
+    order_projects,
+    summarize,
+    update_workspace,
+)
+from poetryup.models.options import Options
+
+
+def create_project(
+    root: Path,
+    name: str,
+    path_dependencies: Dict[str, str] = {},
+) -> Path:
+    project = root / name
+    project.mkdir(parents=True)
+    lines = [
+        "[tool.poetry]",
+        f'name = "{name}"',
+        "",
+        "[tool.poetry.dependencies]",
+        'python = "^3.6"',
+    ]
+    for dependency, path in path_dependencies.items():
+        lines.append(f'{dependency} = {{ path = "{path}", develop = true }}')
+    (project / "pyproject.toml").write_text("\n".join(lines) + "\n")
+    return project.resolve()
+
+
+def test_discover_projects(tmp_path: Path) -> None:
+    app = create_project(tmp_path, "app")
+    lib = create_project(tmp_path, "libs/lib")
+    create_project(tmp_path, ".venv/ignored")
+    (tmp_path / "other").mkdir()
+    (tmp_path / "other/pyproject.toml").write_text("[tool.black]\n")
+
+    assert discover_projects(tmp_path) == [app, lib]
+
+
+def test_discover_projects_invalid(tmp_path: Path) -> None:
+    create_project(tmp_path, "app")
+    broken = tmp_path / "broken"
+    broken.mkdir()
+    (broken / "pyproject.toml").write_text("[tool.poetry\n")
+
+    with pytest.raises(InvalidProjectError) as e:
+        discover_projects(tmp_path)
+    assert e.value.project == broken.resolve()
+    assert str(broken.resolve()) in str(e.value)
+
+
+def test_order_projects(tmp_path: Path) -> None:
+    app = create_project(tmp_path, "app", {"lib": "../lib", "api": "../api"})
+    api = create_project(tmp_path, "api", {"lib": "../lib"})
+    lib = create_project(tmp_path, "lib", {"outside": "../../outside"})
+    tool = create_project(tmp_path, "tool")
+
+    assert order_projects([app, api, lib, tool]) == [[lib, tool], [api], [app]]
+
+
+def test_order_projects_cycle(tmp_path: Path) -> None:
+    a = create_project(tmp_path, "a", {"b": "../b"})
+    b = create_project(tmp_path, "b", {"a": "../a"})
+
+    with pytest.raises(CycleError):
+        order_projects([a, b])
+
+
+def test_update_workspace(
+    tmp_path: Path,
+    mocker: MockerFixture,
+) -> None:
+    app = create_project(tmp_path, "app", {"lib": "../lib"})
+    lib = create_project(tmp_path, "lib")
+    tool = create_project(tmp_path, "tool")
+
+    def run_project(
+        project: Path,
+        options: Options,
+        report: bool,
+    ) -> ProjectResult:
+        status = "failed" if project == lib else "updated"
+        return ProjectResult(path=project, status=status)
+
+    mocker.patch(
+        "poetryup.core.workspace.ProcessPoolExecutor",
+        ThreadPoolExecutor,
+    )
+    mock = mocker.patch(
+        "poetryup.core.workspace._run_project",
+        side_effect=run_project,
+    )
+    results = update_workspace(tmp_path, Options(latest=True), max_workers=2)
+
+    assert [(x.path, x.status) for x in results] == [
+        (lib, "failed"),
+        (tool, "updated"),
+        (app, "skipped"),
+    ]
+    assert mock.call_count == 2
+    assert summarize(results, tmp_path).splitlines() == [
+        "PROJECT  STATUS   TIME  MESSAGE",
+        "lib      failed   0.0s",
+        "tool     updated  0.0s",
+        "app      skipped  0.0s  Dependency 'lib' wasn't updated",
+    ]
+
+
+def test_update_workspace_report(
+    tmp_path: Path,
+    mocker: MockerFixture,
+) -> None:
+    create_project(tmp_path, "app")
+    decision = mocker.sentinel.decision
+
+    def run_project(
+        project: Path,
+        options: Options,
+        report: bool,
+    ) -> ProjectResult:
+        decisions = [decision] if report else []
+        return ProjectResult(
+            path=project, status="updated", decisions=decisions
+        )
+
+    mocker.patch(
+        "poetryup.core.workspace.ProcessPoolExecutor",
+        ThreadPoolExecutor,
+    )
+    mocker.patch(
+        "poetryup.core.workspace._run_project",
+        side_effect=run_project,
+    )
+    decisions: list = []
+    update_workspace(tmp_path, Options(), report=decisions.append)
+
+    assert decisions == [decision]
+
+
+def test_update_workspace_resolves_paths(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    create_project(tmp_path, "app")
+    monkeypatch.chdir(tmp_path)
+
+    mocker.patch(
+        "poetryup.core.workspace.ProcessPoolExecutor",
+        ThreadPoolExecutor,
+    )
+    mock = mocker.patch(
+        "poetryup.core.workspace._run_project",
+        side_effect=lambda project, options, report: ProjectResult(
+            path=project, status="updated"
+        ),
+    )
+    update_workspace(
+        tmp_path,
+        Options(wheelhouse=Path("wheels"), cache_dir=Path("cache")),
+    )
+
+    # relative paths are resolved against the workspace, not each project
+    options = mock.call_args[0][1]
+    assert options.wheelhouse == tmp_path.resolve() / "wheels"
+    assert options.cache_dir == tmp_path.resolve() / "cache"